@@ -8,9 +8,18 @@
 #
 
 from multiprocessing import Process, Pipe
+import atexit
+import functools
 import logging
+import os
+import signal
 import smartkeg
+import smartkeg.migrate
+import smartkeg.retention
+import smartkeg.rollup
+import sys
 import RPi.GPIO as GPIO
+import datetime
 import time
 import json
 
@@ -24,12 +33,13 @@ def config(path):
     with open(path, 'r') as f:
         return json.load(f)
 
-def dbconnect(cfg):
+def dbconnect(cfg, pooled=False):
     """
     @author:        Harrison Hubbell
     @created:       08/31/2014
     @description:   Creates a database interface for inserting and
-                    selecting data.
+                    selecting data.  A pooled interface can be shared
+                    by concurrent threads.
     """
     logging.info('Initializing Database Connection.')
 
@@ -37,24 +47,170 @@ def dbconnect(cfg):
         cfg['address'],
         cfg['schema'],
         cfg['user'],
-        cfg['password']
+        cfg['password'],
+        pool_size=cfg.get('pool_size', 4) if pooled else None,
+        pool_timeout=cfg.get('pool_timeout', 5.0),
+        backend=cfg.get('backend'),
+        prepared=cfg.get('prepared', False),
+        slow_query=cfg.get('slow_query', 0.5)
     )
 
-def model(data):
+def model(data, cfg=None, detector=None):
     """
     @author:        Harrison Hubbell
     @created:       08/17/2015
-    @description:   Generate a new time series regression model
+    @description:   Generate a new forecasting model.  The model type is
+                    chosen by the 'type' key of the model config, and
+                    defaults to a time series regression.  A 'periods'
+                    value of "auto" detects the season length from the
+                    data.
     """
     PERIODS = 7
 
-    reg = smartkeg.TimeSeriesRegression(PERIODS)
-    forecast = reg.forecast(data)
+    cfg = cfg if cfg is not None else {}
+    periods = cfg.get('periods', PERIODS)
+
+    if periods == 'auto':
+        detector = detector if detector is not None else smartkeg.PeriodDetector(PERIODS)
+        periods = detector.detect(data)
+
+    reg = smartkeg.model.create(cfg, periods)
+    forecast = None
+
+    # As with refit, a history the model cannot fit leaves it without a
+    # forecast rather than stopping the system from starting.
+    try:
+        forecast = reg.forecast(data) if data else None
+    except (ArithmeticError, ValueError) as e:
+        logging.error('Cannot forecast from %s days of history: %s', len(data), e)
 
     logging.info('New Model: %s', str(reg))
     logging.info('New Forecast: %s', forecast)
 
-    return forecast
+    return reg
+
+def model_pour(reg, series, day, amount):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Folds a pour into the model and the daily series
+                    without refitting.  A pour on the same day as the last
+                    one revises that day's total, otherwise it starts a
+                    new day.  Returns the day the pour was counted against.
+    """
+    today = datetime.date.today()
+
+    if as_date(day) == today:
+        series[-1] += amount
+        forecast = reg.revise_last(series[-1])
+    else:
+        series.append(amount)
+        forecast = reg.update(amount)
+
+    logging.info('New Forecast: %s', forecast)
+
+    return today
+
+def as_date(day):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Returns a day read from the database as a date.  MySQL
+                    hands back dates, SQLite the ISO string.
+    """
+    if day is None or isinstance(day, datetime.date):
+        return day
+
+    return datetime.datetime.strptime(str(day), '%Y-%m-%d').date()
+
+def select(dbi, query):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Runs one SELECT in its own transaction.  Returns None
+                    rather than raising while the database is unreachable,
+                    so the main loop carries on with what it has.
+    """
+    try:
+        with dbi as d:
+            return d.select(*query)
+    except smartkeg.database.DatabasePoolError as e:
+        logging.error('Cannot read from the database: %s', e)
+        return None
+
+def keg_matrix(rows, cfg=None, periods=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Builds the batch model for every keg.  Returns the
+                    keg ids, the model and the daily totals of each keg
+                    from the day it was first poured.  periods overrides
+                    the config, and is given the season length detected
+                    on the daily totals when it is "auto".
+    """
+    PERIODS = 7
+
+    cfg = cfg if cfg is not None else {}
+    periods = periods if periods is not None else cfg.get('periods', PERIODS)
+
+    if periods == 'auto':
+        logging.warning('No season length detected for the keg forecasts, using %s', PERIODS)
+        periods = PERIODS
+
+    kegs, matrix = smartkeg.model.daily_matrix(rows)
+
+    return kegs, smartkeg.BatchTimeSeriesRegression(periods), matrix
+
+def keg_model(rows, cfg=None, cache=None, periods=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Fits every keg at once and returns a dict of keg id
+                    to forecast.  Forecasts are memoized in the cache if
+                    one is given.
+    """
+    kegs, reg, matrix = keg_matrix(rows, cfg, periods)
+
+    if not kegs:
+        return {}
+
+    forecast = cache.forecast(reg, matrix) if cache is not None else reg.forecast(matrix)
+
+    return dict(zip(kegs, forecast))
+
+def publish(live, srv, forecasts, key=None, forecast=None, kegs=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Attaches keg forecasts to the now serving data and
+                    updates the live state with it.  Doubles as the
+                    callback of the forecast service, which hands over
+                    a new forecast for the given kegs when the main
+                    loop drains it.
+    """
+    if kegs:
+        forecasts.update(zip(kegs, forecast))
+
+    for beer in srv:
+        beer['forecast'] = forecasts.get(beer.get('keg_id'))
+
+    live.update(kegs=srv)
+
+def dump_stats(dbis, signum=None, frame=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Logs the query statistics of each database interface.
+                    Installed as the SIGUSR1 handler; every process logs
+                    its own.
+    """
+    for name, dbi in dbis.items():
+        logging.info(
+            'Query statistics of %s (pid %s): %s',
+            name,
+            os.getpid(),
+            json.dumps(dbi.stats.dump(), indent=4)
+        )
 
 def start(*procs):
     """
@@ -80,97 +236,101 @@ def proc(target, args=None, name=None):
 
     return Process(target=target, args=args, name=name), pipe_to
 
-def spawn_flow_meter(pipe, cfg, dbi=None):
+def spawn_flow_meter(pipe, cfg, dbi=None, wcfg=None, scfg=None):
     """
     @author:        Harrison Hubbell
     @created:       08/31/2014
-    @description:   Creates the Flow Meter process.
+    @description:   Creates the Flow Meter process.  Pours are appended
+                    to a local spool if one is configured, otherwise they
+                    go through a batch writer; either is woken to write
+                    them at once, on its own thread.
     """
+    wcfg = wcfg if wcfg is not None else {}
+
+    if scfg:
+        writer = smartkeg.Spool(
+            scfg['directory'] + 'pour.spool',
+            dbi,
+            sync=scfg.get('sync', 1.0),
+            interval=scfg.get('interval', 5.0)
+        )
+        sinks = {'spool': writer}
+    else:
+        writer = smartkeg.BatchWriter(
+            dbi,
+            size=wcfg.get('size', 100),
+            interval=wcfg.get('interval', 30.0)
+        )
+        sinks = {'writer': writer}
+
     flo = smartkeg.FlowMeterManager(
         cfg['pins'],
         pipe=pipe,
-        dbi=dbi
+        dbi=dbi,
+        **sinks
     )
-    flo.run()
 
-def spawn_temp_sensor(pipe, cfg, dbi=None):
+    with writer:
+        flo.run()
+
+def spawn_temp_sensor(pipe, cfg, dbi=None, wcfg=None, scfg=None, fridge=None):
     """
     @author:        Harrison Hubbell
     @created:       08/31/2014
-    @description:   Creates the Temperature Sensor process.
+    @description:   Creates the Temperature Sensor process.  Readings
+                    are stored against the named fridge, appended to a
+                    local spool if one is configured, otherwise they
+                    are buffered and written in batches.
     """
+    wcfg = wcfg if wcfg is not None else {}
+
+    if scfg:
+        writer = smartkeg.Spool(
+            scfg['directory'] + 'temperature.spool',
+            dbi,
+            sync=scfg.get('sync', 1.0),
+            interval=scfg.get('interval', 5.0)
+        )
+        sinks = {'spool': writer}
+    else:
+        writer = smartkeg.BatchWriter(
+            dbi,
+            size=wcfg.get('size', 100),
+            interval=wcfg.get('interval', 30.0)
+        )
+        sinks = {'writer': writer}
+
     tmp = smartkeg.TemperatureSensorManager(
         cfg['interval'],
         sensors=cfg['sensors'],
         pipe=pipe,
-        dbi=dbi
+        dbi=dbi,
+        fridge=fridge,
+        **sinks
     )
 
-    tmp.run()
+    with writer:
+        tmp.run()
 
 
 if __name__ == '__main__':
+    # Maintenance subcommands, e.g. `smartkeg migrate`
+    COMMANDS = {
+        'migrate': smartkeg.migrate.main,
+        'retention': smartkeg.retention.main,
+        'rollup': smartkeg.rollup.main
+    }
+
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        sys.exit()
+
     GPIO.setmode(GPIO.BOARD)
 
     CFG_PATH = '/etc/smartkeg/config.json'
     SRV_PATH = '/srv/smartkeg/'
-
-    # Test data frame
-    TESTDF = [
-        {
-            'name': 'Bud Light',
-            'brand': 'Budweiser',
-            'abv': 4.5,
-            'ibu': 'NA',
-            'rating': 3,
-            'remaining': .34,
-            'consumption': [
-                [0, 5], [1, 7], [2, 9], [3, 1], [4, 3],
-                [5, 6], [6, 13], [2, 2], [3, 4], [4, 10]
-            ]
-        },
-        {
-            'name': 'Fiddlehead IPA',
-            'brand': 'Fiddlehead',
-            'abv': 4.5,
-            'ibu': 'NA',
-            'rating': 3,
-            'remaining': .19,
-            'consumption': [[0, 1], [1, 8], [2, 2], [3, 4], [4, 10]]
-        },
-        {
-            'name': 'Cone Head',
-            'brand': 'Zero Gravity',
-            'abv': 4.5,
-            'ibu': 'NA',
-            'rating': 3,
-            'remaining': .7865,
-            'consumption': [[0, 1], [1, 8], [2, 2], [3, 4], [4, 9]]
-        },
-        {
-            'name': 'Hodad',
-            'brand': 'Fiddlehead',
-            'abv': 4.5,
-            'ibu': 'NA',
-            'rating': 3,
-            'remaining': .365,
-            'consumption': [[0, 1], [1, 3], [2, 4], [3, 6], [4, 8]]
-        }
-    ]
-
-    # Replacement beer when other hits 0
-    REPLF = {
-        'name': 'Baltic Porter',
-        'brand': 'Smuttynose',
-        'abv': 9.9,
-        'ibu': 'NA',
-        'rating': 5,
-        'remaining': 1,
-        'consumption': [
-            [0, 1], [1, 8], [2, 2], [4, 3],
-            [5, 6], [6, 13], [2, 2], [4, 10]
-        ]
-    }
+    REFRESH = 60
 
     cfg = config(CFG_PATH)
     fridge = cfg['fridge']
@@ -188,48 +348,123 @@ if __name__ == '__main__':
 
 
     db = dbconnect(dbconf)
+    mcfg = cfg.get('model', {})
+    ccfg = cfg.get('cache', {})
+    cache = smartkeg.ForecastCache(ccfg.get('size', 32), ccfg.get('file'))
+    atexit.register(cache.save)
 
     with db as d:
-        srv = TESTDF#d.select(*smartkeg.query.get_now_serving())
+        srv = d.select(*smartkeg.query.get_now_serving()) or []
         tmp = d.select(*smartkeg.query.get_fridge_temp(fridge.items()))
+        daily = d.select(*smartkeg.query.get_daily()) or []
+        keg_daily = d.select(*smartkeg.query.get_keg_daily()) or []
+
+    detector = smartkeg.PeriodDetector() if mcfg.get('periods') == 'auto' else None
+    series = [x['amount'] for x in daily]
+    reg = model(series, mcfg, detector)
+    day = as_date(daily[-1]['day']) if daily else None
+
+    # The kegs share the season length found on the daily totals.
+    forecasts = keg_model(keg_daily, mcfg, cache, reg.periods)
+
+    for beer in srv:
+        beer['forecast'] = forecasts.get(beer.get('keg_id'))
 
     http = smartkeg.HTTPServerManager(
         cfg['server']['host'],
         cfg['server']['port'],
         SRV_PATH,
-        dbi=dbconnect(dbconf)
+        dbi=dbconnect(dbconf, pooled=True),
+        mode=cfg['server'].get('mode', 'threaded'),
+        workers=dbconf.get('pool_size', 4),
+        cache_size=cfg['server'].get('cache_size', 64),
+        cache_ttl=cfg['server'].get('cache_ttl', 60.0)
     )
-    http.sse_response(json.dumps(srv))
+    live = smartkeg.LiveState(http.snapshot, default=smartkeg.http.default)
+    live.update(kegs=srv, temperature=None, forecast=reg.prediction)
+
+    signal.signal(signal.SIGUSR1, functools.partial(dump_stats, {'main': db, 'http': http.dbi}))
     http.start()
 
+    service = smartkeg.ForecastService(
+        mcfg.get('workers', 1),
+        callback=functools.partial(publish, live, srv, forecasts),
+        cache=cache
+    )
+
     flowproc, flowpipe = proc(
         spawn_flow_meter,
-        args=(cfg['flow_meter'], dbconnect(dbconf))
+        args=(cfg['flow_meter'], dbconnect(dbconf), cfg.get('writer'), cfg.get('spool'))
     )
 
     tempproc, temppipe = proc(
         spawn_temp_sensor,
-        args=(cfg['temp_sensor'], dbconnect(dbconf))
+        args=(cfg['temp_sensor'], dbconnect(dbconf), cfg.get('writer'), cfg.get('spool'), fridge.get('name'))
     )
 
     start(flowproc, tempproc)
 
+    rcfg = cfg.get('retention', {})
+    retention = smartkeg.retention.Retention(
+        dbconnect(dbconf),
+        raw_days=rcfg.get('raw_days', 30),
+        hourly_days=rcfg.get('hourly_days', 365),
+        interval=rcfg.get('interval', 3600.0)
+    )
+    retention.start()
+
+    refreshed = time.time()
+    fitted = datetime.date.today()
+    poured = False
+
     while True:
+        # A pour is written by the flow process's own thread, so the kegs
+        # now serving are reread on the pass after it, once it has landed.
+        refresh = poured or time.time() - refreshed >= REFRESH
+        poured = False
+
         if flowpipe.poll():
-            with db as d:
-                srv = d.select(*smartkeg.query.get_now_serving())
+            pour = flowpipe.recv()
+            http.invalidate('pour')
+            day = model_pour(reg, series, day, pour['amount'])
 
-        if temppipe.poll():
-            with db as d:
-                tmp = d.select(*smartkeg.query.get_fridge_temp(fridge.items()))
+            if detector and detector.detect(series) != reg.periods:
+                reg = model(series, mcfg, detector)
+                fitted = None
+
+            live.update(forecast=reg.prediction)
+            poured = True
 
-        for i, beer in enumerate(srv):
-            #subtract a little beer
-            beer['remaining'] -= .001
+        if datetime.date.today() != fitted:
+            # The kegs are refit only once a day has closed, or when the
+            # season length changes; pours in between move the daily
+            # forecast above incrementally.
+            rows = select(db, smartkeg.query.get_keg_daily())
 
-            if beer['remaining'] < 0:
-                srv[i] = dict(REPLF)
+            if rows is not None:
+                kegs, batch, matrix = keg_matrix(rows, mcfg, reg.periods)
+
+                if kegs:
+                    service.submit('kegs', batch, matrix, kegs)
+
+                fitted = datetime.date.today()
+
+        if refresh:
+            # Kegs and ratings also change through the API, so the kegs
+            # now serving are reread now and then as well as on a pour.
+            rows = select(db, smartkeg.query.get_now_serving())
+
+            if rows is not None:
+                srv[:] = rows
+                publish(live, srv, forecasts)
+                flowpipe.send({'kegs': sorted(x['keg_id'] for x in srv)})
+
+            cache.save()
+            refreshed = time.time()
+
+        service.drain()
+
+        if temppipe.poll():
+            live.update(temperature=temppipe.recv())
 
-        http.sse_response(json.dumps(srv))
         time.sleep(1)
-        #time.sleep(0.1)
@@ -1,5 +1,10 @@
-from .database import DatabaseInterface
+from .database import DatabaseInterface, BatchWriter
 from .peripherals import TemperatureSensorManager, FlowMeterManager
-from .http import HTTPServerManager
-from .model import TimeSeriesRegression
+from .http import HTTPServerManager, LiveState
+from .model import TimeSeriesRegression, VectorizedTimeSeriesRegression, HoltWinters, PeriodDetector, BatchTimeSeriesRegression
+from .cache import ForecastCache
+from .service import ForecastService
+from .spool import Spool
+from . import inventory
+from . import model
 from . import query
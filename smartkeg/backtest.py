@@ -0,0 +1,194 @@
+#
+# Filename:     backtest.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Rolling origin backtests for the forecasting models.  The
+#               history is replayed, the model is refit at each origin, and
+#               its forecast is scored against what was actually poured.
+#
+#               Usage: python -m smartkeg.backtest (--csv FILE | --config FILE)
+#
+
+from __future__ import division, print_function
+from multiprocessing import Pool
+from .database import DatabaseInterface
+from . import model, query
+import argparse
+import csv
+import json
+import time
+
+def load_csv(path, column='amount'):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Reads a daily consumption series from a CSV file.  Uses
+                    the named column if the file has a header with it,
+                    otherwise the last column of every row.
+    """
+    with open(path, 'r') as f:
+        rows = list(csv.reader(f))
+
+    if rows and column in rows[0]:
+        i = rows[0].index(column)
+        return [float(x[i]) for x in rows[1:] if x]
+
+    return [float(x[-1]) for x in rows if x]
+
+def load_db(dbi):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Reads the daily consumption series from the KegDaily
+                    rollup.
+    """
+    with dbi as d:
+        return [float(x['amount']) for x in d.select(*query.get_daily()) or []]
+
+def evaluate(cfg, data, origin, horizon):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Fits a model on the history before the origin and scores
+                    its forecast of the following horizon.  A history the
+                    model cannot be fit to is scored as None.  Module level
+                    so it can be run in a worker process.
+    """
+    reg = model.create(cfg)
+
+    start = time.time()
+    try:
+        forecast = reg.forecast(data[:origin])
+    except ZeroDivisionError:
+        forecast = None
+    latency = time.time() - start
+
+    if forecast is None:
+        return {'origin': origin, 'mae': None, 'mape': None, 'latency': latency}
+
+    actual = data[origin:origin + horizon]
+    errors = [abs(a - f) for a, f in zip(actual, forecast)]
+    ratios = [e / abs(a) for e, a in zip(errors, actual) if a]
+
+    return {
+        'origin': origin,
+        'mae': sum(errors) / len(errors),
+        'mape': 100 * sum(ratios) / len(ratios) if ratios else None,
+        'latency': latency
+    }
+
+
+class Backtest(object):
+    def __init__(self, cfg=None, horizon=None, start=None, step=1, workers=None):
+        self.cfg = cfg if cfg is not None else {}
+        self.periods = model.create(self.cfg).periods
+        self.horizon = horizon if horizon is not None else self.periods
+        self.start = start if start is not None else 2 * self.periods
+        self.step = step
+        self.workers = workers
+        self.results = []
+
+    def origins(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Every origin with a full training window before it
+                        and at least one actual after it.
+        """
+        return range(self.start, len(data), self.step)
+
+    def run(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Scores every origin, in parallel across the worker
+                        processes, and returns the per-origin results.
+        """
+        jobs = [(self.cfg, data, x, self.horizon) for x in self.origins(data)]
+
+        if self.workers != 1 and len(jobs) > 1:
+            with Pool(self.workers) as pool:
+                self.results = pool.starmap(evaluate, jobs)
+        else:
+            self.results = [evaluate(*job) for job in jobs]
+
+        return self.results
+
+    def summary(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Averages the results over every origin.
+        """
+        mae = [x['mae'] for x in self.results if x['mae'] is not None]
+        mape = [x['mape'] for x in self.results if x['mape'] is not None]
+        n = len(self.results)
+
+        return {
+            'origins': n,
+            'mae': sum(mae) / len(mae) if mae else None,
+            'mape': sum(mape) / len(mape) if mape else None,
+            'latency': sum(x['latency'] for x in self.results) / n if n else None,
+            'latency_max': max(x['latency'] for x in self.results) if n else None
+        }
+
+
+def main(argv=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description='Backtest Smartkeg forecasting models.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help='CSV file of daily consumption')
+    source.add_argument('--config', help='Smartkeg config, to read the KegDaily rollup')
+    parser.add_argument('--type', default='regression', help='regression or holtwinters')
+    parser.add_argument('--periods', type=int, default=7)
+    parser.add_argument('--horizon', type=int)
+    parser.add_argument('--start', type=int)
+    parser.add_argument('--step', type=int, default=1)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--verbose', action='store_true', help='print every origin')
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        data = load_csv(args.csv)
+    else:
+        with open(args.config, 'r') as f:
+            cfg = json.load(f)['database']
+
+        data = load_db(DatabaseInterface(
+            cfg['address'],
+            cfg['schema'],
+            cfg['user'],
+            cfg['password'],
+            pool_size=cfg.get('pool_size'),
+            pool_timeout=cfg.get('pool_timeout', 5.0),
+            backend=cfg.get('backend', 'mysql')
+        ))
+
+    test = Backtest(
+        {'type': args.type, 'periods': args.periods},
+        horizon=args.horizon,
+        start=args.start,
+        step=args.step,
+        workers=args.workers
+    )
+    test.run(data)
+
+    if args.verbose:
+        print('{:>8} {:>10} {:>10} {:>12}'.format('origin', 'mae', 'mape', 'latency(ms)'))
+        for x in test.results:
+            print('{:>8} {:>10.3f} {:>10} {:>12.3f}'.format(
+                x['origin'],
+                x['mae'] if x['mae'] is not None else float('nan'),
+                '{:.2f}'.format(x['mape']) if x['mape'] is not None else '-',
+                x['latency'] * 1000
+            ))
+
+    print(json.dumps(test.summary(), indent=4))
+
+
+if __name__ == '__main__':
+    main()
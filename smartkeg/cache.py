@@ -0,0 +1,176 @@
+#
+# Filename:     cache.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Memoizes model forecasts on a fingerprint of the input series
+#               and model parameters, so an unchanged series is never refit.
+#
+
+from collections import OrderedDict
+import numpy as np
+import hashlib
+import logging
+import os
+import pickle
+import threading
+
+class ForecastCache(object):
+    PARAMS = ('periods', 'alpha', 'beta', 'gamma', 'seasonal')
+
+    def __init__(self, size=32, path=None):
+        self.size = size
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.lock = threading.RLock()
+
+        if self.path:
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, model, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Fingerprints the model type, its parameters and the
+                        raw bytes of the input series, or of each row of a
+                        batch, whose rows may differ in length.
+        """
+        if len(data) and np.ndim(data[0]):
+            rows = [np.asarray(x, dtype=float) for x in data]
+        else:
+            rows = [np.asarray(data, dtype=float)]
+
+        params = [(x, getattr(model, x)) for x in self.PARAMS if hasattr(model, x)]
+
+        digest = hashlib.sha1(type(model).__name__.encode('utf-8'))
+        digest.update(repr(params).encode('utf-8'))
+        digest.update(repr([x.shape for x in rows]).encode('utf-8'))
+
+        for row in rows:
+            digest.update(row.tobytes())
+
+        return digest.hexdigest()
+
+    def forecast(self, model, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the cached forecast for this model and series,
+                        or fits the model and caches its forecast.
+        """
+        res = self.lookup(model, data)
+
+        if res is None:
+            res = self.store(model, data, model.forecast(data))
+
+        return res
+
+    def lookup(self, model, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the cached forecast for this model and series,
+                        or None on a miss.
+        """
+        key = self.key(model, data)
+
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+            self.misses += 1
+
+        return None
+
+    def store(self, model, data, forecast):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Caches a forecast fitted elsewhere.  The least
+                        recently used entry is evicted when full.  It
+                        reaches the disk at the next save.
+        """
+        key = self.key(model, data)
+
+        with self.lock:
+            self.entries[key] = forecast
+            self.dirty = True
+
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+        return forecast
+
+    def clear(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Drops every cached forecast, from the disk too at
+                        the next save.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.dirty = True
+
+    def load(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Loads cached forecasts persisted by a previous run.
+                        A missing or unreadable file starts an empty cache;
+                        a file that cannot be unpickled, whatever it
+                        raises, is logged and overwritten at the next save.
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                self.entries = OrderedDict(pickle.load(f))
+        except FileNotFoundError as e:
+            logging.info('Forecast cache not loaded: %s', e)
+            self.entries = OrderedDict()
+        except Exception as e:
+            logging.warning('Forecast cache %s is unreadable, starting empty: %r', self.path, e)
+            self.entries = OrderedDict()
+
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Persists cached forecasts if any were stored since
+                        the last save.  Called periodically and on exit;
+                        the entries are copied under the lock and written
+                        outside it, so lookups never wait on the disk.
+                        The file is replaced atomically so a crash never
+                        leaves a partial cache.
+        """
+        if not self.path:
+            return
+
+        with self.lock:
+            if not self.dirty:
+                return
+
+            entries = list(self.entries.items())
+            self.dirty = False
+
+        tmp = self.path + '.tmp'
+
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump(entries, f)
+
+            os.replace(tmp, self.path)
+        except (IOError, OSError) as e:
+            logging.error('Failed to save forecast cache: %s', e)
+
+            with self.lock:
+                self.dirty = True
@@ -2,19 +2,587 @@
 # Filename:     database.py
 # Author:       Harrison Hubbell
 # Date:         09/01/2014
-# Description:  Manages connections and transactions with MySQL databases.
+# Description:  Manages connections and transactions with MySQL databases,
+#               or an embedded SQLite database.
 #
 
+from collections import OrderedDict
 import mysql.connector
+import atexit
+import bisect
 import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+class DatabasePoolError(Exception):
+    def __str__(self):
+        return 'No database connection available'
+
+
+class MySQLBackend(object):
+    NAME = 'mysql'
+    Error = mysql.connector.Error
+    # Errors for the data sent, which no retry would get past.
+    Refused = (mysql.connector.IntegrityError, mysql.connector.DataError)
+
+    def __init__(self):
+        self.unprepared = False
+
+    def connect(self, addr, dbn, user, pwd):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Connects to the MySQL server.
+        """
+        return mysql.connector.connect(
+            user=user,
+            password=pwd,
+            host=addr,
+            database=dbn
+        )
+
+    def cursor(self, conn):
+        return conn.cursor(dictionary=True)
+
+    def prepared(self, conn):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   A cursor that prepares its statement on the server
+                        the first time it is executed, and afterwards only
+                        sends parameters.  Older mysql.connector releases
+                        cannot return a prepared cursor's rows as dicts;
+                        with those a plain cursor is used instead, so the
+                        results keep their shape.
+        """
+        if not self.unprepared:
+            try:
+                return conn.cursor(prepared=True, dictionary=True)
+            except ValueError as e:
+                logging.warning('Prepared statements are not available, using plain cursors: %s', e)
+                self.unprepared = True
+
+        return self.cursor(conn)
+
+    def stream(self, conn):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   An unbuffered cursor, which reads rows from the
+                        server as they are fetched rather than all at once.
+        """
+        return conn.cursor(dictionary=True, buffered=False)
+
+    def discard(self, cur):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Reads off the rest of an unbuffered result, which
+                        must be done before the connection can be reused.
+        """
+        while cur.fetchmany(1000):
+            pass
+
+    def ping(self, conn):
+        return conn.is_connected()
+
+    def translate(self, query):
+        return query
+
+    def explain(self, query):
+        return 'EXPLAIN ' + query
+
+    def scans(self, plan):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The tables an EXPLAIN plan reads in full.
+        """
+        return [x['table'] for x in plan if x.get('type') == 'ALL']
+
+
+class SQLiteBackend(object):
+    NAME = 'sqlite'
+    Error = sqlite3.Error
+    Refused = (sqlite3.IntegrityError, sqlite3.DataError)
+    PRAGMAS = (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('foreign_keys', 'ON'),
+        ('temp_store', 'MEMORY'),
+        ('cache_size', -8000),
+        ('busy_timeout', 5000)
+    )
+    ARG = r'((?:[^(),]|\([^()]*\))+)'
+    DIALECT = (
+        (re.compile(r'%s'), '?'),
+        (re.compile(r'\bINSERT\s+IGNORE\b', re.I), 'INSERT OR IGNORE'),
+        (re.compile(r'\bDATEDIFF\s*\(' + ARG + ',' + ARG + r'\)', re.I), r'CAST(julianday(\1) - julianday(\2) AS INTEGER)'),
+        (re.compile(r"\bDATE_FORMAT\s*\(" + ARG + r",\s*('[^']*')\)", re.I), r'strftime(\2, \1)')
+    )
+    SCHEMA = (
+        (re.compile(r'^\s*(DROP SCHEMA|CREATE SCHEMA|GRANT|USE)\b.*$', re.I | re.M), ''),
+        (re.compile(r'^\s*DELIMITER\b.*$', re.I | re.M), ''),
+        (re.compile(r'\bEND\s*//', re.I), 'END;'),
+        (re.compile(r'\bINSERT\s+IGNORE\b', re.I), 'INSERT OR IGNORE'),
+        (re.compile(r'\s+AUTO_INCREMENT\b', re.I), ''),
+        (re.compile(r'\bTIMESTAMP(\s+)NOT NULL\b(?!\s+DEFAULT)', re.I), r'TIMESTAMP\1NOT NULL DEFAULT CURRENT_TIMESTAMP')
+    )
+
+    def __init__(self):
+        self.translated = {}
+
+    def connect(self, addr, dbn, user, pwd):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Opens the SQLite database file named by dbn; the
+                        address and credentials are unused.  The journal
+                        is switched to WAL so readers never block the
+                        writer, and the cache is kept in memory.  SQLite
+                        keeps compiled statements per connection, keyed
+                        on their text, so its statement cache is sized to
+                        match the registry.
+        """
+        conn = sqlite3.connect(dbn, timeout=5.0, check_same_thread=False, cached_statements=StatementRegistry.SIZE)
+        conn.row_factory = lambda cur, row: {d[0]: v for d, v in zip(cur.description, row)}
+
+        for pragma, value in self.PRAGMAS:
+            conn.execute('PRAGMA {} = {}'.format(pragma, value))
+
+        return conn
+
+    def cursor(self, conn):
+        return conn.cursor()
+
+    def prepared(self, conn):
+        return conn.cursor()
+
+    def stream(self, conn):
+        return conn.cursor()
+
+    def discard(self, cur):
+        pass
+
+    def ping(self, conn):
+        conn.execute('SELECT 1')
+        return True
+
+    def translate(self, query):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Rewrites MySQL SQL for SQLite: %s placeholders,
+                        INSERT IGNORE, DATEDIFF and DATE_FORMAT, whose
+                        date codes strftime shares.  IFNULL and DATE are
+                        shared by both dialects.  Translations are cached
+                        per query text.
+        """
+        res = self.translated.get(query)
+
+        if res is None:
+            res = query
+            for pattern, repl in self.DIALECT:
+                res = pattern.sub(repl, res)
+            self.translated[query] = res
+
+        return res
+
+    def explain(self, query):
+        return 'EXPLAIN QUERY PLAN ' + query
+
+    def scans(self, plan):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The tables a query plan reads in full: scans that
+                        use no index, other than of subqueries and
+                        constant rows.
+        """
+        res = []
+
+        for x in plan:
+            detail = x['detail'].split()
+
+            if detail[0] == 'SCAN' and 'INDEX' not in detail and detail[1] != 'CONSTANT' and not detail[1].startswith('('):
+                res.append(detail[1])
+
+        return res
+
+    def schema(self, script):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Rewrites the MySQL build script for SQLite.
+        """
+        for pattern, repl in self.SCHEMA:
+            script = pattern.sub(repl, script)
+
+        return script
+
+
+BACKENDS = {
+    MySQLBackend.NAME: MySQLBackend,
+    SQLiteBackend.NAME: SQLiteBackend
+}
+
+
+class QueryStats(object):
+    BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+    def __init__(self, slow=0.5):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Counts executions, rows, errors and a latency
+                        histogram per query shape.  Queries taking at
+                        least slow seconds are logged.
+        """
+        self.slow = slow
+        self.shapes = {}
+        self.names = {}
+        self.lock = threading.Lock()
+
+    def name(self, query):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The query text with its whitespace collapsed, which
+                        is the same for every execution of a shape.
+        """
+        res = self.names.get(query)
+
+        if res is None:
+            res = self.names[query] = ' '.join(query.split())
+
+        return res
+
+    def record(self, query, elapsed, rows=0, error=False, params=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Records one execution of a query.
+        """
+        name = self.name(query)
+
+        with self.lock:
+            entry = self.shapes.get(name)
+
+            if entry is None:
+                entry = self.shapes[name] = {
+                    'count': 0,
+                    'errors': 0,
+                    'rows': 0,
+                    'total': 0.0,
+                    'max': 0.0,
+                    'buckets': [0] * (len(self.BUCKETS) + 1)
+                }
+
+            entry['count'] += 1
+            entry['errors'] += bool(error)
+            entry['rows'] += max(rows or 0, 0)
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['buckets'][bisect.bisect_left(self.BUCKETS, elapsed)] += 1
+
+        if self.slow is not None and elapsed >= self.slow:
+            logging.warning('Slow query (%.1f ms): %s\nparams:\n%s', elapsed * 1000, name, params)
+
+    def percentile(self, entry, q):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Estimates a latency percentile as the upper bound
+                        of the histogram bucket it falls in.
+        """
+        rank = q * entry['count']
+        seen = 0
+
+        for bound, count in zip(self.BUCKETS, entry['buckets']):
+            seen += count
+            if seen >= rank:
+                return min(bound, entry['max'])
+
+        return entry['max']
+
+    def dump(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the statistics of every query shape, the
+                        most total time first.  Times are milliseconds.
+        """
+        with self.lock:
+            entries = [(name, dict(x, buckets=list(x['buckets']))) for name, x in self.shapes.items()]
+
+        res = []
+
+        for name, x in sorted(entries, key=lambda e: e[1]['total'], reverse=True):
+            res.append({
+                'query': name,
+                'count': x['count'],
+                'errors': x['errors'],
+                'rows': x['rows'],
+                'total': x['total'] * 1000,
+                'mean': x['total'] * 1000 / x['count'],
+                'p50': self.percentile(x, 0.5) * 1000,
+                'p95': self.percentile(x, 0.95) * 1000,
+                'max': x['max'] * 1000,
+                'histogram': dict(zip(
+                    ['<={}'.format(b * 1000) for b in self.BUCKETS] + ['>{}'.format(self.BUCKETS[-1] * 1000)],
+                    x['buckets']
+                ))
+            })
+
+        return res
+
+    def clear(self):
+        with self.lock:
+            self.shapes.clear()
+
+
+class StatementRegistry(object):
+    SIZE = 64
+
+    def __init__(self, backend, size=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Keeps a prepared cursor per connection for each
+                        distinct query.  The query module formats the
+                        same text for the same endpoint and set of WHERE
+                        columns, so the text is the key of its shape.
+                        The least recently used statements of a
+                        connection are closed past the size.
+        """
+        self.backend = backend
+        self.size = size if size is not None else self.SIZE
+        self.connections = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def cursor(self, conn, query):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the prepared cursor of a query on a
+                        connection, preparing it on first use.  A
+                        connection is only used by one thread at a time,
+                        so only the counters need the lock.
+        """
+        statements = self.connections.setdefault(id(conn), OrderedDict())
+        cur = statements.get(query)
+
+        with self.lock:
+            if cur is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if cur is not None:
+            statements.move_to_end(query)
+            return cur
+
+        cur = statements[query] = self.backend.prepared(conn)
+
+        while len(statements) > self.size:
+            self.close(statements.popitem(last=False)[1])
+
+        return cur
+
+    def forget(self, conn):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Closes the prepared cursors of a connection that
+                        is being closed.
+        """
+        for cur in self.connections.pop(id(conn), {}).values():
+            self.close(cur)
+
+    def close(self, cur):
+        try:
+            cur.close()
+        except self.backend.Error:
+            pass
+
+    def stats(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the hit and miss counters.
+        """
+        with self.lock:
+            total = self.hits + self.misses
+
+            return {
+                'statements': sum(len(x) for x in self.connections.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else None
+            }
+
+
+class ConnectionPool(object):
+    def __init__(self, factory, size=4, timeout=5.0, ping=30.0, backend=None, discarded=None):
+        self.backend = backend if backend is not None else MySQLBackend()
+        self.discarded = discarded
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.ping = ping
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.created = 0
+
+    def acquire(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Checks out a connection.  Idle connections are
+                        reused, most recent first, and pinged if they sat
+                        idle long enough to have been dropped by the
+                        server.  A new connection is made while under the
+                        pool size, otherwise this waits up to the timeout
+                        for one to be released.
+        """
+        deadline = time.time() + self.timeout
+
+        while True:
+            try:
+                conn, released = self.idle.get_nowait()
+            except queue.Empty:
+                conn = self.create()
+
+                if conn is None:
+                    try:
+                        conn, released = self.idle.get(timeout=max(0, deadline - time.time()))
+                    except queue.Empty:
+                        raise DatabasePoolError
+                else:
+                    return conn
+
+            if time.time() - released < self.ping or self.healthy(conn):
+                return conn
+
+            logging.info('Discarding dead pooled database connection')
+            self.discard(conn)
+
+    def create(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Opens a new connection if the pool has room.
+                        Returns None if the pool is full.
+        """
+        with self.lock:
+            if self.created >= self.size:
+                return None
+            self.created += 1
+
+        conn = self.factory()
+
+        if conn is None:
+            with self.lock:
+                self.created -= 1
+            raise DatabasePoolError
+
+        return conn
+
+    def healthy(self, conn):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Pings the server over the connection.
+        """
+        try:
+            return self.backend.ping(conn)
+        except self.backend.Error:
+            return False
+
+    def release(self, conn):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns a connection to the pool.  Any open
+                        transaction is rolled back so the next user does
+                        not read from a stale snapshot.
+        """
+        try:
+            conn.rollback()
+        except self.backend.Error:
+            self.discard(conn)
+            return
+
+        self.idle.put((conn, time.time()))
+
+    def discard(self, conn):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Closes a connection and frees its slot.
+        """
+        with self.lock:
+            self.created -= 1
+
+        if self.discarded:
+            self.discarded(conn)
+
+        try:
+            conn.close()
+        except self.backend.Error:
+            pass
+
+    def close(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Closes every idle connection.
+        """
+        while True:
+            try:
+                conn, released = self.idle.get_nowait()
+            except queue.Empty:
+                break
+
+            self.discard(conn)
+
 
 class DatabaseInterface(object):
-    def __init__(self, addr, dbn, user, pwd):
-        self.conn = self.connect(addr, dbn, user, pwd)
-        self.cur = None
+    def __init__(self, addr, dbn, user, pwd, pool_size=None, pool_timeout=5.0, backend=None, prepared=False, slow_query=0.5, ping=30.0):
+        self.backend = BACKENDS[backend or MySQLBackend.NAME]()
+        self.stats = QueryStats(slow_query)
+        self.statements = StatementRegistry(self.backend) if prepared else None
+        self.local = threading.local()
+        self.lock = threading.RLock()
+        self.ping = ping
+        self.used = time.time()
+        self.shared = None
+        self.pool = None
+        self.factory = lambda: self.connect(addr, dbn, user, pwd)
+
+        if pool_size:
+            self.pool = ConnectionPool(
+                self.factory,
+                size=pool_size,
+                timeout=pool_timeout,
+                backend=self.backend,
+                discarded=self.statements.forget if self.statements else None
+            )
+        else:
+            self.shared = self.factory()
 
     def __del__(self):
-        self.conn.close()
+        if self.pool:
+            self.pool.close()
+        elif self.shared:
+            if self.statements:
+                self.statements.forget(self.shared)
+            self.shared.close()
 
     def __enter__(self):
         self.prepare()
@@ -23,21 +591,24 @@ class DatabaseInterface(object):
     def __exit__(self, exc, value, trace):
         self.finish()
 
+    @property
+    def conn(self):
+        return getattr(self.local, 'conn', None) or self.shared
+
+    @property
+    def cur(self):
+        return getattr(self.local, 'cur', None)
+
     def connect(self, addr, dbn, user, pwd):
         """
         @author:        Harrison Hubbell
         @created:       10/05/2014
-        @description:   Attempts to connect to the MySQL database.
+        @description:   Attempts to connect to the database.
                         Handles errors if attempt fails.
         """
         try:
-            return mysql.connector.connect(
-                user=user,
-                password=pwd,
-                host=addr,
-                database=dbn
-            )
-        except mysql.connector.Error as e:
+            return self.backend.connect(addr, dbn, user, pwd)
+        except self.backend.Error as e:
             logging.error(
                 'The following error occured during connection: %s',
                 e
@@ -47,17 +618,133 @@ class DatabaseInterface(object):
         """
         @author:        Harrison Hubbell
         @created:       09/01/2014
-        @description:   Gets the database cursor to prep for a transaction
+        @description:   Gets the database cursor to prep for a transaction.
+                        In pooled mode a connection is checked out for the
+                        calling thread first, so concurrent threads never
+                        share a connection or cursor.  Otherwise the
+                        shared connection is held by one thread at a time
+                        until finish, and reopened if it was lost.
+        """
+        if self.pool:
+            self.local.conn = self.pool.acquire()
+
+            try:
+                self.local.cur = self.backend.cursor(self.conn)
+            except self.backend.Error:
+                self.pool.discard(self.local.conn)
+                self.local.conn = None
+                raise
+
+            return
+
+        self.lock.acquire()
+
+        try:
+            self.local.cur = self.checkout()
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def checkout(self):
         """
-        self.cur = self.conn.cursor(dictionary=True)
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns a cursor on the shared connection.  As in
+                        the pool, a connection idle long enough to have
+                        been dropped by the server is pinged first.  A
+                        missing or dead connection is reopened once, and
+                        if that fails DatabasePoolError is raised.  Called
+                        with the lock held.
+        """
+        conn = self.shared
+
+        if conn is not None and time.time() - self.used >= self.ping and not self.healthy(conn):
+            conn = None
+
+        if conn is not None:
+            try:
+                return self.backend.cursor(conn)
+            except self.backend.Error as e:
+                logging.info('Reconnecting lost database connection: %s', e)
+
+        self.reconnect()
+
+        return self.backend.cursor(self.shared)
+
+    def healthy(self, conn):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Pings the server over the connection.
+        """
+        try:
+            return self.backend.ping(conn)
+        except self.backend.Error:
+            return False
+
+    def reconnect(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Replaces the shared connection with a new one.
+                        Called with the lock held.
+        """
+        if self.shared is not None:
+            if self.statements:
+                self.statements.forget(self.shared)
+
+            try:
+                self.shared.close()
+            except self.backend.Error:
+                pass
+
+        self.shared = self.factory()
+
+        if self.shared is None:
+            raise DatabasePoolError
 
     def finish(self):
         """
         @author:        Harrison Hubbell
         @created:       09/18/2015
-        @description:   Closes the database cursor
+        @description:   Closes the database cursor, and returns a pooled
+                        connection to the pool or lets go of the shared
+                        one.
+        """
+        try:
+            self.cur.close()
+        except self.backend.Error as e:
+            logging.error('Failed closing database cursor: %s', e)
+        finally:
+            self.local.cur = None
+
+            if self.pool:
+                self.pool.release(self.local.conn)
+                self.local.conn = None
+            else:
+                self.used = time.time()
+                self.lock.release()
+
+    def execute(self, query, params=None, many=False):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Executes a query on its prepared statement when
+                        statements are prepared, otherwise on the cursor
+                        of the transaction.  Bulk inserts always use the
+                        latter, which MySQL rewrites into one multi-row
+                        INSERT, where a prepared statement would run once
+                        per row.  Returns the cursor used.
         """
-        self.cur.close()
+        query = self.backend.translate(query)
+        cur = self.statements.cursor(self.conn, query) if self.statements and not many else self.cur
+
+        if many:
+            cur.executemany(query, params)
+        else:
+            cur.execute(query, params or ())
+
+        return cur
 
     def insert(self, query, params=None):
         """
@@ -65,16 +752,50 @@ class DatabaseInterface(object):
         @created:       09/01/2014
         @description:   Makes an INSERT transaction on the database
         """
+        start = time.time()
         try:
-            self.cur.executemany(query, params)
+            cur = self.execute(query, params, many=True)
             self.conn.commit()
-        except mysql.connector.Error as e:
+            self.stats.record(query, time.time() - start, cur.rowcount, params=params)
+        except self.backend.Error as e:
+            self.stats.record(query, time.time() - start, error=True, params=params)
             self.conn.rollback()
             logging.error(
                 'Failed INSERT transaction: %s\nQuery:\n%s\nparams:\n%s',
                 e, query, params
             )
 
+    def insert_batch(self, statements, raises=False):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Makes several INSERTs in a single transaction.
+                        Statements are (query, rows) pairs.  Returns True
+                        if the transaction committed.  With raises, a
+                        failure is raised after the rollback instead, so
+                        the caller can tell what went wrong.
+        """
+        try:
+            for query, params in statements:
+                start = time.time()
+                cur = self.execute(query, params, many=True)
+                self.stats.record(query, time.time() - start, cur.rowcount)
+            self.conn.commit()
+        except self.backend.Error as e:
+            self.stats.record(query, time.time() - start, error=True)
+            self.conn.rollback()
+            logging.error(
+                'Failed batch INSERT transaction: %s\nstatements:\n%s',
+                e, statements
+            )
+
+            if raises:
+                raise
+
+            return False
+
+        return True
+
     def select(self, query, params=None):
         """
         @author:        Harrison Hubbell
@@ -83,10 +804,12 @@ class DatabaseInterface(object):
                         and returns result
         """
         res = None
+        start = time.time()
         try:
-            self.cur.execute(query, params)
-            res = self.cur.fetchall()
-        except mysql.connector.Error as e:
+            res = self.execute(query, params).fetchall()
+            self.stats.record(query, time.time() - start, len(res), params=params)
+        except self.backend.Error as e:
+            self.stats.record(query, time.time() - start, error=True, params=params)
             self.conn.rollback()
             logging.error(
                 'Failed SELECT transaction: %s\nQuery:\n%s\nparams:\n%s',
@@ -95,18 +818,278 @@ class DatabaseInterface(object):
 
         return res
 
+    def stream(self, query, params=None, size=500):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Makes a SELECT transaction on the database and
+                        returns a generator over its rows, fetched size
+                        rows at a time on a server side cursor, so a large
+                        result is never held in memory.  The query runs,
+                        and the first rows are fetched, before this
+                        returns, so errors raise here while a response
+                        can still report them.  The stream holds its own
+                        connection and cursor until it is exhausted or
+                        closed, so it is used outside of a with block.
+                        Without a pool it opens a connection of its own
+                        rather than share one across threads.
+        """
+        conn = self.pool.acquire() if self.pool else self.factory()
+
+        if conn is None:
+            raise DatabasePoolError
+
+        cur = self.backend.stream(conn)
+        start = time.time()
+
+        try:
+            cur.execute(self.backend.translate(query), params or ())
+            first = cur.fetchmany(size)
+        except self.backend.Error as e:
+            self.stats.record(query, time.time() - start, error=True, params=params)
+            logging.error(
+                'Failed SELECT transaction: %s\nQuery:\n%s\nparams:\n%s',
+                e, query, params
+            )
+            self.release(conn, cur)
+            raise
+
+        return self.rows(conn, cur, first, size, query, params, start)
+
+    def rows(self, conn, cur, rows, size, query, params, start):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Yields the rows of a streamed SELECT, starting with
+                        those already fetched, then releases its
+                        connection.  Its latency is recorded once it is
+                        exhausted, so it includes the time spent sending
+                        the rows on.  A failure part way is raised, so the
+                        response is cut short rather than ended cleanly.
+        """
+        count = 0
+        error = False
+
+        try:
+            while rows:
+                for row in rows:
+                    yield row
+                count += len(rows)
+                rows = cur.fetchmany(size)
+        except self.backend.Error as e:
+            error = True
+            logging.error('Failed reading streamed SELECT: %s', e)
+            raise
+        finally:
+            self.stats.record(query, time.time() - start, count, error, params)
+            self.release(conn, cur)
+
+    def release(self, conn, cur):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Closes a streamed cursor, and returns a pooled
+                        connection to the pool or closes the stream's own.
+        """
+        try:
+            self.backend.discard(cur)
+            cur.close()
+        except self.backend.Error as e:
+            logging.error('Failed closing streamed SELECT: %s', e)
+
+        if self.pool:
+            self.pool.release(conn)
+        else:
+            try:
+                conn.close()
+            except self.backend.Error as e:
+                logging.error('Failed closing streamed SELECT: %s', e)
+
     def update(self, query, params=None):
         """
         @author:        Harrison Hubbell
         @created:       11/24/2014
-        @description:   Makes an UPDATE transaction on the database
+        @description:   Makes an UPDATE transaction on the database.
+                        Returns the number of rows changed, or None if
+                        it failed.
         """
+        start = time.time()
         try:
-            self.cur.execute(query, params)
+            cur = self.execute(query, params)
             self.conn.commit()
-        except mysql.connector.Error as e:
+            self.stats.record(query, time.time() - start, cur.rowcount, params=params)
+        except self.backend.Error as e:
+            self.stats.record(query, time.time() - start, error=True, params=params)
             self.conn.rollback()
             logging.error(
                 'Failed UPDATE transaction: %s\nQuery:\n%s\nparams:\n%s',
                 e, query, params
             )
+            return None
+
+        return cur.rowcount
+
+
+class BatchWriter(object):
+    def __init__(self, dbi, size=100, interval=30.0, limit=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Rows that fail to write are kept and retried, up
+                        to limit rows, after which the oldest are dropped.
+        """
+        self.dbi = dbi
+        self.size = size
+        self.interval = interval
+        self.limit = limit if limit is not None else size * 100
+        self.buffer = {}
+        self.count = 0
+        self.failing = False
+        self.lock = threading.Lock()
+        self.flushing = threading.Lock()
+        self.stopped = threading.Event()
+        self.wake = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc, value, trace):
+        self.close()
+
+    def start(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Starts flushing the buffer every interval, and
+                        makes sure it is flushed when the process exits.
+        """
+        self.thread = threading.Thread(target=self.run, name='BatchWriter')
+        self.thread.daemon = True
+        self.thread.start()
+        atexit.register(self.close)
+
+    def run(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Flushes the buffer every interval, or as soon as
+                        it fills, until closed.
+        """
+        while not self.stopped.is_set():
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self.flush()
+
+    def add(self, query, params):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Buffers rows for an INSERT, grouped by statement.
+                        params is a list of row tuples.  Once the buffer
+                        holds enough rows the flush thread is woken, so
+                        the caller never waits on the database.  While
+                        flushes are failing, rows wait for the interval.
+        """
+        with self.lock:
+            self.buffer.setdefault(query, []).extend(params)
+            self.count += len(params)
+            full = self.count >= self.size and not self.failing
+
+        if full and self.thread:
+            self.wake.set()
+        elif full:
+            self.flush()
+
+    def nudge(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Wakes the flush thread to write what is buffered
+                        now rather than at the next interval, unless
+                        flushes are failing.  Without a flush thread the
+                        buffer is flushed here.
+        """
+        if not self.thread:
+            self.flush()
+        elif not self.failing:
+            self.wake.set()
+
+    def flush(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Writes every buffered row in one transaction, one
+                        executemany per statement.  If it fails the rows
+                        are put back, ahead of any added meanwhile, to be
+                        retried.  Returns True if the rows were written.
+        """
+        with self.flushing:
+            with self.lock:
+                statements = list(self.buffer.items())
+                self.buffer = {}
+                self.count = 0
+
+            if not statements:
+                return True
+
+            try:
+                with self.dbi as dbi:
+                    committed = dbi.insert_batch(statements)
+            except Exception as e:
+                logging.error('Cannot write buffered rows: %s', e)
+                committed = False
+
+            if not committed:
+                self.restore(statements)
+
+            self.failing = not committed
+
+            return committed
+
+    def restore(self, statements):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Puts the rows of a failed flush back in the buffer.
+                        Past the limit the oldest rows are dropped, and
+                        how many is logged.
+        """
+        with self.lock:
+            buffer = {query: list(rows) for query, rows in statements}
+
+            for query, rows in self.buffer.items():
+                buffer.setdefault(query, []).extend(rows)
+
+            count = sum(len(x) for x in buffer.values())
+            dropped = 0
+
+            for rows in buffer.values():
+                over = min(count - self.limit, len(rows))
+
+                if over > 0:
+                    del rows[:over]
+                    count -= over
+                    dropped += over
+
+            self.buffer = {k: v for k, v in buffer.items() if v}
+            self.count = count
+
+        if dropped:
+            logging.error('Dropped %s buffered rows past the limit of %s', dropped, self.limit)
+
+    def close(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Stops the flush thread and writes what is left.
+        """
+        self.stopped.set()
+        self.wake.set()
+
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+        if not self.flush():
+            logging.error('Lost %s buffered rows on close', self.count)
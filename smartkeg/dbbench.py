@@ -0,0 +1,143 @@
+#
+# Filename:     dbbench.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Times the queries in query.py against each database backend.
+#               Seeding writes synthetic kegs and pours, so only point it at
+#               a scratch schema or file.
+#
+#               Usage: python -m smartkeg.dbbench --sqlite FILE [--mysql CONFIG]
+#                                                 [--seed] [--repeat N]
+#
+
+from __future__ import division, print_function
+from .database import DatabaseInterface
+from . import migrate, query
+import argparse
+import datetime
+import json
+import random
+import time
+
+QUERIES = (
+    ('get_beers', lambda: query.get_beers([])),
+    ('get_brewers', lambda: query.get_brewers([])),
+    ('get_daily', query.get_daily),
+    ('get_keg_daily', query.get_keg_daily),
+    ('get_now_serving', query.get_now_serving),
+    ('get_percent_remaining', query.get_percent_remaining),
+    ('get_volume_remaining', query.get_volume_remaining)
+)
+
+def create(dbi, path):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Creates the schema in an empty SQLite database from the
+                    MySQL build script, and migrates it to the latest
+                    version.
+    """
+    with open(path, 'r') as f:
+        dbi.conn.executescript(dbi.backend.schema(f.read()))
+
+    migrate.Migrator(dbi).migrate()
+
+def seed(dbi, kegs=4, days=365, pours=20):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Inserts a fridge, kegs being served and a history of
+                    pours for each keg.
+    """
+    start = datetime.datetime(2025, 1, 1, 12)
+    rows = []
+
+    for day in range(days):
+        for keg in range(1, kegs + 1):
+            for _ in range(random.randint(0, pours)):
+                when = start + datetime.timedelta(days=day, minutes=random.randint(0, 600))
+                rows.append((keg, when.strftime('%Y-%m-%d %H:%M:%S'), round(random.uniform(0.2, 1.0), 2)))
+
+    with dbi as d:
+        d.insert('INSERT INTO Fridge (name) VALUES (%s)', [('bench',)])
+        d.insert('INSERT INTO Brewer (name) VALUES (%s)', [('Bench Brewing',)])
+        d.insert('INSERT INTO BeerType (type, subtype) VALUES (%s, %s)', [('Ale', 'Bench')])
+        d.insert(
+            'INSERT INTO Beer (brewer_id, type_id, name) VALUES (%s, %s, %s)',
+            [(1, 1, 'Bench {}'.format(x)) for x in range(kegs)]
+        )
+        d.insert(
+            'INSERT INTO Keg (fridge_id, beer_id, volume, date_started, now_serving) VALUES (%s, %s, %s, %s, %s)',
+            [(1, x, 124.0, start.strftime('%Y-%m-%d %H:%M:%S'), 1) for x in range(1, kegs + 1)]
+        )
+        d.insert('INSERT INTO Pour (keg_id, pour_time, volume) VALUES (%s, %s, %s)', rows)
+
+    return len(rows)
+
+def run(dbi, repeat=20):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Returns the mean milliseconds of each query.
+    """
+    res = {}
+
+    for name, sql in QUERIES:
+        with dbi as d:
+            start = time.time()
+            for _ in range(repeat):
+                d.select(*sql())
+            res[name] = (time.time() - start) * 1000 / repeat
+
+    return res
+
+def main(argv=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark Smartkeg database backends.')
+    parser.add_argument('--sqlite', help='SQLite database file')
+    parser.add_argument('--mysql', help='Smartkeg config with MySQL credentials')
+    parser.add_argument('--schema', default='static/sql/build.sql', help='MySQL build script')
+    parser.add_argument('--seed', action='store_true', help='create and fill the schema first')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--prepared', action='store_true', help='use prepared statements')
+    args = parser.parse_args(argv)
+
+    backends = []
+
+    if args.sqlite:
+        dbi = DatabaseInterface(None, args.sqlite, None, None, backend='sqlite', prepared=args.prepared)
+        if args.seed:
+            create(dbi, args.schema)
+        backends.append(('sqlite', dbi))
+
+    if args.mysql:
+        with open(args.mysql, 'r') as f:
+            cfg = json.load(f)['database']
+        backends.append(('mysql', DatabaseInterface(
+            cfg['address'], cfg['schema'], cfg['user'], cfg['password'], prepared=args.prepared
+        )))
+
+    results = {}
+
+    for name, dbi in backends:
+        if args.seed:
+            random.seed(0)
+            seed(dbi, days=args.days)
+        results[name] = run(dbi, args.repeat)
+
+    print('{:<24}'.format('query (ms)') + ''.join('{:>12}'.format(x) for x, _ in backends))
+    for name, _ in QUERIES:
+        print('{:<24}'.format(name) + ''.join('{:>12.3f}'.format(results[x][name]) for x, _ in backends))
+
+    for name, dbi in backends:
+        if dbi.statements:
+            print('{} statements: {}'.format(name, dbi.statements.stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
 from .http import HTTPServerManager
+from .aio import AsyncHTTPServer
 from .handler import *
+from .sse import SSEHub
+from .snapshot import Snapshot, LiveState
 from .exception import *
@@ -0,0 +1,350 @@
+#
+# Filename:     aio.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  An asyncio HTTP server.  Connections are handled by a single
+#               event loop rather than a thread each, so idle keep-alive and
+#               SSE connections cost only a socket.  Requests are routed by
+#               RequestHandler exactly as on the threaded server, with the
+#               blocking parts (the database, disk and gzip) run on a small
+#               bounded pool of threads.
+#
+
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from .http import RequestHandler
+from .static import Asset, StaticCache
+import asyncio
+import email.parser
+import http.client
+import http.server
+import io
+import logging
+import threading
+
+class AsyncRequest(RequestHandler):
+    def __init__(self, server, command, path, version, headers, body):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   A parsed request, carrying what RequestHandler's
+                        routing and encoding read, so they can be reused
+                        without a socket.
+        """
+        self.server = server
+        self.command = command
+        self.path = path
+        self.request_version = version
+        self.headers = headers
+        self.rfile = io.BytesIO(body)
+
+
+class AsyncHTTPServer(object):
+    METHODS = ('GET', 'POST')
+
+    def __init__(self, addr, api, sse, root, workers=4, backlog=None, timeout=60):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   workers bounds both the threads running blocking
+                        work and the requests being served at once, and
+                        should match the database pool size: a streamed
+                        response holds a connection between rows, so more
+                        requests than connections could starve the pool.
+                        Past backlog requests waiting, requests are
+                        refused with a 503 rather than queued.
+        """
+        self.addr = addr
+        self.api = api
+        self.sse = sse
+        self.root = root
+        self.static = StaticCache(root)
+        self.workers = workers
+        self.backlog = backlog or workers * 8
+        self.timeout = timeout
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='HTTP')
+        self.server_address = None
+        self.loop = None
+        self.server = None
+        self.slots = None
+        self.published = None
+        self.stopped = None
+        self.started = threading.Event()
+
+    def serve_forever(self):
+        asyncio.run(self.run())
+
+    def shutdown(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Stops serve_forever from another thread.
+        """
+        if self.sse:
+            self.sse.close()
+
+        self.loop.call_soon_threadsafe(self.stopped.set)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.slots = asyncio.Semaphore(self.workers)
+        self.published = asyncio.Event()
+        self.stopped = asyncio.Event()
+        self.server = await asyncio.start_server(self.connection, *self.addr)
+        self.server_address = self.server.sockets[0].getsockname()[:2]
+
+        if self.sse:
+            self.sse.listen(self.wake)
+
+        self.started.set()
+
+        try:
+            await self.stopped.wait()
+        finally:
+            if self.sse:
+                self.sse.unlisten(self.wake)
+
+            self.server.close()
+            self.executor.shutdown(wait=False)
+
+    def wake(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Called by the SSE hub from the publishing thread.
+        """
+        try:
+            self.loop.call_soon_threadsafe(self.notify)
+        except RuntimeError:
+            pass    # The loop has already closed.
+
+    def notify(self):
+        event, self.published = self.published, asyncio.Event()
+        event.set()
+
+    def blocking(self, fn, *args):
+        return self.loop.run_in_executor(self.executor, fn, *args)
+
+    async def connection(self, reader, writer):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Serves requests on a connection until the client
+                        closes it, goes idle past the timeout, or asks
+                        for it to be closed.
+        """
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.timeout)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    break
+
+                line, _, head = head.partition(b'\r\n')
+
+                try:
+                    command, path, version = line.decode('latin-1').split()
+                    headers = email.parser.BytesParser(_class=http.client.HTTPMessage).parsebytes(head)
+                    body = await reader.readexactly(int(headers['Content-Length'] or 0))
+                except (ValueError, asyncio.IncompleteReadError):
+                    await self.error(writer, AsyncRequest(self, 'GET', '', 'HTTP/1.0', {}, b''), 400, False)
+                    break
+
+                request = AsyncRequest(self, command, path, version, headers, body)
+                connection = (headers['Connection'] or '').lower()
+                keep = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                if command == 'GET' and path[1:4] == 'sse':
+                    await self.subscribe(request, reader, writer)
+                    break
+
+                if command not in self.METHODS:
+                    await self.error(writer, request, 501, keep)
+                elif not await self.respond(request, writer, keep):
+                    break
+
+                if not keep:
+                    break
+
+        except ConnectionError as e:
+            logging.debug('HTTP client left: %s', e)
+
+        except asyncio.CancelledError:
+            pass    # The server is shutting down.
+
+        finally:
+            writer.close()
+
+    def head(self, request, code, headers, keep):
+        lines = ['{} {} {}'.format(
+            request.protocol_version,
+            code,
+            http.server.BaseHTTPRequestHandler.responses[code][0]
+        )]
+        lines.append('Server: ' + request.version_string())
+        lines.append('Date: ' + formatdate(usegmt=True))
+        lines.extend('{}: {}'.format(k, v) for k, v in headers if v is not None)
+        lines.append('Connection: ' + ('keep-alive' if keep else 'close'))
+
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def error(self, writer, request, code, keep):
+        short, explain = http.server.BaseHTTPRequestHandler.responses[code]
+        body = (http.server.DEFAULT_ERROR_MESSAGE % {
+            'code': code, 'message': short, 'explain': explain
+        }).encode('utf-8', 'replace')
+
+        writer.write(self.head(request, code, (
+            ('Content-Type', http.server.DEFAULT_ERROR_CONTENT_TYPE),
+            ('Content-Length', len(body))
+        ), keep) + body)
+        await writer.drain()
+
+    async def respond(self, request, writer, keep):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Routes a request and writes its response.  Returns
+                        False if the connection must be closed because a
+                        streamed response failed part way.
+        """
+        if self.pending >= self.backlog:
+            await self.error(writer, request, 503, keep)
+            return True
+
+        self.pending += 1
+
+        try:
+            async with self.slots:
+                return await self.route(request, writer, keep)
+        finally:
+            self.pending -= 1
+
+    async def route(self, request, writer, keep):
+        try:
+            data, content_type = await self.blocking(request.get_resource)
+        except Exception as e:
+            await self.error(writer, request, request.status(e), keep)
+            return True
+
+        if isinstance(data, Asset):
+            return await self.send_asset(request, writer, data, keep)
+
+        if data is None or isinstance(data, bytes):
+            data, content_encoding = await self.blocking(request.encode, data)
+
+            writer.write(self.head(request, 200, (
+                ('Content-type', content_type),
+                ('Content-encoding', content_encoding),
+                ('Content-length', len(data or b''))
+            ), keep) + (data or b''))
+            await writer.drain()
+            return True
+
+        return await self.stream(request, writer, data, content_type, keep)
+
+    async def send_asset(self, request, writer, asset, keep):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Sends a static asset, from memory or with sendfile.
+                        Returns False if the file shrank while it was
+                        sent, leaving the response short.
+        """
+        code, headers, body = request.conditional(asset)
+
+        writer.write(self.head(request, code, headers, keep) + (body or b''))
+        await writer.drain()
+
+        if code != 200 or body is not None:
+            return True
+
+        with open(asset.path, 'rb') as f:
+            return await self.loop.sendfile(writer.transport, f, 0, asset.size) == asset.size
+
+    async def stream(self, request, writer, data, content_type, keep):
+        data, content_encoding = request.encode_stream(data)
+
+        writer.write(self.head(request, 200, (
+            ('Content-type', content_type),
+            ('Content-encoding', content_encoding),
+            ('Transfer-encoding', 'chunked')
+        ), keep))
+
+        try:
+            while True:
+                chunk = await self.blocking(next, data, None)
+
+                if chunk is None:
+                    break
+
+                if chunk:
+                    writer.write('{:x}\r\n'.format(len(chunk)).encode('ascii') + chunk + b'\r\n')
+                    await writer.drain()
+
+            writer.write(b'0\r\n\r\n')
+            await writer.drain()
+            return True
+
+        except ConnectionError:
+            raise
+
+        except Exception as e:
+            # As on the threaded server, the headers are already sent, so
+            # the only way left to signal the failure is to close.
+            logging.error('%s %s failed while streaming: %s', request.command, request.path, e)
+            return False
+
+        finally:
+            close = getattr(data, 'close', None)
+            if close:
+                await self.blocking(close)
+
+    async def subscribe(self, request, reader, writer):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Streams SSE events to the connection until the
+                        client goes away.  Every subscriber waits on the
+                        same event, which is replaced after each publish,
+                        and on the connection reaching EOF.
+        """
+        data, seen = self.sse.subscribe(request.headers['Last-Event-ID'])
+        closed = asyncio.ensure_future(reader.read())
+
+        try:
+            writer.write(self.head(request, 200, (
+                ('Content-type', self.sse.CONTENT_TYPE),
+                ('Cache-Control', 'no-cache')
+            ), False) + data)
+            await writer.drain()
+
+            while not self.sse.closed:
+                # Anything published while the last write drained has
+                # already set a previous event, so check before waiting.
+                if self.sse.last == seen:
+                    published = asyncio.ensure_future(self.published.wait())
+                    done, _ = await asyncio.wait(
+                        (published, closed),
+                        timeout=self.sse.heartbeat,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    published.cancel()
+
+                    if closed in done:
+                        break
+
+                    if published in done and self.sse.last == seen:
+                        continue
+
+                data, seen = self.sse.poll(seen)
+                writer.write(data)
+                await writer.drain()
+
+        finally:
+            if closed.done() and not closed.cancelled():
+                closed.exception()
+
+            closed.cancel()
+            self.sse.unsubscribe()
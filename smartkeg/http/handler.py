@@ -5,48 +5,217 @@
 # Description:  HTTP handlers
 #
 
-from .. import query
+from collections import OrderedDict
+from collections.abc import Iterator
+from .. import inventory, model, query, simulation
 from . import exception
+from .snapshot import Document, serving
+from .static import Asset
 import datetime
 import json
+import logging
+import threading
+import time
 import urllib
 
-class SSEHandler(object):
-    CONTENT_TYPE = 'text/event-stream'
+def default(x):
+    return str(x) if isinstance(x, datetime.date) else x
+
+def iterencode(rows, size=16384):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Encodes an iterable of rows as a JSON array, one chunk
+                    of about size characters at a time, so the whole
+                    document is never held in memory.  Closing it closes
+                    rows too, so a stream cut short releases its
+                    connection at once.
+    """
+    encoder = json.JSONEncoder(default=default)
+    chunk = ['[']
+    length = 1
+
+    try:
+        for i, row in enumerate(rows):
+            item = (',' if i else '') + encoder.encode(row)
+            chunk.append(item)
+            length += len(item)
+
+            if length >= size:
+                yield ''.join(chunk)
+                chunk = []
+                length = 0
+    finally:
+        close = getattr(rows, 'close', None)
+
+        if close:
+            close()
+
+    chunk.append(']')
+    yield ''.join(chunk)
+
+
+class ResponseCache(object):
+    def __init__(self, size=64, ttl=60.0):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   A least recently used cache of encoded responses.
+                        Each entry expires after ttl seconds, and is
+                        dropped early when any of the events it depends
+                        on happens.
+        """
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the cached value and None, or on a miss
+                        None and the version to hand back to put.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
 
-    def __init__(self, filename, lock):
-        self.filename = filename
-        self.lock = lock
+            if entry is not None and entry[1] > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], None
 
-    def __str__(self):
-        self.lock.aquire()
+            if entry is not None:
+                del self.entries[key]
 
-        with open(self.filename, 'r') as f:
-            data = f.read()
+            self.misses += 1
+            return None, self.version
 
-        self.lock.release()
+    def put(self, key, value, events, version):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Caches a value computed since get returned version.
+                        If anything was invalidated meanwhile the value
+                        may predate it, so it is not cached.
+        """
+        with self.lock:
+            if version != self.version:
+                return
+
+            self.entries[key] = (value, time.time() + self.ttl, frozenset(events))
+            self.entries.move_to_end(key)
 
-        return data
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
 
-    def __bytes__(self):
-        self.lock.acquire()
+    def invalidate(self, *events):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Drops every entry that depends on any of events.
+        """
+        with self.lock:
+            self.version += 1
+            stale = [k for k, v in self.entries.items() if v[2].intersection(events)]
 
-        with open(self.filename, 'rb') as f:
-            data = f.read()
+            for key in stale:
+                del self.entries[key]
 
-        self.lock.release()
+            self.invalidations += len(stale)
 
-        return data
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
 
-    def handle(self, byte=True):
-        return bytes(self) if byte else str(self), self.CONTENT_TYPE
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
 
 
 class APIHandler(object):
     CONTENT_TYPE = 'text/plain'
 
-    def __init__(self, dbi):
+    # The events that change the result of each cacheable get.  Pours,
+    # temperatures and stats are never cached.  Beers and brewers are only
+    # edited by hand, which no event reports, so they expire by age.
+    DEPENDS = {
+        'beer':         (),
+        'brewer':       (),
+        'serving':      ('pour', 'keg', 'rating'),
+        'daily':        ('pour',),
+        'remaining':    ('pour', 'keg'),
+        'depletion':    ('pour', 'keg', 'forecast')
+    }
+
+    def __init__(self, dbi, cache_size=64, cache_ttl=60.0):
         self.dbi = dbi
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        self.serving = None
+        self.kegs = None
+        self.forecasts = {}
+        self.version = 0
+        self.residuals = None
+        self.risk = {}
+        self.simulator = simulation.StockoutSimulator()
+        self.lock = threading.Lock()
+
+    def invalidate(self, *events):
+        self.cache.invalidate(*events)
+
+    def publish(self, snapshot):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Takes the kegs now serving, already encoded, from a
+                        live state snapshot, to be returned as they are by
+                        /api/get/serving.  Their forecasts, as the main
+                        process last fit them, are kept for the depletion
+                        endpoint, and cached depletions are dropped when
+                        they change, along with their stockout risks.
+        """
+        self.serving = snapshot.serving
+        self.kegs = snapshot.kegs
+
+        forecasts = {x['keg_id']: x['forecast'] for x in snapshot.kegs or [] if x.get('forecast') is not None}
+
+        if forecasts != self.forecasts:
+            with self.lock:
+                self.forecasts = forecasts
+                self.version += 1
+                self.residuals = None
+                self.risk = {}
+
+            self.invalidate('forecast')
+
+    def refresh(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Rereads and encodes the kegs now serving after a
+                        keg or rating changes them, ahead of the next
+                        snapshot.  If they cannot be read, /api/get/serving
+                        goes through the cache until that snapshot.
+        """
+        try:
+            with self.dbi as dbi:
+                kegs = dbi.select(*query.get_now_serving())
+        except Exception as e:
+            logging.error('Cannot reread the kegs now serving: %s', e)
+            kegs = None
+
+        self.serving = Document(serving(kegs), default) if kegs is not None else None
 
     def check(self):
         if not self.dbi:
@@ -55,7 +224,12 @@ class APIHandler(object):
     def handle(self, method, url, headers, rfile, byte=True):
         self.check()
         page_buffer = self.transact(method, url, headers, rfile)
-        page_buffer = page_buffer.encode('utf-8') if byte else page_buffer
+
+        if byte and isinstance(page_buffer, str):
+            page_buffer = page_buffer.encode('utf-8')
+        elif byte and not isinstance(page_buffer, Asset):
+            page_buffer = (x.encode('utf-8') for x in page_buffer)
+
         return page_buffer, self.CONTENT_TYPE
 
     def parse_url(self, method, url, headers, rfile):
@@ -85,6 +259,22 @@ class APIHandler(object):
         elif endpoint == 'daily':
             sql = query.get_daily()
 
+        elif endpoint == 'depletion':
+            return self.depletion(params)
+
+        elif endpoint == 'pour':
+            return self.dbi.stream(*query.get_pours(params))
+
+        elif endpoint == 'temperature':
+            return self.dbi.stream(*query.get_temperatures(params))
+
+        elif endpoint == 'stats':
+            return {
+                'queries': self.dbi.stats.dump(),
+                'statements': self.dbi.statements.stats() if self.dbi.statements else None,
+                'cache': self.cache.stats()
+            }
+
         elif endpoint == 'remaining':
             fmt = next((x[1] for x in params if x[0] == 'format'), 'percent')
 
@@ -103,6 +293,124 @@ class APIHandler(object):
         with self.dbi as dbi:
             return dbi.select(*sql) if sql else None
 
+    def depletion(self, params):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns when each keg being served is expected to
+                        run dry and be reordered, from the forecasts the
+                        main process published with the live state.
+                        Accepts optional lead_time (days) and safety
+                        (volume) params.  Given a delivery (days) param,
+                        also simulates the probability of each keg
+                        running dry before then.
+        """
+        try:
+            lead_time = int(next((x[1] for x in params if x[0] == 'lead_time'), 1))
+            safety = float(next((x[1] for x in params if x[0] == 'safety'), 0))
+            delivery = next((int(x[1]) for x in params if x[0] == 'delivery'), None)
+        except ValueError:
+            raise exception.APIMalformedError('depletion', params=params)
+
+        kegs = self.kegs
+        forecasts = self.forecasts
+        risk = {}
+
+        if kegs is None:
+            with self.dbi as dbi:
+                kegs = dbi.select(*query.get_now_serving()) or []
+
+        if delivery and forecasts:
+            risk = self.stockout(kegs, delivery)
+
+        res = [
+            inventory.depletion(x, forecasts.get(x['keg_id']), lead_time, safety)
+            for x in kegs
+        ]
+
+        if delivery:
+            for x in res:
+                x['stockout'] = risk.get(x['keg_id'])
+
+        return res
+
+    def stockout(self, kegs, delivery):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the probability of each keg running dry
+                        within delivery days.  Risks are memoized by keg,
+                        forecast version and delivery, and only simulated
+                        again when the volume left in a keg has changed.
+                        The residuals of the kegs' histories are read once
+                        per forecast version.
+        """
+        MEMO = 1024
+
+        with self.lock:
+            version = self.version
+            forecasts = self.forecasts
+            residuals = self.residuals
+
+        left = {
+            x['keg_id']: float(x['volume']) * float(x['remaining'] or 0)
+            for x in kegs if x['keg_id'] in forecasts
+        }
+        risk = {}
+
+        for keg, volume in left.items():
+            memo = self.risk.get((keg, version, delivery))
+
+            if memo is not None and memo[0] == volume:
+                risk[keg] = memo[1]
+
+        missing = [x for x in left if x not in risk]
+
+        if missing and residuals is None:
+            residuals = self.fit_residuals(forecasts)
+
+        missing = [x for x in missing if x in residuals]
+
+        if missing:
+            res = self.simulator.simulate(
+                [left[x] for x in missing],
+                [forecasts[x] for x in missing],
+                [residuals[x] for x in missing],
+                delivery
+            )
+            risk.update(zip(missing, res))
+
+        with self.lock:
+            if version == self.version:
+                if len(self.risk) >= MEMO:
+                    self.risk = {}
+
+                self.residuals = residuals
+                self.risk.update(((x, version, delivery), (left[x], risk[x])) for x in missing)
+
+        return risk
+
+    def fit_residuals(self, forecasts):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the in-sample errors of each keg's history
+                        under the published season length, which the
+                        stockout simulation draws its noise from.
+        """
+        with self.dbi as dbi:
+            rows = dbi.select(*query.get_keg_daily()) or []
+
+        ids, matrix = model.daily_matrix([x for x in rows if x['keg_id'] in forecasts])
+
+        if not ids:
+            return {}
+
+        reg = model.BatchTimeSeriesRegression(len(next(iter(forecasts.values()))))
+        reg.forecast(matrix)
+
+        return dict(zip(ids, reg.residuals(matrix)))
+
     def set(self, endpoint, params):
         res = None
 
@@ -119,6 +427,28 @@ class APIHandler(object):
         else:
             raise exception.APIMalformedError(endpoint)
 
+        self.invalidate(endpoint)
+        self.refresh()
+
+        return res
+
+    def cached(self, endpoint, params):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the encoded result of a get, from the cache
+                        if it is there.  Failed queries are not cached.
+        """
+        key = (endpoint, tuple(sorted(params)))
+        res, version = self.cache.get(key)
+
+        if res is None:
+            data = self.get(endpoint, params)
+            res = json.dumps(data, default=default)
+
+            if data is not None:
+                self.cache.put(key, res, self.DEPENDS[endpoint], version)
+
         return res
 
     def transact(self, method, url, headers, rfile):
@@ -134,7 +464,13 @@ class APIHandler(object):
         path, params = self.parse_url(method, url, headers, rfile)
 
         if len(path) >= 2:
-            if path[0] == 'get':
+            if path[:2] == ['get', 'serving'] and not params and self.serving is not None:
+                return self.serving
+
+            elif path[0] == 'get' and path[1] in self.DEPENDS:
+                return self.cached(path[1], params)
+
+            elif path[0] == 'get':
                 res = self.get(path[1], params)
 
             elif path[0] == 'set' and method == 'POST':
@@ -145,7 +481,7 @@ class APIHandler(object):
         else:
             raise exception.APIMalformedError(url, method=method)
 
-        return json.dumps(
-            res,
-            default=lambda x: str(x) if isinstance(x, datetime.date) else x
-        )
+        if isinstance(res, Iterator):
+            return iterencode(res)
+
+        return json.dumps(res, default=default)
@@ -6,19 +6,26 @@
 #
 
 from socketserver import ThreadingMixIn
-from multiprocessing import Process, Lock
-from . import exception, handler
+from multiprocessing import Process, Queue
+from .. import database
+from . import exception, handler, sse, static
 import logging
 import http.server
 import io
+import queue
 import socket
 import qrcode
 import qrcode.image.svg
 import urllib.parse
 import gzip
+import threading
+import zlib
 
 class RequestHandler(http.server.BaseHTTPRequestHandler):
     _INDEX = 'index.html'
+    protocol_version = 'HTTP/1.1'
+    timeout = 60
+    disable_nagle_algorithm = True
 
     def get_content_type(self, req):
         """
@@ -27,13 +34,7 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         @description:   Return content type based on file.  Essentially
                         just a lot of if statements
         """
-        if req.endswith('.css'):    return 'text/css'
-        if req.endswith('.html'):   return 'text/html'
-        if req.endswith('.ico'):    return 'image/x-icon'
-        if req.endswith('.js'):     return 'application/javascript'
-        if req.endswith('.pdf'):    return 'application/pdf'
-        if req.endswith('.png'):    return 'image/png'
-        if req.endswith('.svg'):    return 'image/svg+xml'
+        return static.content_type(req)
 
     def get_resource(self):
         """
@@ -52,15 +53,10 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
                 self.rfile
             )
 
-        elif self.path[1:4] == 'sse':
-            page_buffer, content_type = self.server.sse.handle()
-
         else:
-            page = self.path[1:] or self._INDEX
-            content_type = self.get_content_type(page)
-
-            with open(self.server.root + page, 'rb') as f:
-                page_buffer = f.read()
+            page = urllib.parse.urlsplit(self.path).path[1:] or self._INDEX
+            page_buffer = self.server.static.get(page)
+            content_type = page_buffer.content_type
 
         return page_buffer, content_type
 
@@ -75,7 +71,7 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         encoding = None
         fbuffer = stream
 
-        if ENCODING in self.headers['Accept-Encoding'] and stream is not None:
+        if ENCODING in (self.headers['Accept-Encoding'] or '') and stream is not None:
             with gzip.GzipFile(fileobj=output, mode='w', compresslevel=5) as f:
                 f.write(stream)
 
@@ -84,6 +80,186 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
 
         return fbuffer, encoding
 
+    def encode_stream(self, stream):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Compresses a streamed response body a chunk at a
+                        time.
+        """
+        ENCODING = 'gzip'
+
+        if ENCODING not in (self.headers['Accept-Encoding'] or ''):
+            return stream, None
+
+        def compress():
+            z = zlib.compressobj(5, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+            for chunk in stream:
+                data = z.compress(chunk)
+                if data:
+                    yield data
+
+            yield z.flush()
+
+        return compress(), ENCODING
+
+    def respond(self, data, content_type):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Sends a response.  A bytes body is sent whole with
+                        its length; any other body is an iterable of
+                        chunks, sent with chunked transfer encoding as it
+                        is produced.
+        """
+        if isinstance(data, static.Asset):
+            return self.send_asset(data)
+
+        streamed = data is not None and not isinstance(data, bytes)
+
+        if streamed:
+            data, content_encoding = self.encode_stream(data)
+        else:
+            data, content_encoding = self.encode(data)
+
+        self.send_response(200)
+        self.send_header("Content-type", content_type)
+        if content_encoding:
+            self.send_header("Content-encoding", content_encoding)
+
+        if not streamed:
+            self.send_header("Content-length", len(data or b''))
+            self.end_headers()
+            if data:
+                self.wfile.write(data)
+            return
+
+        self.send_header("Transfer-encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for chunk in data:
+                if chunk:
+                    self.wfile.write('{:x}\r\n'.format(len(chunk)).encode('ascii') + chunk + b'\r\n')
+
+            self.wfile.write(b'0\r\n\r\n')
+        except Exception as e:
+            # Headers are already sent, so the only way left to signal
+            # the failure is to cut the response short.
+            self.close_connection = True
+            logging.error('%s %s failed while streaming: %s', self.command, self.path, e)
+        finally:
+            close = getattr(data, 'close', None)
+            if close:
+                close()
+
+    def conditional(self, asset):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The status, headers and body of a static asset's
+                        response.  The body is None if the client's copy
+                        is current, or if the asset must be sent from
+                        disk.
+        """
+        compress = asset.gzip is not None and 'gzip' in (self.headers['Accept-Encoding'] or '')
+        headers = [
+            ('Content-type', asset.content_type),
+            ('ETag', asset.gzip_etag if compress else asset.etag),
+            ('Last-Modified', asset.last_modified)
+        ]
+
+        if asset.gzip is not None:
+            headers.append(('Vary', 'Accept-Encoding'))
+
+        if asset.fresh(self.headers):
+            return 304, headers, None
+
+        body = asset.gzip if compress else asset.body
+
+        if compress:
+            headers.append(('Content-encoding', 'gzip'))
+
+        headers.append(('Content-length', len(body) if body is not None else asset.size))
+
+        return 200, headers, body
+
+    def send_asset(self, asset):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Sends a static asset, from memory or with sendfile.
+        """
+        code, headers, body = self.conditional(asset)
+
+        self.send_response(code)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+
+        if code != 200:
+            return
+
+        if body is not None:
+            self.wfile.write(body)
+            return
+
+        with open(asset.path, 'rb') as f:
+            if self.connection.sendfile(f, 0, asset.size) < asset.size:
+                # The file shrank since it was stat'd.
+                self.close_connection = True
+
+    def subscribe(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Holds the connection open and streams events to it
+                        until the client goes away.
+        """
+        self.send_response(200)
+        self.send_header("Content-type", sse.SSEHub.CONTENT_TYPE)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            self.server.sse.serve(self.wfile, self.headers['Last-Event-ID'])
+        except (IOError, socket.timeout) as e:
+            logging.debug('SSE subscriber left: %s', e)
+
+    def status(self, e):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Logs an error raised while handling the request and
+                        returns the status code to respond with.
+        """
+        if isinstance(e, IOError):
+            logging.info(e)
+            return 404
+
+        if isinstance(e, (exception.APINotConnectedError, database.DatabasePoolError)):
+            logging.error(e)
+            return 503
+
+        if isinstance(e, exception.APIMalformedError):
+            logging.info(e)
+            return 400
+
+        if isinstance(e, exception.APIForbiddenError):
+            logging.info(e)
+            return 403
+
+        logging.critical('%s %s caused an Internal Server Error',
+            self.command,
+            self.path
+        )
+        logging.critical(e)
+
+        return 500
+
     def log_message(self, fmt, *args):
         """
         @author:        Harrison Hubbell
@@ -99,40 +275,15 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         @created:       09/01/2014
         @description:   Handles GET requests
         """
+        if self.path[1:4] == 'sse':
+            return self.subscribe()
+
         try:
             data, content_type = self.get_resource()
-            data, content_encoding = self.encode(data)
-
-            self.send_response(200)
-            self.send_header("Content-type", content_type)
-            if content_encoding:
-                self.send_header("Content-encoding", content_encoding)
-            self.end_headers()
-            self.wfile.write(data)
-
-        except IOError as e:
-            self.send_error(404)
-            logging.info(e)
-
-        except excepiton.APINotConnectedError as e:
-            self.send_error(503)
-            logging.error(e)
-
-        except excepiton.APIMalformedError as e:
-            self.send_error(400)
-            logging.info(e)
-
-        except excepiton.APIForbiddenError as e:
-            self.send_error(403)
-            logging.info(e)
+            self.respond(data, content_type)
 
         except Exception as e:
-            self.send_error(500)
-            logging.critical('%s %s caused an Internal Server Error',
-                self.command,
-                self.path
-            )
-            logging.critical(e)
+            self.send_error(self.status(e))
 
     def do_POST(self):
         """
@@ -142,57 +293,41 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         """
         try:
             data, content_type = self.get_resource()
-            data, content_encoding = self.encode(data)
-
-            self.send_response(200)
-            self.send_header("Content-type", content_type)
-            if content_encoding:
-                self.send_header("Content-encoding", content_encoding)
-            self.end_headers()
-            self.wfile.write(data)
-
-        except IOError as e:
-            self.send_error(404)
-            logging.info(e)
-
-        except excepiton.APINotConnectedError as e:
-            self.send_error(503)
-            logging.error(e)
-
-        except excepiton.APIMalformedError as e:
-            self.send_error(400)
-            logging.info(e)
-
-        except excepiton.APIForbiddenError as e:
-            self.send_error(403)
-            logging.info(e)
+            self.respond(data, content_type)
 
         except Exception as e:
-            self.send_error(500)
-            logging.critical('%s %s caused an Internal Server Error',
-                self.command,
-                self.path
-            )
-            logging.critical(e)
+            self.send_error(self.status(e))
 
 
 class ThreadedHTTPServer(ThreadingMixIn, http.server.HTTPServer):
     """Handle Requests in a Seperate Thread."""
+    daemon_threads = True
+
     def __init__(self, addr, handler, api, sse, root):
         super(ThreadedHTTPServer, self).__init__(addr, handler)
         self.api = api
         self.sse = sse
         self.root = root
+        self.static = static.StaticCache(root)
 
 
 class HTTPServerManager(object):
-    def __init__(self, host, port, path, dbi=None):
+    STACK_SIZE = 512 * 1024
+
+    def __init__(self, host, port, path, dbi=None, history=64, heartbeat=15.0, mode='threaded', workers=4,
+                 cache_size=64, cache_ttl=60.0):
         self.host = host
         self.port = port
         self.path = path
         self.dbi = dbi
-        self.update_id = 0
-        self.lock = Lock()
+        self.history = history
+        self.heartbeat = heartbeat
+        self.mode = mode
+        self.workers = workers
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.updates = Queue(history)
+        self.invalidations = Queue()
         self.httpd = None
         self.create_qrcode()
 
@@ -228,13 +363,71 @@ class HTTPServerManager(object):
         @created:       04/06/2015
         @description:   Manages setting the HTTPServer sse reponse.
         """
-        self.lock.acquire()
+        try:
+            self.updates.put_nowait(('sse', data))
+        except queue.Full:
+            logging.warning('SSE update dropped: the server is not keeping up')
+
+    def snapshot(self, snap):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Hands a new live state snapshot to the server, which
+                        pushes it to SSE subscribers and serves it to API
+                        clients without encoding it again.
+        """
+        try:
+            self.updates.put_nowait(('snapshot', snap))
+        except queue.Full:
+            logging.warning('Snapshot dropped: the server is not keeping up')
+
+    def invalidate(self, *events):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Tells the server that pour, keg or rating events
+                        have happened, so cached API responses depending
+                        on them are dropped.  Invalidations have a queue
+                        of their own, without a bound, so they are never
+                        dropped to make room for snapshots.
+        """
+        self.invalidations.put(events)
 
-        with open(self.path + '/static/sse.txt', 'w') as f:
-            self.update_id += 1
-            f.write('id: {}\ndata: {}\n\n'.format(self.update_id, data))
+    def forward(self, hub, api):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Hands messages from the parent process to the
+                        server's SSE hub and API handler.
+        """
+        while True:
+            event, data = self.updates.get()
+
+            if event == 'sse':
+                hub.publish(data)
+            elif event == 'snapshot':
+                api.publish(data)
+                hub.publish(data.body)
+
+    def expire(self, api):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Hands invalidations from the parent process to the
+                        API handler.  Those that queued up meanwhile are
+                        coalesced into one, so a burst of pours drops the
+                        cache once.
+        """
+        while True:
+            events = set(self.invalidations.get())
+
+            while True:
+                try:
+                    events.update(self.invalidations.get_nowait())
+                except queue.Empty:
+                    break
 
-        self.lock.release()
+            api.invalidate(*events)
 
     def spawn_server(self, host=None, port=None):
         """
@@ -244,14 +437,39 @@ class HTTPServerManager(object):
         """
         host = host if host is not None else self.host
         port = port if port is not None else self.port
-
-        self.httpd = ThreadedHTTPServer(
-            (host, port),
-            RequestHandler,
-            handler.APIHandler(self.dbi),
-            handler.SSEHandler(self.path + '/static/sse.txt', self.lock),
-            self.path
-        )
+        hub = sse.SSEHub(self.history, self.heartbeat)
+        api = handler.APIHandler(self.dbi, self.cache_size, self.cache_ttl)
+
+        # Every SSE subscriber holds a thread, and they spend their lives
+        # waiting, so they do not need the default 8MB stack.
+        threading.stack_size(self.STACK_SIZE)
+
+        forward = threading.Thread(target=self.forward, args=(hub, api), name='SSE')
+        forward.daemon = True
+        forward.start()
+
+        expire = threading.Thread(target=self.expire, args=(api,), name='Invalidate')
+        expire.daemon = True
+        expire.start()
+
+        if self.mode == 'asyncio':
+            from .aio import AsyncHTTPServer
+
+            self.httpd = AsyncHTTPServer(
+                (host, port),
+                api,
+                hub,
+                self.path,
+                workers=self.workers
+            )
+        else:
+            self.httpd = ThreadedHTTPServer(
+                (host, port),
+                RequestHandler,
+                api,
+                hub,
+                self.path
+            )
 
         self.httpd.serve_forever()
 
@@ -259,7 +477,7 @@ class HTTPServerManager(object):
         """
         @author:        Harrison Hubbell
         @created:       04/13/2015
-        @description:   Spawn a thread and a shared memory pool for
-                        setting new SSE responses.
+        @description:   Spawn the server process.  SSE updates and cache
+                        invalidations reach it through a queue each.
         """
         Process(target=self.spawn_server).start()
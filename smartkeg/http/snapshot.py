@@ -0,0 +1,121 @@
+#
+# Filename:     snapshot.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Snapshots of the live keg state shown on the dashboards: the
+#               kegs now serving and the fridge temperature.  A snapshot is
+#               encoded to JSON and gzip once, when it is taken, and the
+#               same bytes are sent to every SSE subscriber and returned by
+#               /api/get/serving, so the encoding cost grows with changes
+#               rather than with requests.
+#
+
+from email.utils import formatdate
+from .static import Asset
+import copy
+import gzip
+import json
+import threading
+import time
+import zlib
+
+class Document(Asset):
+    CONTENT_TYPE = 'text/plain'
+
+    def __init__(self, data, default=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   A JSON document encoded once, and compressed once
+                        if that makes it smaller.  Served like a static
+                        asset, with an ETag and 304 handling.
+        """
+        self.path = None
+        self.mtime = time.time_ns()
+        self.content_type = self.CONTENT_TYPE
+        self.body = json.dumps(data, default=default).encode('utf-8')
+        self.size = len(self.body)
+        self.etag = '"{:x}-{:x}"'.format(zlib.crc32(self.body), self.size)
+        self.last_modified = formatdate(self.mtime / 10**9, usegmt=True)
+        self.gzip = gzip.compress(self.body, 9, mtime=0)
+
+        if len(self.gzip) >= self.size:
+            self.gzip = None
+
+
+class Snapshot(object):
+    def __init__(self, data, default=None, previous=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Encodes data, which is copied so later changes to
+                        it do not show through.  body is what SSE
+                        subscribers are sent, {"kegs": [...],
+                        "temperature": t}.  serving is the kegs alone, in
+                        the shape of /api/get/serving, without their
+                        forecasts; it is kept from the previous snapshot
+                        when only the temperature changed.  kegs keeps
+                        them, with their forecasts, for the depletion
+                        endpoint.
+        """
+        self.data = copy.deepcopy(data)
+        self.kegs = self.data.get('kegs')
+        self.body = json.dumps(self.data, default=default).encode('utf-8')
+
+        if previous is not None and previous.data.get('kegs') == self.data.get('kegs'):
+            self.serving = previous.serving
+        else:
+            self.serving = Document(serving(self.data.get('kegs')), default)
+
+    def __getstate__(self):
+        # Only the encoding crosses to the server process.
+        state = self.__dict__.copy()
+        state['data'] = None
+        return state
+
+    def changed(self, data):
+        return data != self.data
+
+
+def serving(kegs):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   The kegs now serving as /api/get/serving returns them.
+    """
+    return [{k: v for k, v in x.items() if k != 'forecast'} for x in kegs or []]
+
+
+class LiveState(object):
+    def __init__(self, callback, default=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Takes a new snapshot whenever the live state is
+                        updated with different data, and hands it to the
+                        callback.  Safe to update from several threads.
+        """
+        self.callback = callback
+        self.default = default
+        self.current = None
+        self.snapshots = 0
+        self.lock = threading.Lock()
+
+    def update(self, **data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Updates some of the live state, keeping the rest,
+                        and returns the current snapshot.  A new one is
+                        taken only if the state has changed.
+        """
+        with self.lock:
+            if self.current is not None:
+                data = dict(self.current.data, **data)
+
+            if self.current is None or self.current.changed(data):
+                self.current = Snapshot(data, self.default, self.current)
+                self.snapshots += 1
+                self.callback(self.current)
+
+            return self.current
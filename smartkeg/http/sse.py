@@ -0,0 +1,241 @@
+#
+# Filename:     sse.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Server-Sent Events hub.  Each update is framed once and kept
+#               in a bounded ring buffer, and every subscriber connection
+#               blocks on a condition until there is something new for it,
+#               so idle subscribers cost no CPU.  Reconnecting clients are
+#               replayed what they missed from the ring by Last-Event-ID.
+#
+#               Usage: python -m smartkeg.http.sse [--subscribers N]
+#
+
+from __future__ import division, print_function
+from collections import deque
+import argparse
+import threading
+import time
+
+class SSEHub(object):
+    CONTENT_TYPE = 'text/event-stream'
+    RETRY = 3000
+
+    def __init__(self, history=64, heartbeat=15.0):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Event ids continue from the time the hub started,
+                        so they keep increasing across server restarts
+                        and a client never mistakes new events for ones
+                        it has seen.
+        """
+        self.history = deque(maxlen=history)
+        self.heartbeat = heartbeat
+        self.last = int(time.time() * 1000)
+        self.data = None
+        self.subscribers = 0
+        self.listeners = set()
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def publish(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Frames an update, str or already encoded bytes,
+                        and wakes every subscriber.  An update identical
+                        to the latest is dropped, since heartbeats already
+                        keep connections alive.  Returns True if it was
+                        published.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        with self.cond:
+            if data == self.data:
+                return False
+
+            self.last += 1
+            self.data = data
+            self.history.append('id: {}\n'.format(self.last).encode('ascii') + b''.join(
+                b'data: ' + x + b'\n' for x in data.splitlines()
+            ) + b'\n')
+            self.cond.notify_all()
+            listeners = list(self.listeners)
+
+        for callback in listeners:
+            callback()
+
+        return True
+
+    def since(self, last):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The frames after an event id.  A client without
+                        one, or too far behind for the ring to replay, is
+                        sent only the latest.  Must hold the condition.
+        """
+        missed = self.last - last if last is not None else None
+
+        if missed is None or missed < 0 or missed > len(self.history):
+            return list(self.history)[-1:]
+
+        return list(self.history)[len(self.history) - missed:]
+
+    def subscribe(self, last=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Registers a subscriber, returning its first write
+                        and the id of the last event in it.  last is the
+                        client's Last-Event-ID header, if any.
+        """
+        try:
+            last = int(last) if last is not None else None
+        except ValueError:
+            last = None
+
+        with self.cond:
+            self.subscribers += 1
+            frames = self.since(last)
+            seen = self.last
+
+        return 'retry: {}\n\n'.format(self.RETRY).encode('utf-8') + b''.join(frames), seen
+
+    def poll(self, seen):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The frames published after seen, or a heartbeat if
+                        there are none, and the id of the last event.
+        """
+        with self.cond:
+            frames = self.since(seen) if self.last != seen else []
+            seen = self.last
+
+        return b''.join(frames) if frames else b': heartbeat\n\n', seen
+
+    def unsubscribe(self):
+        with self.cond:
+            self.subscribers -= 1
+
+    def listen(self, callback):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Calls back, from the publishing thread, after each
+                        publish or on close.  For subscribers that are not
+                        a thread blocked in serve.
+        """
+        with self.cond:
+            self.listeners.add(callback)
+
+    def unlisten(self, callback):
+        with self.cond:
+            self.listeners.discard(callback)
+
+    def serve(self, wfile, last=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Streams events to one subscriber until it goes
+                        away or the hub is closed, writing a comment as a
+                        heartbeat whenever there has been nothing to send.
+                        Raises the socket error when the client is gone.
+        """
+        data, seen = self.subscribe(last)
+
+        try:
+            wfile.write(data)
+            wfile.flush()
+
+            while not self.closed:
+                with self.cond:
+                    self.cond.wait_for(lambda: self.last != seen or self.closed, self.heartbeat)
+
+                data, seen = self.poll(seen)
+                wfile.write(data)
+                wfile.flush()
+        finally:
+            self.unsubscribe()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+            listeners = list(self.listeners)
+
+        for callback in listeners:
+            callback()
+
+
+def benchmark(subscribers=500, seconds=10, rate=1.0):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Connects many subscribers to a local server, publishes
+                    updates for a while, and reports the server's CPU use.
+                    The clients are read by a single select loop so they
+                    add little to the measurement.
+    """
+    from .http import ThreadedHTTPServer, RequestHandler
+    import resource
+    import selectors
+    import socket
+
+    threading.stack_size(512 * 1024)
+    hub = SSEHub(heartbeat=5.0)
+    server = ThreadedHTTPServer(('127.0.0.1', 0), RequestHandler, None, hub, '')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    sel = selectors.DefaultSelector()
+    received = [0]
+
+    for _ in range(subscribers):
+        sock = socket.create_connection(server.server_address)
+        sock.sendall(b'GET /sse HTTP/1.1\r\nHost: bench\r\n\r\n')
+        sock.setblocking(False)
+        sel.register(sock, selectors.EVENT_READ)
+
+    def read():
+        while sel.get_map():
+            for key, _ in sel.select(1.0):
+                data = key.fileobj.recv(65536)
+                if not data:
+                    sel.unregister(key.fileobj)
+                received[0] += data.count(b'\n\n')
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+
+    while hub.subscribers < subscribers:
+        time.sleep(0.1)
+
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.time()
+
+    while time.time() - start < seconds:
+        hub.publish('{{"update": {}}}'.format(time.time()))
+        time.sleep(1 / rate)
+
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    elapsed = time.time() - start
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+    hub.close()
+    server.shutdown()
+
+    print('{} subscribers, {:.0f} updates/s for {:.1f}s'.format(subscribers, rate, elapsed))
+    print('frames delivered: {}'.format(received[0]))
+    print('cpu: {:.2f}s ({:.1f}% of one core, including the clients)'.format(cpu, 100 * cpu / elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the SSE hub.')
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--rate', type=float, default=1.0)
+    args = parser.parse_args()
+    benchmark(args.subscribers, args.seconds, args.rate)
@@ -0,0 +1,134 @@
+#
+# Filename:     static.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  In-memory cache of the static files the web server serves.
+#               Each file is read, and compressed if it is worth it, once;
+#               it is reloaded only when its modification time or size
+#               changes.  Files too large to hold in memory are sent from
+#               disk with sendfile.
+#
+
+from email.utils import formatdate, parsedate_to_datetime
+import gzip
+import os
+
+TYPES = {
+    '.css':     'text/css',
+    '.html':    'text/html',
+    '.ico':     'image/x-icon',
+    '.js':      'application/javascript',
+    '.json':    'application/json',
+    '.pdf':     'application/pdf',
+    '.png':     'image/png',
+    '.svg':     'image/svg+xml',
+    '.txt':     'text/plain'
+}
+
+# Types whose content is already compressed, so gzip only costs time.
+COMPRESSED = frozenset(('application/pdf', 'image/png'))
+
+def content_type(path):
+    return TYPES.get(os.path.splitext(path)[1])
+
+
+class Asset(object):
+    def __init__(self, path, stat, limit):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   A static file as it was when stat was taken.  The
+                        body is None for a file over limit bytes, which
+                        is sent from disk instead.  The gzip body is None
+                        unless it is smaller than the file.
+        """
+        self.path = path
+        self.mtime = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.content_type = content_type(path)
+        self.etag = '"{:x}-{:x}"'.format(self.mtime, self.size)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.body = None
+        self.gzip = None
+
+        if self.size <= limit:
+            with open(path, 'rb') as f:
+                self.body = f.read()
+
+            if self.content_type not in COMPRESSED:
+                compressed = gzip.compress(self.body, 9, mtime=0)
+
+                if len(compressed) < self.size:
+                    self.gzip = compressed
+
+    @property
+    def gzip_etag(self):
+        return self.etag[:-1] + '-gz"'
+
+    def current(self, stat):
+        return stat.st_mtime_ns == self.mtime and stat.st_size == self.size
+
+    def fresh(self, headers):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   True if the client's cached copy, described by its
+                        conditional request headers, is still current.
+                        If-None-Match takes precedence when both are sent.
+        """
+        match = headers['If-None-Match']
+
+        if match is not None:
+            tags = [x.strip() for x in match.split(',')]
+            return '*' in tags or any(x.lstrip('W/') in (self.etag, self.gzip_etag) for x in tags)
+
+        since = headers['If-Modified-Since']
+
+        if since is not None:
+            try:
+                return self.mtime // 10**9 <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+
+        return False
+
+
+class StaticCache(object):
+    LIMIT = 1024 * 1024
+
+    def __init__(self, root, limit=None):
+        self.root = os.path.abspath(root or '.')
+        self.limit = limit if limit is not None else self.LIMIT
+        self.assets = {}
+
+    def resolve(self, page):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The file a request path names.  Paths that would
+                        leave the root are not found.
+        """
+        path = os.path.abspath(os.path.join(self.root, page))
+
+        if not path.startswith(self.root + os.sep):
+            raise IOError('{} is outside the static root'.format(page))
+
+        return path
+
+    def get(self, page):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The asset for a page, loading it on first use and
+                        again whenever the file has changed.  Raises
+                        IOError if it does not exist.
+        """
+        path = self.resolve(page)
+        stat = os.stat(path)
+        asset = self.assets.get(path)
+
+        if asset is None or not asset.current(stat):
+            asset = Asset(path, stat, self.limit)
+            self.assets[path] = asset
+
+        return asset
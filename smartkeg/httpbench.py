@@ -0,0 +1,179 @@
+#
+# Filename:     httpbench.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Compares the throughput and latency of the threaded and
+#               asyncio HTTP servers on a seeded SQLite database.  The load
+#               is generated by keep-alive clients in a separate process, so
+#               the servers do not share a GIL with it.
+#
+#               Usage: python -m smartkeg.httpbench [--concurrency N] [--idle N]
+#
+
+from __future__ import division, print_function
+from multiprocessing import Process, Queue
+from .database import DatabaseInterface
+from .http.aio import AsyncHTTPServer
+from .http.http import ThreadedHTTPServer, RequestHandler
+from .http.handler import APIHandler
+from .http.sse import SSEHub
+from . import dbbench
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+
+PATHS = (
+    ('static', '/index.html'),
+    ('api', '/api/get/serving'),
+    ('stream', '/api/get/pour?keg_id=1')
+)
+
+def serve(kind, dbi, root, workers):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Starts a server on an ephemeral port in a thread.
+    """
+    api = APIHandler(dbi)
+    hub = SSEHub()
+
+    if kind == 'asyncio':
+        server = AsyncHTTPServer(('127.0.0.1', 0), api, hub, root, workers=workers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        server.started.wait()
+    else:
+        threading.stack_size(512 * 1024)
+        server = ThreadedHTTPServer(('127.0.0.1', 0), RequestHandler, api, hub, root)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+async def fetch(reader, writer, path):
+    writer.write('GET {} HTTP/1.1\r\nHost: bench\r\nAccept-Encoding: gzip\r\n\r\n'.format(path).encode('ascii'))
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').lower()
+
+    if 'transfer-encoding: chunked' in head:
+        while True:
+            size = int(await reader.readuntil(b'\r\n'), 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.readexactly(int(head.split('content-length: ')[1].split('\r\n')[0]))
+
+    return head.split(' ')[1]
+
+async def client(address, path, seconds, latencies, errors):
+    reader, writer = await asyncio.open_connection(*address)
+    end = time.time() + seconds
+
+    while time.time() < end:
+        start = time.time()
+        status = await fetch(reader, writer, path)
+        latencies.append(time.time() - start)
+
+        if status != '200':
+            errors.append(status)
+
+    writer.close()
+
+async def attack(address, path, concurrency, seconds, idle):
+    subscribers = []
+
+    for _ in range(idle):
+        reader, writer = await asyncio.open_connection(*address)
+        writer.write(b'GET /sse HTTP/1.1\r\nHost: bench\r\n\r\n')
+        subscribers.append(writer)
+
+    latencies, errors = [], []
+    start = time.time()
+    await asyncio.gather(*(client(address, path, seconds, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.time() - start
+
+    for writer in subscribers:
+        writer.close()
+
+    return (len(latencies) - len(errors)) / elapsed, sorted(latencies), len(errors)
+
+def load(address, path, concurrency, seconds, idle, results):
+    results.put(asyncio.run(attack(address, path, concurrency, seconds, idle)))
+
+def run(kind, dbi, root, workers, concurrency, seconds, idle):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Returns the successful requests per second, median
+                    and 99th percentile milliseconds, and errors of each
+                    path.
+    """
+    server = serve(kind, dbi, root, workers)
+    res = {}
+
+    for name, path in PATHS:
+        results = Queue()
+        proc = Process(target=load, args=(server.server_address, path, concurrency, seconds, idle, results))
+        proc.start()
+        rate, latencies, errors = results.get()
+        proc.join()
+
+        res[name] = (
+            rate,
+            latencies[len(latencies) // 2] * 1000 if latencies else 0,
+            latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+            errors
+        )
+
+    server.shutdown()
+
+    return res
+
+def main(argv=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the Smartkeg HTTP servers.')
+    parser.add_argument('--root', default='srv/', help='static file directory')
+    parser.add_argument('--schema', default='static/sql/build.sql', help='MySQL build script')
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--workers', type=int, default=4, help='database pool size')
+    parser.add_argument('--concurrency', type=int, default=16, help='keep-alive clients')
+    parser.add_argument('--idle', type=int, default=0, help='idle SSE subscribers held open')
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    try:
+        dbi = DatabaseInterface(None, path, None, None, backend='sqlite')
+        dbbench.create(dbi, args.schema)
+        random.seed(0)
+        dbbench.seed(dbi, days=args.days)
+
+        dbi = DatabaseInterface(None, path, None, None, backend='sqlite', pool_size=args.workers)
+
+        kinds = ('threaded', 'asyncio')
+        results = dict(
+            (x, run(x, dbi, args.root, args.workers, args.concurrency, args.seconds, args.idle))
+            for x in kinds
+        )
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    print('{} clients, {} idle SSE subscribers, {}s per path'.format(args.concurrency, args.idle, args.seconds))
+    print('{:<10}{:<10}{:>10}{:>10}{:>10}{:>8}'.format('path', 'server', 'req/s', 'p50 ms', 'p99 ms', 'errors'))
+    for name, _ in PATHS:
+        for kind in kinds:
+            print('{:<10}{:<10}{:>10.0f}{:>10.2f}{:>10.2f}{:>8}'.format(name, kind, *results[kind][name]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#
+# Filename:     inventory.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Continuous review inventory modeling.  Turns a consumption
+#               forecast into a cumulative demand curve, and answers when a
+#               keg will run dry and when it should be reordered with a
+#               binary search over that curve.
+#
+
+from __future__ import division
+import bisect
+import datetime
+import itertools
+import math
+
+class DepletionCurve(object):
+    HORIZON = 365
+
+    def __init__(self, forecast, horizon=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Repeats the forecast season out to the horizon and
+                        precomputes its cumulative demand.  Negative or
+                        missing forecast values count as no demand.
+        """
+        horizon = horizon if horizon is not None else self.HORIZON
+        season = [x if x is not None and math.isfinite(x) and x > 0 else 0.0 for x in forecast or []]
+        season = season or [0.0]
+
+        self.daily = [season[i % len(season)] for i in range(horizon)]
+        self.curve = list(itertools.accumulate(self.daily))
+
+    def demand(self, days):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Expected demand over the next number of days.
+        """
+        days = min(int(days), len(self.curve))
+        return self.curve[days - 1] if days > 0 else 0.0
+
+    def days_until(self, volume):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Expected days until cumulative demand reaches the
+                        volume, interpolated within the day it is crossed.
+                        Returns None if it is not reached within the
+                        horizon.
+        """
+        if volume <= 0:
+            return 0.0
+
+        i = bisect.bisect_left(self.curve, volume)
+
+        if i == len(self.curve):
+            return None
+
+        before = self.curve[i - 1] if i else 0.0
+        return i + (volume - before) / self.daily[i]
+
+
+def depletion(keg, forecast, lead_time=1, safety=0.0, today=None, horizon=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Computes the expected empty date and reorder point of a
+                    keg.  The reorder point is the demand expected over the
+                    delivery lead time plus safety stock; the keg should be
+                    reordered when its remaining volume falls to it.
+    """
+    today = today if today is not None else datetime.date.today()
+    curve = DepletionCurve(forecast, horizon)
+
+    left = max(0.0, float(keg['volume']) * float(keg['remaining'] or 0))
+    reorder_point = curve.demand(lead_time) + safety
+
+    empty = curve.days_until(left)
+    reorder = curve.days_until(left - reorder_point)
+
+    return {
+        'keg_id': keg['keg_id'],
+        'left': left,
+        'days_to_empty': empty,
+        'empty_date': today + datetime.timedelta(days=math.floor(empty)) if empty is not None else None,
+        'reorder_point': reorder_point,
+        'days_to_reorder': reorder,
+        'reorder_date': today + datetime.timedelta(days=math.floor(reorder)) if reorder is not None else None
+    }
@@ -0,0 +1,402 @@
+#
+# Filename:     migrate.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Versioned migrations of the Kegerator schema.  The version a
+#               database is at is kept in its SchemaVersion table, and each
+#               migration after it is applied in order.  static/sql/build.sql
+#               builds the schema of migration 3 outright, and the build
+#               script migrates it from there.
+#
+#               A statement is either SQL both backends accept, or a dict of
+#               SQL per backend name, where a missing backend skips it.
+#               MySQL commits DDL as it runs it, so a migration that fails
+#               part way must be finished by hand before it is retried.
+#
+#               Usage: smartkeg migrate [--status | --check | --baseline N]
+#
+
+from __future__ import print_function
+from .database import DatabaseInterface
+from . import query, rollup
+import argparse
+import json
+import logging
+
+MIGRATIONS = (
+    (1, 'Spool dedup keys', [
+        'ALTER TABLE Pour ADD COLUMN spool_key CHAR(32)',
+        'CREATE UNIQUE INDEX Pour_spool_key ON Pour (spool_key)',
+        'ALTER TABLE FridgeTemp ADD COLUMN spool_key CHAR(32)',
+        'CREATE UNIQUE INDEX FridgeTemp_spool_key ON FridgeTemp (spool_key)'
+    ]),
+    (2, 'Consumption and rating rollups', [
+        """
+        CREATE TABLE KegVolume (
+            keg_id      INTEGER     NOT NULL,
+            poured      FLOAT       NOT NULL DEFAULT 0,
+            pours       INTEGER     NOT NULL DEFAULT 0,
+            FOREIGN KEY(keg_id) REFERENCES Keg(id),
+            PRIMARY KEY(keg_id)
+        )
+        """,
+        """
+        CREATE TABLE KegDaily (
+            keg_id      INTEGER     NOT NULL,
+            day         DATE        NOT NULL,
+            amount      FLOAT       NOT NULL DEFAULT 0,
+            pours       INTEGER     NOT NULL DEFAULT 0,
+            FOREIGN KEY(keg_id) REFERENCES Keg(id),
+            PRIMARY KEY(keg_id, day)
+        )
+        """,
+        """
+        CREATE TABLE BeerRatingTotal (
+            beer_id     INTEGER     NOT NULL,
+            ratings     INTEGER     NOT NULL DEFAULT 0,
+            total       FLOAT       NOT NULL DEFAULT 0,
+            FOREIGN KEY(beer_id) REFERENCES Beer(id),
+            PRIMARY KEY(beer_id)
+        )
+        """,
+        """
+        CREATE TRIGGER PourRollup AFTER INSERT ON Pour
+        FOR EACH ROW
+        BEGIN
+            INSERT IGNORE INTO KegVolume (keg_id) VALUES (NEW.keg_id);
+            UPDATE KegVolume
+            SET poured = poured + NEW.volume, pours = pours + 1
+            WHERE keg_id = NEW.keg_id;
+
+            INSERT IGNORE INTO KegDaily (keg_id, day) VALUES (NEW.keg_id, DATE(NEW.pour_time));
+            UPDATE KegDaily
+            SET amount = amount + NEW.volume, pours = pours + 1
+            WHERE keg_id = NEW.keg_id AND day = DATE(NEW.pour_time);
+        END
+        """,
+        """
+        CREATE TRIGGER BeerRatingRollup AFTER INSERT ON BeerRating
+        FOR EACH ROW
+        BEGIN
+            INSERT IGNORE INTO BeerRatingTotal (beer_id) VALUES (NEW.beer_id);
+            UPDATE BeerRatingTotal
+            SET ratings = ratings + (NEW.rating IS NOT NULL), total = total + IFNULL(NEW.rating, 0)
+            WHERE beer_id = NEW.beer_id;
+        END
+        """
+    ]),
+    (3, 'Indexes on hot predicates and a stored pour day', [
+        {
+            'mysql': 'ALTER TABLE Pour ADD COLUMN pour_day DATE AS (DATE(pour_time)) STORED',
+            'sqlite': 'ALTER TABLE Pour ADD COLUMN pour_day DATE AS (DATE(pour_time)) VIRTUAL'
+        },
+        'CREATE INDEX Keg_now_serving ON Keg (now_serving)',
+        'CREATE INDEX Pour_keg_time ON Pour (keg_id, pour_time)',
+        'CREATE INDEX Pour_keg_day ON Pour (keg_id, pour_day, volume)',
+        'CREATE INDEX FridgeTemp_fridge_time ON FridgeTemp (fridge_id, read_time)',
+        'CREATE INDEX KegDaily_day ON KegDaily (day, amount)'
+    ]),
+    (4, 'Temperature buckets and monthly FridgeTemp partitions', [
+        """
+        CREATE TABLE FridgeTempHourly (
+            fridge_id   INTEGER     NOT NULL,
+            sensor_id   INTEGER     NOT NULL,
+            hour        DATETIME    NOT NULL,
+            low         FLOAT,
+            high        FLOAT,
+            mean        FLOAT,
+            readings    INTEGER     NOT NULL DEFAULT 0,
+            PRIMARY KEY(fridge_id, sensor_id, hour)
+        )
+        """,
+        'CREATE INDEX FridgeTempHourly_hour ON FridgeTempHourly (hour)',
+        """
+        CREATE TABLE FridgeTempDaily (
+            fridge_id   INTEGER     NOT NULL,
+            sensor_id   INTEGER     NOT NULL,
+            day         DATE        NOT NULL,
+            low         FLOAT,
+            high        FLOAT,
+            mean        FLOAT,
+            readings    INTEGER     NOT NULL DEFAULT 0,
+            PRIMARY KEY(fridge_id, sensor_id, day)
+        )
+        """,
+        'CREATE INDEX FridgeTempDaily_day ON FridgeTempDaily (day)',
+        # Partitioned tables cannot have foreign keys, and every unique key
+        # must include read_time.  A spooled reading keeps its read_time
+        # when replayed, so (spool_key, read_time) still dedups it.  The
+        # table is rebuilt rather than altered so the old index names do
+        # not matter.  Retention splits monthly partitions off pmax.
+        {'mysql': """
+            CREATE TABLE FridgeTempPartitioned (
+                id          INTEGER     NOT NULL AUTO_INCREMENT,
+                fridge_id   INTEGER     NOT NULL,
+                sensor_id   INTEGER     NOT NULL,
+                read_time   TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                temperature FLOAT(5,2),
+                spool_key   CHAR(32),
+                PRIMARY KEY(id, read_time),
+                UNIQUE KEY FridgeTemp_spool_key (spool_key, read_time),
+                KEY FridgeTemp_fridge_time (fridge_id, read_time),
+                KEY FridgeTemp_read_time (read_time)
+            )
+            PARTITION BY RANGE (UNIX_TIMESTAMP(read_time)) (
+                PARTITION pmax VALUES LESS THAN MAXVALUE
+            )
+        """},
+        {'mysql': """
+            INSERT INTO FridgeTempPartitioned
+                (id, fridge_id, sensor_id, read_time, temperature, spool_key)
+            SELECT id, fridge_id, sensor_id, read_time, temperature, spool_key
+            FROM FridgeTemp
+        """},
+        {'mysql': 'RENAME TABLE FridgeTemp TO FridgeTempUnpartitioned, FridgeTempPartitioned TO FridgeTemp'},
+        {'mysql': 'DROP TABLE FridgeTempUnpartitioned'},
+        {'sqlite': 'CREATE INDEX FridgeTemp_read_time ON FridgeTemp (read_time)'}
+    ])
+)
+
+# Each query the daemon and API run, with the tables it is expected to read
+# in full because it returns or aggregates all of them.
+CHECKS = (
+    ('get_beers', query.get_beers([]), ('b',)),
+    ('get_beers by id', query.get_beers([('b.id', 1)]), ()),
+    ('get_brewers', query.get_brewers([]), ('Brewer',)),
+    ('get_brewers by id', query.get_brewers([('id', 1)]), ()),
+    ('get_daily', query.get_daily(), ()),
+    ('get_fridge_temp', query.get_fridge_temp([('fridge_id', 1)]), ()),
+    ('get_keg_daily', query.get_keg_daily(), ()),
+    ('get_now_serving', query.get_now_serving(), ()),
+    ('get_percent_remaining', query.get_percent_remaining(), ()),
+    ('get_volume_remaining', query.get_volume_remaining(), ()),
+    ('get_pours', query.get_pours([]), ('Pour',)),
+    ('get_pours by keg', query.get_pours([('keg_id', 1)]), ()),
+    ('get_temperatures by fridge', query.get_temperatures([('fridge_id', 1)]), ()),
+    ('get_temperature_watermarks', query.get_temperature_watermarks(), ()),
+    ('fold_temperature_hours', query.fold_temperature_hours('2026-01-01', '2026-01-02'), ()),
+    ('fold_temperature_days', query.fold_temperature_days('2026-01-01', '2026-01-02'), ()),
+    ('rem_temperatures', query.rem_temperatures('2026-01-01', 1000), ()),
+    ('rem_temperature_hours', query.rem_temperature_hours('2026-01-01'), ())
+)
+
+# The rollups are rebuilt from Pour.pour_day, which this migration adds.
+ROLLUPS = 3
+
+class MigrationError(Exception):
+    def __init__(self, version, error):
+        self.version = version
+        self.error = error
+
+    def __str__(self):
+        if self.version is None:
+            return 'Migration failed: {}'.format(self.error)
+
+        return 'Migration {} failed: {}'.format(self.version, self.error)
+
+
+class Migrator(object):
+    def __init__(self, dbi, migrations=None):
+        self.dbi = dbi
+        self.migrations = migrations if migrations is not None else MIGRATIONS
+
+    def latest(self):
+        return self.migrations[-1][0] if self.migrations else 0
+
+    def current(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The version the database is at, creating the
+                        version table first if needed.  A database that
+                        predates migrations is at version 0.
+        """
+        with self.dbi as d:
+            d.update("""
+                CREATE TABLE IF NOT EXISTS SchemaVersion (
+                    version     INTEGER     NOT NULL,
+                    description VARCHAR(128),
+                    applied     TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY(version)
+                )
+            """)
+            rows = d.select('SELECT MAX(version) AS version FROM SchemaVersion')
+
+        if rows is None:
+            raise MigrationError(None, 'cannot read SchemaVersion')
+
+        return rows[0]['version'] or 0
+
+    def pending(self):
+        current = self.current()
+        return [x for x in self.migrations if x[0] > current]
+
+    def record(self, d, version, description):
+        d.execute(
+            'INSERT INTO SchemaVersion (version, description) VALUES (%s, %s)',
+            (version, description)
+        )
+
+    def apply(self, version, description, statements):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Runs the statements of one migration and records
+                        its version in the same transaction, where the
+                        backend's DDL is transactional.
+        """
+        with self.dbi as d:
+            try:
+                for statement in statements:
+                    if isinstance(statement, dict):
+                        statement = statement.get(d.backend.NAME)
+                    if statement:
+                        d.execute(statement)
+
+                self.record(d, version, description)
+                d.conn.commit()
+            except d.backend.Error as e:
+                d.conn.rollback()
+                raise MigrationError(version, e)
+
+        logging.info('Applied migration %s: %s', version, description)
+
+    def migrate(self, target=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Applies every pending migration up to the target
+                        version, the latest by default.  Rollups are
+                        recomputed so they count the history once the
+                        schema they are rebuilt from is in place; they
+                        stay empty until then.  Returns the versions
+                        applied.
+        """
+        target = target if target is not None else self.latest()
+        applied = []
+
+        for version, description, statements in self.pending():
+            if version > target:
+                break
+
+            self.apply(version, description, statements)
+            applied.append(version)
+
+        if applied and applied[0] <= ROLLUPS <= applied[-1]:
+            if not rollup.rebuild(self.dbi):
+                raise MigrationError(None, 'applied {}, but the rollups could not be rebuilt'.format(applied))
+
+        elif applied and applied[-1] < ROLLUPS and 2 in applied:
+            logging.warning('The rollups stay empty until migration %s is applied', ROLLUPS)
+
+        return applied
+
+    def baseline(self, version):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Marks every migration up to the version applied
+                        without running it, for a database whose schema
+                        already has them.
+        """
+        current = self.current()
+
+        with self.dbi as d:
+            for x in self.migrations:
+                if current < x[0] <= version:
+                    self.record(d, x[0], x[1] + ' (baseline)')
+            d.conn.commit()
+
+    def check(self, checks=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   EXPLAINs every query and returns those that read a
+                        table in full which they are not expected to, as
+                        (name, tables) pairs.  MySQL scans tables too
+                        small to be worth an index, so run it against a
+                        database with representative data.
+        """
+        checks = checks if checks is not None else CHECKS
+        res = []
+
+        with self.dbi as d:
+            for name, (sql, params), allowed in checks:
+                plan = d.select(d.backend.explain(sql), params)
+
+                if plan is None:
+                    res.append((name, ['EXPLAIN failed']))
+                    continue
+
+                scans = [x for x in d.backend.scans(plan) if x not in allowed]
+
+                if scans:
+                    res.append((name, scans))
+
+        return res
+
+
+def main(argv=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Command line entry point.
+    """
+    parser = argparse.ArgumentParser(prog='smartkeg migrate', description='Migrate the Smartkeg database schema.')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--config', default='/etc/smartkeg/config.json', help='Smartkeg config with database credentials')
+    source.add_argument('--sqlite', help='SQLite database file')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--to', type=int, help='migrate up to this version')
+    action.add_argument('--status', action='store_true', help='print the current and pending versions')
+    action.add_argument('--check', action='store_true', help='EXPLAIN every query and report full table scans')
+    action.add_argument('--baseline', type=int, help='mark migrations up to this version as applied')
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        dbi = DatabaseInterface(None, args.sqlite, None, None, backend='sqlite')
+    else:
+        with open(args.config, 'r') as f:
+            cfg = json.load(f)['database']
+
+        dbi = DatabaseInterface(
+            cfg['address'],
+            cfg['schema'],
+            cfg['user'],
+            cfg['password'],
+            backend=cfg.get('backend')
+        )
+
+    migrator = Migrator(dbi)
+
+    if args.status:
+        print('Current version: {}'.format(migrator.current()))
+        for version, description, _ in migrator.pending():
+            print('Pending {}: {}'.format(version, description))
+
+    elif args.check:
+        failures = migrator.check()
+
+        for name, scans in failures:
+            print('{}: full scan of {}'.format(name, ', '.join(scans)))
+
+        if failures:
+            raise SystemExit(1)
+
+        print('No unexpected full table scans.')
+
+    elif args.baseline is not None:
+        migrator.baseline(args.baseline)
+        print('Baselined at version {}.'.format(migrator.current()))
+
+    else:
+        try:
+            applied = migrator.migrate(args.to)
+        except MigrationError as e:
+            raise SystemExit(str(e))
+
+        print('Applied {}; now at version {}.'.format(applied or 'nothing', migrator.current()))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,10 +7,16 @@
 #
 
 from __future__ import division, print_function
+from collections import deque
 import logging
 import math
+import numpy as np
 
 class TimeSeriesRegression(object):
+    # Relative size under which the regression is taken as degenerate,
+    # as for a constant series.
+    FLAT = 1e-12
+
     def __init__(self, periods):
         self.periods = periods
         self.seasonal_indicies = []
@@ -20,6 +26,19 @@ class TimeSeriesRegression(object):
         self.slope = None
         self.trend = None
 
+        # Sufficient statistics, kept so the model can be revised one
+        # point at a time instead of refit over the whole history.
+        self.window = deque(maxlen=periods + 1)
+        self.season_sum = []
+        self.season_cnt = []
+        self.last_ratio = None
+        self.ratios = 0
+        self.n = 0
+        self.sx = 0
+        self.sy = 0
+        self.sxy = 0
+        self.ssx = 0
+
     def __str__(self):
         """
         @author:        Harrison Hubbell
@@ -42,10 +61,20 @@ class TimeSeriesRegression(object):
         """
         self.trend = self.calculate_regression_line(data)
         self.seasonality = self.calculate_seasonal_indices(data)
+        self.window = deque(data[-(self.periods + 1):], maxlen=self.periods + 1)
+
+        return self.predict()
 
+    def predict(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Projects the current trend and seasonality over
+                        the next full period.
+        """
         self.prediction = []
 
-        start = len(data)
+        start = self.n
         end = start + self.periods
 
         for i in range(start, end):
@@ -53,6 +82,140 @@ class TimeSeriesRegression(object):
 
         return self.prediction
 
+    def last(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the most recent point in the model.
+        """
+        if not self.n:
+            raise IndexError
+
+        return self.window[-1]
+
+    def update(self, point):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Appends a new daily total to the model and returns
+                        the revised forecast.  Only the running sums and
+                        the newest ratio to moving average are touched,
+                        so this costs O(periods) regardless of history.
+        """
+        self.window.append(point)
+        self.n += 1
+        self.sx += point
+        self.sy += self.n
+        self.sxy += point * self.n
+        self.ssx += point ** 2
+        self.last_ratio = self.push_ratio()
+
+        return self.refit()
+
+    def revise_last(self, point):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Replaces the most recent daily total, e.g. when
+                        another pour lands on the current day, and returns
+                        the revised forecast.
+        """
+        if not self.n:
+            raise IndexError
+
+        old = self.window[-1]
+        self.sx += point - old
+        self.sxy += (point - old) * self.n
+        self.ssx += point ** 2 - old ** 2
+        self.pop_ratio()
+        self.window[-1] = point
+        self.last_ratio = self.push_ratio()
+
+        return self.refit()
+
+    def refit(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Rebuilds the trend and seasonality from the
+                        running sums and returns the new forecast, or
+                        None if there is no data.
+        """
+        if not self.n:
+            return None
+
+        self.trend = self.fit_line()
+        self.seasonality = self.fit_indices()
+
+        return self.predict()
+
+    def push_ratio(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Adds the ratio to moving average made available by
+                        the newest point to its seasonal slot.  Returns a
+                        (slot, ratio) tuple so it can be backed out again,
+                        or None if there are not yet enough points.  As
+                        in BatchTimeSeriesRegression, a window averaging
+                        zero takes its slot's turn but adds no ratio, and
+                        its ratio is returned as None.
+        """
+        window = list(self.window)
+        offset = self.periods // 2
+
+        if self.periods % 2 == 0:
+            if self.n < self.periods + 1:
+                return None
+
+            cma = (sum(window[-self.periods:]) + sum(window[-self.periods - 1:-1])) / (2 * self.periods)
+            point = window[offset - self.periods - 1]
+        else:
+            if self.n < self.periods:
+                return None
+
+            cma = sum(window[-self.periods:]) / self.periods
+            point = window[offset - self.periods]
+
+        slot = self.ratios % self.periods
+        ratio = point / cma if cma else None
+
+        if slot == len(self.season_sum):
+            self.season_sum.append(0)
+            self.season_cnt.append(0)
+
+        if ratio is not None:
+            self.season_sum[slot] += ratio
+            self.season_cnt[slot] += 1
+
+        self.ratios += 1
+
+        return slot, ratio
+
+    def pop_ratio(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Backs the newest ratio to moving average out of its
+                        seasonal slot.
+        """
+        if self.last_ratio is None:
+            return
+
+        slot, ratio = self.last_ratio
+
+        if ratio is not None:
+            self.season_sum[slot] -= ratio
+            self.season_cnt[slot] -= 1
+
+        self.ratios -= 1
+
+        if self.ratios <= slot:
+            del self.season_sum[slot]
+            del self.season_cnt[slot]
+
+        self.last_ratio = None
+
     def calculate_regression_line(self, data):
         """
         @author:        Harrison Hubbell
@@ -74,15 +237,32 @@ class TimeSeriesRegression(object):
             x_sq.append(x ** 2)
             y_sq.append(y ** 2)
 
-        n = len(data)
-        sx = sum(x_vals)
-        sy = sum(y_vals)
-        sxy = sum(x_y)
-        ssx = sum(x_sq)
-        ssy = sum(y_sq)
+        self.n = len(data)
+        self.sx = sum(x_vals)
+        self.sy = sum(y_vals)
+        self.sxy = sum(x_y)
+        self.ssx = sum(x_sq)
+
+        return self.fit_line()
+
+    def fit_line(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Solve the regression line from the running sums.
+                        A series whose points are all the same has no
+                        line to fit, and is carried forward flat.
+                        Returns a lambda function of the trend line function.
+        """
+        n, sx, sy, sxy, ssx = self.n, self.sx, self.sy, self.sxy, self.ssx
+        d = n * ssx - sx ** 2
 
-        self.intercept = (sy * ssx - sx * sxy) / (n * ssx - sx ** 2)
-        self.slope = (n * sxy - sx * sy) / (n * ssx - sx ** 2)
+        if abs(d) <= self.FLAT * n * ssx:
+            self.intercept = sx / n if n else 0.0
+            self.slope = 0.0
+        else:
+            self.intercept = (sy * ssx - sx * sxy) / d
+            self.slope = (n * sxy - sx * sy) / d
 
         return lambda x: self.intercept + self.slope * x
 
@@ -97,8 +277,8 @@ class TimeSeriesRegression(object):
                         already centered and no further calculation is
                         necessary.
         """
-        self.seasonal_indicies = []
-        season_avg = []
+        self.season_sum = []
+        self.season_cnt = []
         i = 0
 
         if self.periods % 2 == 0:
@@ -110,17 +290,32 @@ class TimeSeriesRegression(object):
         rma = self.ratio_to_moving_avg(data, cma)
 
         while i < self.periods and i < len(rma):
-            points = rma[i::self.periods]
+            points = [x for x in rma[i::self.periods] if x is not None]
+            self.season_sum.append(sum(points))
+            self.season_cnt.append(len(points))
+            i += 1
 
-            print(rma)
-            print(self.periods)
-            print(points)
+        self.ratios = len(rma)
+        self.last_ratio = ((len(rma) - 1) % self.periods, rma[-1]) if len(rma) else None
 
-            season_avg.append(sum(points) / len(points))
-            i += 1
+        return self.fit_indices()
 
-        for avg in season_avg:
-            self.seasonal_indicies.append((avg - self.periods) / sum(season_avg))
+    def fit_indices(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Calculate the seasonal indecies from the running
+                        per-period ratio sums.  A period without a ratio,
+                        or a season whose ratios sum to zero, gets an
+                        index of zero.
+        """
+        season_avg = [s / c if c else None for s, c in zip(self.season_sum, self.season_cnt)]
+        total = sum(x for x in season_avg if x is not None)
+
+        self.seasonal_indicies = [
+            (avg - self.periods) / total if avg is not None and total else 0
+            for avg in season_avg
+        ]
 
         return lambda x: self.seasonal_indicies[(x % self.periods)] if len(self.seasonal_indicies) > x % self.periods else 0
 
@@ -135,7 +330,7 @@ class TimeSeriesRegression(object):
         moving_avg = []
 
         while i < len(simple_moving_avg) - 1:
-            avg = float(sum(simple_moving_avg[i:i + 1])) / 2.0
+            avg = float(sum(simple_moving_avg[i:i + 2])) / 2.0
             moving_avg.append(avg)
             i += 1
 
@@ -151,12 +346,14 @@ class TimeSeriesRegression(object):
                         the number of periods allows the index of the
                         related observed value (to the CMA value) to be
                         found by taking the floor of self.periods / 2.
+                        A window averaging zero has no ratio, and gives
+                        None in its place.
         """
         i = int(math.floor(self.periods / 2))
         ratio_to_ma = []
 
         for avg in cma:
-            ratio_to_ma.append(data_set[i] / avg)
+            ratio_to_ma.append(data_set[i] / avg if avg else None)
             i += 1
 
         return ratio_to_ma
@@ -172,8 +369,669 @@ class TimeSeriesRegression(object):
         moving_avg = []
 
         while i <= len(data_set) - self.periods:
-            period_avg = sum(data_set[i:self.periods]) / self.periods
+            period_avg = sum(data_set[i:i + self.periods]) / self.periods
             moving_avg.append(period_avg)
             i += 1
 
         return moving_avg
+
+
+class VectorizedTimeSeriesRegression(TimeSeriesRegression):
+    """
+    Array backed TimeSeriesRegression.  Produces the same model as the
+    pure Python implementation, but every pass over the data is done
+    with NumPy so a refit stays cheap on long consumption histories.
+    """
+    def forecast(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Creates the time-series regression model.
+        """
+        return super(VectorizedTimeSeriesRegression, self).forecast(
+            np.asarray(data, dtype=float)
+        )
+
+    def predict(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Projects the current trend and seasonality over
+                        the next full period.
+        """
+        x = np.arange(self.n, self.n + self.periods)
+        indices = np.zeros(self.periods)
+        indices[:len(self.seasonal_indicies)] = self.seasonal_indicies
+
+        self.prediction = (
+            self.intercept + self.slope * x + indices[x % self.periods]
+        ).tolist()
+
+        return self.prediction
+
+    def calculate_regression_line(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Calculate the regression line based on given data.
+                        Returns a lambda function of the trend line function.
+        """
+        self.n = len(data)
+        self.sx = float(data.sum())
+        self.sy = self.n * (self.n + 1) / 2
+        self.sxy = float(np.dot(data, np.arange(1, self.n + 1)))
+        self.ssx = float(np.dot(data, data))
+
+        return self.fit_line()
+
+    def calculate_seasonal_indices(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Calculate the seasonal indecies for each period.
+                        The ratios to moving average are padded out to a
+                        whole number of periods and folded into a
+                        (seasons x periods) matrix, so each column holds
+                        every observation of one period.
+        """
+        if self.periods % 2 == 0:
+            sma = self.simple_moving_avg(data)
+            cma = self.centered_moving_avg(sma)
+        else:
+            cma = self.simple_moving_avg(data)
+
+        rma = self.ratio_to_moving_avg(data, cma)
+        valid = ~np.isnan(rma)
+        slots = min(self.periods, len(rma))
+
+        padded = np.zeros(-(-len(rma) // self.periods) * self.periods)
+        padded[:len(rma)] = np.where(valid, rma, 0)
+        counts = np.zeros_like(padded)
+        counts[:len(rma)] = valid
+
+        self.season_sum = padded.reshape(-1, self.periods).sum(axis=0)[:slots].tolist()
+        self.season_cnt = counts.reshape(-1, self.periods).sum(axis=0)[:slots].tolist()
+        self.ratios = len(rma)
+        self.last_ratio = (
+            (len(rma) - 1) % self.periods,
+            float(rma[-1]) if valid[-1] else None
+        ) if len(rma) else None
+
+        return self.fit_indices()
+
+    def centered_moving_avg(self, simple_moving_avg):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Calculate centered moving average from a simple
+                        moving average.
+        """
+        return (simple_moving_avg[:-1] + simple_moving_avg[1:]) / 2.0
+
+    def ratio_to_moving_avg(self, data_set, cma):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Calculate the ratio to moving average for the
+                        centered moving average.  A window averaging zero
+                        has no ratio, and gives NaN in its place.
+        """
+        i = self.periods // 2
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(cma != 0, data_set[i:i + len(cma)] / cma, np.nan)
+
+    def simple_moving_avg(self, data_set):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Create simple moving average set based on input
+                        data and the number of periods, using the
+                        difference of a running cumulative sum so each
+                        window costs O(1).
+        """
+        if len(data_set) < self.periods:
+            return np.zeros(0)
+
+        csum = np.concatenate(([0.0], np.cumsum(data_set)))
+        return (csum[self.periods:] - csum[:-self.periods]) / self.periods
+
+
+class HoltWinters(object):
+    ADDITIVE = 'additive'
+    MULTIPLICATIVE = 'multiplicative'
+
+    def __init__(self, periods, alpha=0.5, beta=0.1, gamma=0.1, seasonal=None):
+        self.periods = periods
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.seasonal = seasonal if seasonal is not None else self.ADDITIVE
+        self.mode = self.seasonal
+        self.prediction = None
+
+        # Level, trend and one index per period is the entire model, so
+        # each new point is O(1) no matter how long the history is.
+        self.level = None
+        self.trend = None
+        self.season = None
+        self.previous = None
+        self.point = None
+        self.t = 0
+
+        if self.seasonal not in (self.ADDITIVE, self.MULTIPLICATIVE):
+            raise ValueError('Unknown seasonality "{}"'.format(self.seasonal))
+
+    def __str__(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns a string representation of the
+                        Holt-Winters model.
+        """
+        t = '({} + {}(h))'.format(str(self.level), str(self.trend))
+        s = '({})'.format(', '.join(
+            ['{}(s{})'.format(x, i) for i, x in enumerate(self.season or [])]
+        ))
+        op = ' + ' if self.mode == self.ADDITIVE else ' * '
+
+        return t + op + s
+
+    def forecast(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Initializes the smoothing state from the first two
+                        seasons of data, smooths the rest of the series,
+                        and forecasts the next full period.
+        """
+        data = list(data)
+        start = self.initialize(data)
+
+        for point in data[start:]:
+            self.smooth(point)
+
+        return self.predict()
+
+    def initialize(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Sets the initial level, trend and seasonal indices.
+                        With two full seasons these come from the season
+                        averages, otherwise the series starts flat from
+                        its first point.  Returns the number of points
+                        consumed.
+        """
+        p = self.periods
+
+        self.mode = self.seasonal
+        self.level = None
+        self.previous = None
+        self.point = None
+        self.t = 0
+
+        if self.mode == self.MULTIPLICATIVE and any(x <= 0 for x in data):
+            self.fallback()
+
+        neutral = 0.0 if self.mode == self.ADDITIVE else 1.0
+
+        if len(data) >= 2 * p:
+            first = sum(data[:p]) / p
+            second = sum(data[p:2 * p]) / p
+
+            self.level = first
+            self.trend = (second - first) / p
+
+            if self.mode == self.ADDITIVE:
+                self.season = [x - first for x in data[:p]]
+            else:
+                self.season = [x / first for x in data[:p]]
+
+            self.point = data[p - 1]
+            self.t = p
+            return p
+
+        self.level = data[0] if data else 0.0
+        self.trend = 0.0
+        self.season = [neutral] * p
+        self.point = data[0] if data else None
+        self.t = 1 if data else 0
+
+        return 1
+
+    def smooth(self, point):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Applies one step of triple exponential smoothing.
+        """
+        if self.mode == self.MULTIPLICATIVE and (point <= 0 or self.level + self.trend <= 0):
+            self.fallback()
+
+        slot = self.t % self.periods
+        season = self.season[slot]
+        level = self.level
+
+        self.previous = (self.level, self.trend, season, self.point)
+
+        if self.mode == self.ADDITIVE:
+            self.level = self.alpha * (point - season) + (1 - self.alpha) * (level + self.trend)
+            self.season[slot] = self.gamma * (point - self.level) + (1 - self.gamma) * season
+        else:
+            self.level = self.alpha * (point / season) + (1 - self.alpha) * (level + self.trend)
+            self.season[slot] = self.gamma * (point / self.level) + (1 - self.gamma) * season
+
+        self.trend = self.beta * (self.level - level) + (1 - self.beta) * self.trend
+        self.point = point
+        self.t += 1
+
+    def fallback(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Switches a multiplicative model to additive
+                        seasonality, which unlike it is defined for days
+                        with nothing poured.  Seasonal indices carry over
+                        as offsets from the level.
+        """
+        logging.warning('Multiplicative seasonality needs positive totals, falling back to additive')
+
+        if self.level is not None:
+            self.season = [(x - 1) * self.level for x in self.season]
+
+        self.mode = self.ADDITIVE
+
+    def predict(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Projects the smoothed level, trend and season over
+                        the next full period.
+        """
+        self.prediction = []
+
+        for h in range(1, self.periods + 1):
+            trend = self.level + h * self.trend
+            season = self.season[(self.t + h - 1) % self.periods]
+
+            if self.mode == self.ADDITIVE:
+                self.prediction.append(trend + season)
+            else:
+                self.prediction.append(trend * season)
+
+        return self.prediction
+
+    def last(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the most recent point in the model.
+        """
+        if self.point is None:
+            raise IndexError
+
+        return self.point
+
+    def update(self, point):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Smooths a new daily total into the model and
+                        returns the revised forecast.
+        """
+        if self.level is None:
+            return self.forecast([point])
+
+        self.smooth(point)
+        return self.predict()
+
+    def revise_last(self, point):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Replaces the most recent daily total by rolling the
+                        state back one step and smoothing the new value.
+        """
+        if self.previous is None:
+            if self.point is None:
+                raise IndexError
+
+            return self.forecast([point])
+
+        level, trend, season, last = self.previous
+
+        self.t -= 1
+        self.level = level
+        self.trend = trend
+        self.season[self.t % self.periods] = season
+        self.point = last
+
+        return self.update(point)
+
+
+class PeriodDetector(object):
+    def __init__(self, default=7, minimum=2, maximum=None, threshold=0.1, growth=0.25):
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.threshold = threshold
+        self.growth = growth
+        self.period = None
+        self.size = 0
+
+    def __call__(self, data):
+        return self.detect(data)
+
+    def stale(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   A cached period is kept until the series has grown
+                        by a fraction of its size at detection, or by at
+                        least one full period, whichever is larger.
+        """
+        if self.period is None:
+            return True
+
+        grown = len(data) - self.size
+        return grown < 0 or grown >= max(self.period, self.size * self.growth)
+
+    def detect(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the season length of the series, which is
+                        the lag of the strongest autocorrelation peak.
+                        Falls back to the default if there is no peak
+                        above the threshold.
+        """
+        if not self.stale(data):
+            return self.period
+
+        acf = self.autocorrelation(data)
+        high = len(acf) // 2 if self.maximum is None else min(self.maximum, len(acf) // 2)
+        period = self.default
+
+        if high > self.minimum and acf[0] > 0:
+            lags = np.arange(self.minimum, high)
+            peaks = lags[(acf[lags] >= acf[lags - 1]) & (acf[lags] >= acf[lags + 1])]
+
+            if len(peaks) and acf[peaks].max() >= self.threshold:
+                period = int(peaks[np.argmax(acf[peaks])])
+
+        logging.info('Detected season length %s from %s points', period, len(data))
+
+        self.period = period
+        self.size = len(data)
+
+        return self.period
+
+    def autocorrelation(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Computes the normalized autocorrelation of the
+                        series for every lag at once in O(n log n), using
+                        the power spectrum of the zero padded series.
+        """
+        data = np.asarray(data, dtype=float)
+        n = len(data)
+
+        if n == 0:
+            return np.zeros(0)
+
+        size = 1 << (2 * n - 1).bit_length()
+        spectrum = np.fft.rfft(data - data.mean(), size)
+        acf = np.fft.irfft(spectrum * np.conj(spectrum), size)[:n]
+
+        return acf / acf[0] if acf[0] > 0 else acf
+
+
+class BatchTimeSeriesRegression(object):
+    """
+    Fits a TimeSeriesRegression to every row of a (series x days) matrix
+    in one pass, e.g. one row per keg or tap.  Rows may differ in length,
+    as kegs tapped on different days do; rows of the same length are
+    fitted together, each on its own days.  Degenerate rows are handled
+    as TimeSeriesRegression does: windows that average to zero are left
+    out of the seasonal indices, and a constant row is carried forward
+    flat.
+    """
+    def __init__(self, periods):
+        self.periods = periods
+        self.seasonal_indicies = None
+        self.intercept = None
+        self.prediction = None
+        self.slope = None
+
+    def forecast(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Creates a time-series regression model for each
+                        row and returns a list of per-row predictions.
+        """
+        rows = ragged(data)
+
+        if rows is None:
+            return self.fit(np.atleast_2d(np.asarray(data, dtype=float)))
+
+        p = self.periods
+
+        self.intercept = np.zeros(len(rows))
+        self.slope = np.zeros(len(rows))
+        self.seasonal_indicies = np.zeros((len(rows), p))
+        self.prediction = np.zeros((len(rows), p))
+
+        for idx, block in spans(rows):
+            part = BatchTimeSeriesRegression(p)
+            part.fit(block)
+
+            self.intercept[idx] = part.intercept
+            self.slope[idx] = part.slope
+            self.seasonal_indicies[idx, :part.seasonal_indicies.shape[1]] = part.seasonal_indicies
+            self.prediction[idx] = part.prediction
+
+        return self.prediction.tolist()
+
+    def fit(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Fits every row of a (series x days) matrix and
+                        returns a list of per-row predictions.
+        """
+        self.calculate_regression_line(data)
+        self.calculate_seasonal_indices(data)
+
+        x = np.arange(data.shape[1], data.shape[1] + self.periods)
+        indices = np.zeros((data.shape[0], self.periods))
+        indices[:, :self.seasonal_indicies.shape[1]] = self.seasonal_indicies
+
+        self.prediction = (
+            self.intercept[:, None] + self.slope[:, None] * x + indices[:, x % self.periods]
+        )
+
+        return self.prediction.tolist()
+
+    def residuals(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the in-sample errors of the fitted model,
+                        observed minus fitted, for every row.  Must be
+                        called after forecast() on the same data.  Rows of
+                        differing lengths give a list of arrays.
+        """
+        rows = ragged(data)
+        data = np.atleast_2d(np.asarray(data, dtype=float)) if rows is None else rows
+
+        indices = np.zeros((len(data), self.periods))
+        indices[:, :self.seasonal_indicies.shape[1]] = self.seasonal_indicies
+
+        if rows is None:
+            x = np.arange(data.shape[1])
+            fitted = self.intercept[:, None] + self.slope[:, None] * x + indices[:, x % self.periods]
+
+            return data - fitted
+
+        res = [None] * len(rows)
+
+        for idx, block in spans(rows):
+            x = np.arange(block.shape[1])
+            fitted = self.intercept[idx, None] + self.slope[idx, None] * x + indices[idx][:, x % self.periods]
+
+            for i, row in zip(idx, block - fitted):
+                res[i] = row
+
+        return res
+
+    def calculate_regression_line(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Calculate the regression line of every row.
+        """
+        n = data.shape[1]
+
+        sx = data.sum(axis=1)
+        sy = n * (n + 1) / 2
+        sxy = data.dot(np.arange(1, n + 1))
+        ssx = (data * data).sum(axis=1)
+
+        d = n * ssx - sx ** 2
+        flat = np.abs(d) <= TimeSeriesRegression.FLAT * n * ssx
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.intercept = np.where(flat, sx / n, (sy * ssx - sx * sxy) / d)
+            self.slope = np.where(flat, 0.0, (n * sxy - sx * sy) / d)
+
+    def calculate_seasonal_indices(self, data):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Calculate the seasonal indecies of every row by
+                        folding each row's ratios to moving average into
+                        a (seasons x periods) block.
+        """
+        p = self.periods
+        rows, n = data.shape
+
+        if n < p:
+            self.seasonal_indicies = np.zeros((rows, 0))
+            return
+
+        csum = np.concatenate((np.zeros((rows, 1)), np.cumsum(data, axis=1)), axis=1)
+        cma = (csum[:, p:] - csum[:, :-p]) / p
+
+        if p % 2 == 0:
+            cma = (cma[:, :-1] + cma[:, 1:]) / 2.0
+
+        m = cma.shape[1]
+        slots = min(p, m)
+
+        valid = cma != 0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rma = data[:, p // 2:p // 2 + m] / cma
+        width = -(-m // p) * p
+
+        ratios = np.zeros((rows, width))
+        ratios[:, :m] = np.where(valid, rma, 0)
+        counts = np.zeros((rows, width))
+        counts[:, :m] = valid
+
+        season_sum = ratios.reshape(rows, -1, p).sum(axis=1)[:, :slots]
+        season_cnt = counts.reshape(rows, -1, p).sum(axis=1)[:, :slots]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            season_avg = np.where(season_cnt > 0, season_sum / season_cnt, 0)
+            total = season_avg.sum(axis=1, keepdims=True)
+            self.seasonal_indicies = np.where(
+                (season_cnt > 0) & (total != 0),
+                (season_avg - p) / total,
+                0
+            )
+
+
+def ragged(data):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   The rows of data as float arrays if they differ in
+                    length, otherwise None.
+    """
+    if not len(data) or np.ndim(data[0]) == 0:
+        return None
+
+    rows = [np.asarray(x, dtype=float) for x in data]
+
+    return rows if len(set(len(x) for x in rows)) > 1 else None
+
+def spans(rows):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Groups rows by length.  Yields the indices of each
+                    group and its rows as a matrix.
+    """
+    groups = {}
+
+    for i, row in enumerate(rows):
+        groups.setdefault(len(row), []).append(i)
+
+    for n, idx in sorted(groups.items()):
+        yield idx, np.array([rows[i] for i in idx]).reshape(len(idx), n)
+
+def daily_matrix(rows, key='keg_id'):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Pivots (key, day, amount) rows into a row of daily
+                    totals per key, with zero for days a key had no pours.
+                    Each row runs from that key's first day, so a keg
+                    tapped recently is not padded with the days before
+                    it was, up to the last day of any key.  Returns the
+                    sorted keys and the rows.
+    """
+    keys = sorted(set(x[key] for x in rows))
+    days = sorted(set(x['day'] for x in rows))
+
+    col = {d: i for i, d in enumerate(days)}
+    first = {}
+
+    for x in rows:
+        first[x[key]] = min(first.get(x[key], len(days)), col[x['day']])
+
+    matrix = {k: [0.0] * (len(days) - first[k]) for k in keys}
+
+    for x in rows:
+        matrix[x[key]][col[x['day']] - first[x[key]]] += x['amount']
+
+    return keys, [matrix[k] for k in keys]
+
+
+def create(cfg=None, periods=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Builds an unfitted model from a model config.  The
+                    'type' key picks the model and defaults to a time
+                    series regression.
+    """
+    PERIODS = 7
+
+    cfg = cfg if cfg is not None else {}
+    periods = periods if periods is not None else cfg.get('periods', PERIODS)
+
+    if cfg.get('type') == 'holtwinters':
+        return HoltWinters(
+            periods,
+            alpha=cfg.get('alpha', 0.5),
+            beta=cfg.get('beta', 0.1),
+            gamma=cfg.get('gamma', 0.1),
+            seasonal=cfg.get('seasonal')
+        )
+
+    return VectorizedTimeSeriesRegression(periods)
@@ -6,6 +6,7 @@
 #
 
 from multiprocessing import Process, Queue
+from .. import query
 import RPi.GPIO as GPIO
 import logging
 import time
@@ -80,16 +81,20 @@ class FlowMeter(object):
                 time.sleep(0.1)
 
 class FlowMeterManager(object):
-    def __init__(self, pins=None, pipe=None, dbi=None):
+    def __init__(self, pins=None, pipe=None, dbi=None, writer=None, spool=None):
         pins = pins if pins is not None else []
 
         logging.info('Starting FlowMeterManager...')
         logging.info('Initializing with meters on pins %s', pins)
 
         self.fmq = Queue()
+        self.pins = list(pins)
         self.meters = [Process(target=FlowMeter(x, self.fmq).monitor) for x in pins]
         self.pipe = pipe
         self.dbi = dbi
+        self.writer = writer
+        self.spool = spool
+        self.kegs = None
 
     def add(self, *pins):
         """
@@ -99,6 +104,7 @@ class FlowMeterManager(object):
                         the controller to accept flow input from multiple
                         taps.
         """
+        self.pins += pins
         self.meters += [Process(target=FlowMeter(x, self.fmq).monitor) for x in pins]
 
     def start(self, pin):
@@ -112,6 +118,96 @@ class FlowMeterManager(object):
     def start_all(self):
         [x.start() for x in self.meters]
 
+    def serving(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The ids of the kegs now serving, in order, so the
+                        meter on the nth pin pours from the nth keg.  They
+                        are read once and then kept up to date by the
+                        parent, which sends them whenever it rereads the
+                        kegs now serving, so a pour never waits on a
+                        SELECT.  Until they are read, no keg is serving.
+        """
+        if self.kegs is not None:
+            return self.kegs
+
+        try:
+            with self.dbi as dbi:
+                kegs = dbi.select(*query.get_serving_kegs())
+        except Exception as e:
+            logging.error('Cannot look up the kegs now serving: %s', e)
+            kegs = None
+
+        if kegs is not None:
+            self.kegs = [x['id'] for x in kegs]
+
+        return self.kegs or []
+
+    def receive(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Takes the ids of the kegs now serving from any
+                        messages the parent has sent.
+        """
+        while self.pipe and self.pipe.poll():
+            data = self.pipe.recv()
+
+            if 'kegs' in data:
+                self.kegs = list(data['kegs'])
+
+    def rows(self, pours):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Builds a Pour row for each pour from a tap that is
+                        serving a keg.
+        """
+        kegs = self.serving()
+        pour_time = time.strftime('%Y-%m-%d %H:%M:%S')
+        rows = []
+
+        for data in pours:
+            tap = self.pins.index(data['pin'])
+
+            if tap < len(kegs):
+                rows.append({
+                    'keg_id': kegs[tap],
+                    'pour_time': pour_time,
+                    'volume': round(data['amount'], 2)
+                })
+            else:
+                logging.error('Pour not stored: no keg is serving from pin %s', data['pin'])
+
+        return rows
+
+    def store(self, pours):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Appends pours to the spool if there is one,
+                        otherwise buffers them in the batch writer, and
+                        wakes its thread to write them now.  Neither waits
+                        on the database.  Without either they are inserted
+                        directly.
+        """
+        rows = self.rows(pours)
+
+        if not rows:
+            return
+
+        if self.spool:
+            for row in rows:
+                self.spool.append('Pour', row)
+            self.spool.nudge()
+        elif self.writer:
+            self.writer.add(*query.set_pour([list(x.items()) for x in rows]))
+            self.writer.nudge()
+        else:
+            with self.dbi as dbi:
+                dbi.insert(*query.set_pour([list(x.items()) for x in rows]))
+
     def run(self):
         """
         @author:        Harrison Hubbell
@@ -119,13 +215,20 @@ class FlowMeterManager(object):
         @description:   Starts monitor the FlowMeter for pouring
         """
         self.start_all()
+        self.serving()
 
         while True:
+            pours = []
+
+            self.receive()
+
             while not self.fmq.empty():
                 data = self.fmq.get()
-                self.pipe.send(data)
+                pours.append(data)
                 logging.info('Flow detected %s', data)
 
+            if pours:
+                self.store(pours)
+                [self.pipe.send(x) for x in pours]
 
             time.sleep(0.1)
-
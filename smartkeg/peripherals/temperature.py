@@ -44,7 +44,7 @@ class TemperatureSensor(object):
 class TemperatureSensorManager(object):
     PATH = '/sys/bus/w1/devices/'
 
-    def __init__(self, interval, sensors=None, path=None, filename=None, pipe=None, dbi=None):
+    def __init__(self, interval, sensors=None, path=None, filename=None, pipe=None, dbi=None, writer=None, spool=None, fridge=None):
         sensors = sensors if sensors is not None else []
 
         logging.info('Starting TemperatureSensorManager...')
@@ -54,6 +54,11 @@ class TemperatureSensorManager(object):
         self.path = path if path is not None else self.PATH
         self.pipe = pipe
         self.dbi = dbi
+        self.writer = writer
+        self.spool = spool
+        self.fridge = fridge
+        self.fridge_id = None
+        self.sensor_ids = {}
 
         self.sensors = [TemperatureSensor(x, self.path) for x in sensors]
 
@@ -98,6 +103,82 @@ class TemperatureSensorManager(object):
         """
         return celcius * 1.8 + 32
 
+    def resolve(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Looks up the ids of the fridge and of each sensor
+                        that readings are stored against, registering any
+                        the database does not have yet.  Returns True once
+                        all of them are known.
+        """
+        names = [x.id for x in self.sensors]
+
+        if self.fridge_id is not None and all(x in self.sensor_ids for x in names):
+            return True
+
+        if self.fridge is None or not names:
+            return False
+
+        try:
+            with self.dbi as dbi:
+                fridge = dbi.select(*query.get_fridge_id(self.fridge))
+
+                if fridge == []:
+                    logging.info('Registering fridge %s', self.fridge)
+                    dbi.insert(*query.set_fridge(self.fridge))
+                    fridge = dbi.select(*query.get_fridge_id(self.fridge))
+
+                ids = {x['name']: x['id'] for x in dbi.select(*query.get_sensor_ids(names)) or []}
+                missing = [x for x in names if x not in ids]
+
+                if missing:
+                    logging.info('Registering temperature sensors %s', missing)
+                    dbi.insert(*query.set_sensors(missing))
+                    ids = {x['name']: x['id'] for x in dbi.select(*query.get_sensor_ids(names)) or []}
+        except Exception as e:
+            logging.error('Cannot look up the fridge and sensor ids: %s', e)
+            return False
+
+        if fridge:
+            self.fridge_id = fridge[0]['id']
+
+        self.sensor_ids = ids
+
+        return self.fridge_id is not None and all(x in self.sensor_ids for x in names)
+
+    def rows(self, fahr):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Builds a FridgeTemp row for each sensor's reading,
+                        all stamped with the time they were read.
+        """
+        read_time = time.strftime('%Y-%m-%d %H:%M:%S')
+
+        return [{
+            'fridge_id': self.fridge_id,
+            'sensor_id': self.sensor_ids[k],
+            'read_time': read_time,
+            'temperature': round(v, 2)
+        } for k, v in sorted(fahr.items())]
+
+    def store(self, rows):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Appends the rows to the spool if there is one,
+                        otherwise inserts them.
+        """
+        if self.spool:
+            for row in rows:
+                self.spool.append('FridgeTemp', row)
+        elif self.writer:
+            self.writer.add(*query.set_temperature([list(x.items()) for x in rows]))
+        else:
+            with self.dbi as dbi:
+                dbi.insert(*query.set_temperature([list(x.items()) for x in rows]))
+
     def run(self):
         """
         @author:        Harrison Hubbell
@@ -114,8 +195,10 @@ class TemperatureSensorManager(object):
                 [logging.info('%s %s F', k, v) for k, v in fahr.items()]
                 logging.info('Average: %s F', avg)
 
-                with self.dbi as dbi:
-                    dbi.insert(*query.set_temperature({'temperature': avg}))
+                if self.resolve():
+                    self.store(self.rows(fahr))
+                else:
+                    logging.error('Temperature not stored: fridge %s or its sensors are unknown', self.fridge)
 
                 self.pipe.send(avg)
 
@@ -75,15 +75,35 @@ def get_daily():
     @author:        Harrison Hubbell
     @created:       03/30/2015
     @description:   Format a query to get daily consumption
-    XXX: Needs work
+                    from the daily rollup
     """
     query = """
         SELECT
-            DATE(pour_time) AS day,
-            SUM(volume)     AS amount
-        FROM Pour
-        GROUP BY DATE(pour_time)
-        ORDER BY pour_time
+            day,
+            SUM(amount) AS amount
+        FROM KegDaily
+        GROUP BY day
+        ORDER BY day
+    """
+
+    return query, []
+
+def get_keg_daily():
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to get daily consumption of each
+                    currently served keg from the daily rollup
+    """
+    query = """
+        SELECT
+            kd.keg_id   AS keg_id,
+            kd.day      AS day,
+            kd.amount   AS amount
+        FROM KegDaily AS kd
+        JOIN Keg AS k ON kd.keg_id = k.id
+        WHERE k.now_serving = 1
+        ORDER BY day
     """
 
     return query, []
@@ -92,34 +112,29 @@ def get_now_serving():
     """
     @author:        Harrison Hubbell
     @created:       03/30/2015
-    @description:   Format a query to get currently served kegs
+    @description:   Format a query to get currently served kegs, with
+                    their ratings and volume poured read from the rollups
     """
     query = """
-        SELECT 
-            bs.*,
+        SELECT
+            b.id        AS beer_id,
+            b.name      AS name,
+            b.abv       AS abv,
+            b.ibu       AS ibu,
+            br.name     AS brewer,
+            bt.type     AS type,
+            bt.subtype  AS subtype,
+            brt.total / NULLIF(brt.ratings, 0) AS rating,
             k.id        AS keg_id,
             k.volume    AS volume,
-            (k.volume - SUM(IFNULL(p.volume, 0))) / k.volume AS remaining
-        FROM (
-            SELECT
-                b.id        AS beer_id,
-                b.name      AS name,
-                b.abv       AS abv,
-                b.ibu       AS ibu,
-                br.name     AS brewer,
-                bt.type     AS type,
-                bt.subtype  AS subtype,
-                AVG(bra.rating) AS rating
-            FROM Beer AS b
-            JOIN Brewer AS br ON b.brewer_id = br.id
-            JOIN BeerType AS bt ON b.type_id = bt.id
-            LEFT JOIN BeerRating AS bra ON b.id = bra.beer_id
-            GROUP BY b.id
-        ) AS bs
-        JOIN Keg AS k ON bs.beer_id = k.beer_id
-        LEFT JOIN Pour AS p on k.id = p.keg_id
+            (k.volume - IFNULL(kv.poured, 0)) / k.volume AS remaining
+        FROM Keg AS k
+        JOIN Beer AS b ON k.beer_id = b.id
+        JOIN Brewer AS br ON b.brewer_id = br.id
+        JOIN BeerType AS bt ON b.type_id = bt.id
+        LEFT JOIN BeerRatingTotal AS brt ON b.id = brt.beer_id
+        LEFT JOIN KegVolume AS kv ON k.id = kv.keg_id
         WHERE k.now_serving = 1
-        GROUP BY k.id
     """
 
     return query, []
@@ -131,11 +146,12 @@ def get_percent_remaining():
     @description:   Format a query to get percent of keg remaining
     """
     query = """
-        SELECT (k.volume - SUM(p.volume)) / k.volume
+        SELECT
+            k.id                                    AS keg_id,
+            (k.volume - kv.poured) / k.volume       AS remaining
         FROM Keg AS k
-        JOIN Pour AS p ON k.id = p.keg_id
+        JOIN KegVolume AS kv ON k.id = kv.keg_id
         WHERE k.now_serving = 1
-        GROUP BY k.id
     """
 
     return query, []
@@ -147,11 +163,12 @@ def get_volume_remaining():
     @description:   Format a query to get volume of keg remaining
     """
     query = """
-        SELECT k.volume - SUM(p.volume)
+        SELECT
+            k.id                    AS keg_id,
+            k.volume - kv.poured    AS remaining
         FROM Keg AS k
-        JOIN Pour AS p ON k.id = p.keg_id
+        JOIN KegVolume AS kv ON k.id = kv.keg_id
         WHERE k.now_serving = 1
-        GROUP BY k.id
     """
 
     return query, []
@@ -165,6 +182,236 @@ def get_fridge_temp(params):
     query = """SELECT id FROM FridgeTemp {}""".format(format_where(params))
     return query, [x[1] for x in params]
 
+def get_fridge_id(name):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to get the id of a fridge by name
+    """
+    query = """SELECT id FROM Fridge WHERE name = %s ORDER BY id"""
+    return query, (name,)
+
+def get_sensor_ids(names):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to get the ids of fridge sensors by
+                    their hardware names
+    """
+    query = """
+        SELECT
+            id,
+            name
+        FROM Sensor
+        WHERE type = 'Fridge' AND name IN ({})
+    """.format(', '.join(['%s'] * len(names)))
+
+    return query, list(names)
+
+def get_serving_kegs():
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to get the ids of the kegs now serving
+    """
+    query = """SELECT id FROM Keg WHERE now_serving = 1 ORDER BY id"""
+    return query, []
+
+def get_pours(params):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to get the pour history, optionally
+                    of one keg
+    """
+    params = [x for x in params if x[0] in ('keg_id', 'person_id')]
+    query = """
+        SELECT
+            id,
+            keg_id,
+            person_id,
+            pour_time,
+            volume
+        FROM Pour
+        {}
+        ORDER BY pour_time
+    """.format(format_where(params))
+
+    return query, [x[1] for x in params]
+
+def get_temperatures(params):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to get the temperature history,
+                    optionally of one fridge or sensor
+    """
+    params = [x for x in params if x[0] in ('fridge_id', 'sensor_id')]
+    query = """
+        SELECT
+            id,
+            fridge_id,
+            sensor_id,
+            read_time,
+            temperature
+        FROM FridgeTemp
+        {}
+        ORDER BY read_time
+    """.format(format_where(params))
+
+    return query, [x[1] for x in params]
+
+
+def rebuild_rollups():
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format the statements that recompute every rollup
+                    from the raw Pour and BeerRating rows
+    """
+    return [
+        ("""DELETE FROM KegVolume""", [()]),
+        ("""
+            INSERT INTO KegVolume (keg_id, poured, pours)
+            SELECT keg_id, SUM(volume), COUNT(*)
+            FROM Pour
+            GROUP BY keg_id
+        """, [()]),
+        ("""DELETE FROM KegDaily""", [()]),
+        ("""
+            INSERT INTO KegDaily (keg_id, day, amount, pours)
+            SELECT keg_id, pour_day, SUM(volume), COUNT(*)
+            FROM Pour
+            GROUP BY keg_id, pour_day
+        """, [()]),
+        ("""DELETE FROM BeerRatingTotal""", [()]),
+        ("""
+            INSERT INTO BeerRatingTotal (beer_id, ratings, total)
+            SELECT beer_id, COUNT(rating), IFNULL(SUM(rating), 0)
+            FROM BeerRating
+            GROUP BY beer_id
+        """, [()])
+    ]
+
+def get_temperature_watermarks():
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to get the latest hourly and daily
+                    temperature buckets already folded
+    """
+    query = """
+        SELECT
+            (SELECT MAX(hour) FROM FridgeTempHourly) AS hour,
+            (SELECT MAX(day) FROM FridgeTempDaily)   AS day
+    """
+
+    return query, []
+
+def fold_temperature_hours(start, end):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to fold raw temperatures read in
+                    [start, end) into hourly buckets.  Buckets already
+                    folded are left as they are.
+    """
+    query = """
+        INSERT IGNORE INTO FridgeTempHourly
+            (fridge_id, sensor_id, hour, low, high, mean, readings)
+        SELECT
+            fridge_id,
+            sensor_id,
+            DATE_FORMAT(read_time, '%Y-%m-%d %H:00:00'),
+            MIN(temperature),
+            MAX(temperature),
+            AVG(temperature),
+            COUNT(*)
+        FROM FridgeTemp
+        WHERE read_time >= %s AND read_time < %s
+        GROUP BY fridge_id, sensor_id, DATE_FORMAT(read_time, '%Y-%m-%d %H:00:00')
+    """
+
+    return query, (start, end)
+
+def fold_temperature_days(start, end):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to fold hourly temperature buckets in
+                    [start, end) into daily buckets
+    """
+    query = """
+        INSERT IGNORE INTO FridgeTempDaily
+            (fridge_id, sensor_id, day, low, high, mean, readings)
+        SELECT
+            fridge_id,
+            sensor_id,
+            DATE(hour),
+            MIN(low),
+            MAX(high),
+            SUM(mean * readings) / SUM(readings),
+            SUM(readings)
+        FROM FridgeTempHourly
+        WHERE hour >= %s AND hour < %s
+        GROUP BY fridge_id, sensor_id, DATE(hour)
+    """
+
+    return query, (start, end)
+
+def rem_temperatures(end, limit):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to delete the oldest raw temperatures
+                    read before end, at most limit of them
+    """
+    query = """
+        DELETE FROM FridgeTemp
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id
+                FROM FridgeTemp
+                WHERE read_time < %s
+                ORDER BY read_time
+                LIMIT %s
+            ) AS expired
+        )
+    """
+
+    return query, (end, limit)
+
+def rem_temperature_hours(end):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to delete hourly temperature buckets
+                    before end
+    """
+    query = """DELETE FROM FridgeTempHourly WHERE hour < %s"""
+
+    return query, (end,)
+
+def get_partitions(table):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to get the range partitions of a MySQL
+                    table, in order
+    """
+    query = """
+        SELECT
+            PARTITION_NAME          AS name,
+            PARTITION_DESCRIPTION   AS bound
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE()
+            AND TABLE_NAME = %s
+            AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """
+
+    return query, (table,)
+
 
 def set_keg(params):
     """
@@ -176,15 +423,38 @@ def set_keg(params):
 
     return query, [x[1] for x in params]
 
+def set_fridge(name):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to register a fridge
+    """
+    query = """INSERT INTO Fridge (name) VALUES (%s)"""
+
+    return query, [(name,)]
+
+def set_sensors(names):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Format a query to register fridge sensors by their
+                    hardware names
+    """
+    query = """INSERT INTO Sensor (name, type) VALUES (%s, 'Fridge')"""
+
+    return query, [(x,) for x in names]
+
 def set_pour(params):
     """
     @author:        Harrison Hubbell
     @created:       03/05/2015
-    @description:   Format a query to insert a new pour
+    @description:   Format a query to insert pours.  params is a list
+                    of rows, each a list of (column, value) pairs in the
+                    same order.
     """
-    query = """INSERT INTO Pour {}""".format(format_values(params))
+    query = """INSERT INTO Pour {}""".format(format_values(params[0]))
 
-    return query, [x[1] for x in params]
+    return query, [tuple(x[1] for x in row) for row in params]
 
 def set_rating(params):
     """
@@ -200,11 +470,13 @@ def set_temperature(params):
     """
     @author:        Harrison Hubbell
     @created:       03/05/2015
-    @description:   Format a query to insert a new fridge temperature
+    @description:   Format a query to insert fridge temperatures.  params
+                    is a list of rows, each a list of (column, value)
+                    pairs in the same order.
     """
     query = """INSERT INTO FridgeTemp {}""".format(format_values(params[0]))
 
-    return query, [(x[0][1], x[1][1]) for x in params]
+    return query, [tuple(x[1] for x in row) for row in params]
 
 def rem_keg(params):
     """
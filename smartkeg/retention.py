@@ -0,0 +1,294 @@
+#
+# Filename:     retention.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Retention of the FridgeTemp history.  Raw readings are kept
+#               for a number of days, then folded into min/max/mean hourly
+#               and daily buckets and dropped.  Hourly buckets are kept for
+#               longer, daily buckets forever.
+#
+#               On MySQL, FridgeTemp is range partitioned by month, so an
+#               expired month is dropped with its partition rather than
+#               deleted row by row.  Elsewhere, expired readings are deleted
+#               in short batches so no transaction holds the table long.
+#
+#               Usage: smartkeg retention [--config FILE | --sqlite FILE]
+#
+
+from __future__ import print_function
+from .database import DatabaseInterface
+from . import query
+import argparse
+import atexit
+import datetime
+import json
+import logging
+import threading
+import time
+
+EPOCH = '1970-01-01 00:00:00'
+FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def parse(value):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Reads a datetime column, which SQLite returns as text.
+    """
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+
+    value = str(value)[:19]
+
+    return datetime.datetime.strptime(value, '%Y-%m-%d' if len(value) == 10 else FORMAT)
+
+
+class Retention(object):
+    TABLE = 'FridgeTemp'
+    MAXVALUE = 'pmax'
+
+    def __init__(self, dbi, raw_days=30, hourly_days=365, interval=3600.0, batch=5000, ahead=2):
+        self.dbi = dbi
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+        self.interval = interval
+        self.batch = batch
+        self.ahead = ahead
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc, value, trace):
+        self.close()
+
+    def cutoffs(self, now=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The midnights before which raw readings and hourly
+                        buckets expire.
+        """
+        now = now if now is not None else datetime.datetime.now()
+        today = datetime.datetime.combine(now.date(), datetime.time())
+
+        return (
+            today - datetime.timedelta(days=self.raw_days),
+            today - datetime.timedelta(days=self.hourly_days)
+        )
+
+    def fold(self, end):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Folds raw readings before end into hourly buckets,
+                        and those into daily buckets, starting after the
+                        latest bucket already folded.  Folding is done
+                        with INSERT IGNORE, so rerunning it after a crash
+                        never counts a reading twice.  Returns True if
+                        both folds committed.
+        """
+        with self.dbi as d:
+            marks = (d.select(*query.get_temperature_watermarks()) or [{}])[0]
+
+        hour = parse(marks.get('hour'))
+        day = parse(marks.get('day'))
+
+        hour = (hour + datetime.timedelta(hours=1)).strftime(FORMAT) if hour else EPOCH
+        day = (day + datetime.timedelta(days=1)).strftime(FORMAT) if day else EPOCH
+        end = end.strftime(FORMAT)
+
+        with self.dbi as d:
+            hours = d.update(*query.fold_temperature_hours(hour, end))
+            days = d.update(*query.fold_temperature_days(day, end))
+
+        return hours is not None and days is not None
+
+    def partitions(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The (name, bound) range partitions of FridgeTemp,
+                        where the bound is a UNIX timestamp, or None for
+                        the catch-all partition.  Empty if the table is
+                        not partitioned.
+        """
+        if self.dbi.backend.NAME != 'mysql':
+            return []
+
+        with self.dbi as d:
+            rows = d.select(*query.get_partitions(self.TABLE)) or []
+
+        return [
+            (x['name'], None if x['bound'] == 'MAXVALUE' else int(x['bound']))
+            for x in rows
+        ]
+
+    def extend(self, partitions, now):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Splits monthly partitions off the catch-all
+                        partition through the months ahead, so readings
+                        land in a partition that can later be dropped.
+                        The first split also takes every older reading.
+        """
+        bounds = [x[1] for x in partitions if x[1] is not None]
+        month = datetime.datetime(now.year, now.month, 1)
+        months = []
+
+        for _ in range(self.ahead + 1):
+            following = (month + datetime.timedelta(days=32)).replace(day=1)
+
+            if not bounds or time.mktime(following.timetuple()) > max(bounds):
+                months.append((month, following))
+
+            month = following
+
+        if not months:
+            return
+
+        sql = 'ALTER TABLE {} REORGANIZE PARTITION {} INTO ({}, PARTITION {} VALUES LESS THAN MAXVALUE)'.format(
+            self.TABLE,
+            self.MAXVALUE,
+            ', '.join(
+                "PARTITION p{} VALUES LESS THAN (UNIX_TIMESTAMP('{}'))".format(m.strftime('%Y%m'), f.strftime(FORMAT))
+                for m, f in months
+            ),
+            self.MAXVALUE
+        )
+
+        with self.dbi as d:
+            d.update(sql)
+
+    def expire(self, end, now=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Drops raw readings before end, which must already
+                        be folded.  Partitions are dropped once every
+                        reading in them has expired.  Returns the number
+                        of partitions or rows dropped.
+        """
+        partitions = self.partitions()
+
+        if partitions:
+            self.extend(partitions, now if now is not None else datetime.datetime.now())
+
+            cutoff = time.mktime(end.timetuple())
+            expired = [x[0] for x in partitions if x[1] is not None and x[1] <= cutoff]
+
+            if expired:
+                with self.dbi as d:
+                    d.update('ALTER TABLE {} DROP PARTITION {}'.format(self.TABLE, ', '.join(expired)))
+
+            return len(expired)
+
+        deleted = 0
+
+        while not self.stopped.is_set():
+            with self.dbi as d:
+                count = d.update(*query.rem_temperatures(end.strftime(FORMAT), self.batch))
+
+            if count is None:
+                break
+
+            deleted += count
+
+            if count < self.batch:
+                break
+
+        return deleted
+
+    def run(self, now=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Folds and expires everything past its retention.
+                        Nothing is expired unless it was folded first.
+        """
+        now = now if now is not None else datetime.datetime.now()
+        raw, hourly = self.cutoffs(now)
+        start = time.time()
+
+        if not self.fold(raw):
+            logging.error('Temperature retention skipped: folding failed')
+            return
+
+        expired = self.expire(raw, now)
+
+        with self.dbi as d:
+            d.update(*query.rem_temperature_hours(hourly.strftime(FORMAT)))
+
+        logging.info(
+            'Temperature retention expired %s before %s in %.3fs',
+            expired, raw, time.time() - start
+        )
+
+    def start(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Starts running retention every interval.
+        """
+        self.thread = threading.Thread(target=self.loop, name='Retention')
+        self.thread.daemon = True
+        self.thread.start()
+        atexit.register(self.close)
+
+    def loop(self):
+        while not self.stopped.wait(self.interval):
+            self.run()
+
+    def close(self):
+        self.stopped.set()
+
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+
+def main(argv=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Command line entry point.
+    """
+    parser = argparse.ArgumentParser(prog='smartkeg retention', description='Fold and expire Smartkeg temperature history.')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--config', default='/etc/smartkeg/config.json', help='Smartkeg config with database credentials')
+    source.add_argument('--sqlite', help='SQLite database file')
+    parser.add_argument('--raw-days', type=int)
+    parser.add_argument('--hourly-days', type=int)
+    args = parser.parse_args(argv)
+
+    rcfg = {}
+
+    if args.sqlite:
+        dbi = DatabaseInterface(None, args.sqlite, None, None, backend='sqlite')
+    else:
+        with open(args.config, 'r') as f:
+            cfg = json.load(f)
+
+        rcfg = cfg.get('retention', {})
+        dbi = DatabaseInterface(
+            cfg['database']['address'],
+            cfg['database']['schema'],
+            cfg['database']['user'],
+            cfg['database']['password'],
+            backend=cfg['database'].get('backend')
+        )
+
+    Retention(
+        dbi,
+        raw_days=args.raw_days or rcfg.get('raw_days', 30),
+        hourly_days=args.hourly_days or rcfg.get('hourly_days', 365)
+    ).run()
+
+
+if __name__ == '__main__':
+    main()
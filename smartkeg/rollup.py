@@ -0,0 +1,72 @@
+#
+# Filename:     rollup.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Rebuilds the consumption and rating rollup tables from the raw
+#               Pour and BeerRating rows.  Triggers keep the rollups current
+#               as rows are inserted; this recomputes them after a bulk load,
+#               a manual edit, or the first upgrade to a schema with them.
+#
+#               Usage: smartkeg rollup [--config FILE | --sqlite FILE]
+#
+
+from __future__ import print_function
+from .database import DatabaseInterface
+from . import query
+import argparse
+import json
+import logging
+import time
+
+def rebuild(dbi):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Recomputes every rollup in a single transaction.  Pours
+                    inserted while it runs may be counted twice or missed,
+                    so it should be run while the daemon is stopped.
+                    Returns True if the transaction committed.
+    """
+    start = time.time()
+
+    with dbi as d:
+        committed = d.insert_batch(query.rebuild_rollups())
+
+    logging.info('Rebuilt rollups in %.3fs', time.time() - start)
+
+    return committed
+
+def main(argv=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Command line entry point.
+    """
+    parser = argparse.ArgumentParser(prog='smartkeg rollup', description='Rebuild Smartkeg rollup tables.')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--config', default='/etc/smartkeg/config.json', help='Smartkeg config with database credentials')
+    source.add_argument('--sqlite', help='SQLite database file')
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        dbi = DatabaseInterface(None, args.sqlite, None, None, backend='sqlite')
+    else:
+        with open(args.config, 'r') as f:
+            cfg = json.load(f)['database']
+
+        dbi = DatabaseInterface(
+            cfg['address'],
+            cfg['schema'],
+            cfg['user'],
+            cfg['password'],
+            backend=cfg.get('backend')
+        )
+
+    if not rebuild(dbi):
+        raise SystemExit('Rebuilding the rollups failed, see the log.')
+
+    print('Rollups rebuilt.')
+
+
+if __name__ == '__main__':
+    main()
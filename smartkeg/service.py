@@ -0,0 +1,139 @@
+#
+# Filename:     service.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Fits models in a pool of worker processes so a slow fit never
+#               stalls flow meter polling or SSE pushes.  Only the newest
+#               request for each key is ever published.  Finished forecasts
+#               are queued, and handed to the callback on the thread that
+#               drains the queue, so the caller's state is only ever
+#               touched from its own loop.
+#
+
+from concurrent.futures import Future, ProcessPoolExecutor
+import logging
+import queue
+import threading
+
+def fit(model, data):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Runs in a worker process and returns the forecast.
+    """
+    return model.forecast(data)
+
+
+class ForecastService(object):
+    def __init__(self, workers=1, callback=None, cache=None):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.callback = callback
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.latest = {}
+        self.pending = {}
+        self.results = queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc, value, trace):
+        self.shutdown()
+
+    def submit(self, key, model, data, context=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Queues a fit and returns a Future of its forecast.
+                        A newer submit for the same key makes this one
+                        stale: it is cancelled if it has not started, and
+                        its result is never published if it has.  The
+                        context is handed back to the callback untouched.
+        """
+        forecast = self.cache.lookup(model, data) if self.cache is not None else None
+
+        with self.lock:
+            generation = self.latest.get(key, 0) + 1
+            self.latest[key] = generation
+
+            stale = self.pending.pop(key, None)
+            if stale is not None:
+                stale.cancel()
+
+            if forecast is None:
+                future = self.pool.submit(fit, model, data)
+                self.pending[key] = future
+            else:
+                future = Future()
+                future.set_result(forecast)
+
+        fresh = forecast is None
+        future.add_done_callback(
+            lambda f: self.complete(key, generation, model, data, f, fresh, context)
+        )
+
+        return future
+
+    def complete(self, key, generation, model, data, future, fresh=True, context=None):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Queues a finished fit to be published, unless it
+                        has been superseded.  Fresh fits are added to the
+                        cache.  Runs on whichever thread finished the
+                        future.
+        """
+        if future.cancelled():
+            return
+
+        with self.lock:
+            if self.latest.get(key) != generation:
+                logging.debug('Dropping stale forecast for %s', key)
+                return
+
+            if self.pending.get(key) is future:
+                del self.pending[key]
+
+        exc = future.exception()
+        if exc is not None:
+            logging.error('Forecast for %s failed: %s', key, exc)
+            return
+
+        if self.cache is not None and fresh:
+            self.cache.store(model, data, future.result())
+
+        self.results.put((key, generation, future.result(), context))
+
+    def drain(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Hands each queued forecast to the callback, from
+                        the calling thread, skipping any superseded since
+                        it finished.  Never blocks.  Returns the number
+                        published.
+        """
+        published = 0
+
+        while True:
+            try:
+                key, generation, forecast, context = self.results.get_nowait()
+            except queue.Empty:
+                return published
+
+            with self.lock:
+                if self.latest.get(key) != generation:
+                    continue
+
+            if self.callback:
+                self.callback(key, forecast, context)
+
+            published += 1
+
+    def shutdown(self, wait=True):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Stops the worker processes.
+        """
+        self.pool.shutdown(wait=wait)
@@ -0,0 +1,110 @@
+#
+# Filename:     simulation.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Monte Carlo stockout risk.  Consumption paths are drawn by
+#               bootstrapping a model's residuals around its forecast, all
+#               in one batched array per chunk of trials, to estimate the
+#               probability that each keg runs dry before the next delivery.
+#
+
+from __future__ import division, print_function
+from multiprocessing import Pool
+import numpy as np
+import time
+
+def count_stockouts(left, forecast, residuals, trials, seed):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Simulates a number of trials for every keg and returns
+                    how many ran dry.  Module level so it can be run in a
+                    worker process.
+    """
+    rng = np.random.default_rng(seed)
+    kegs, days = forecast.shape
+
+    draws = rng.integers(0, residuals.shape[1], size=(kegs, trials, days))
+    noise = np.take_along_axis(residuals, draws.reshape(kegs, -1), axis=1)
+
+    paths = np.clip(forecast[:, None, :] + noise.reshape(kegs, trials, days), 0, None)
+    demand = paths.sum(axis=2)
+
+    return (demand >= left[:, None]).sum(axis=1)
+
+
+class StockoutSimulator(object):
+    CHUNK = 10000
+
+    def __init__(self, trials=10000, workers=None, seed=None, chunk=None):
+        self.trials = trials
+        self.workers = workers
+        self.seed = seed
+        self.chunk = chunk if chunk is not None else self.CHUNK
+
+    def simulate(self, left, forecast, residuals, days):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Returns the probability of each keg running dry
+                        within the given number of days.  left is the
+                        volume remaining per keg, forecast the per-keg
+                        forecast season (repeated out to the number of
+                        days) and residuals the per-keg in-sample errors.
+                        Trials are simulated in chunks to bound memory,
+                        and spread over a process pool if workers is set.
+                        Kegs with histories of differing lengths are
+                        simulated one at a time.
+        """
+        if len(set(np.size(x) for x in residuals)) > 1:
+            return [
+                self.simulate([a], [b], [c], days)[0]
+                for a, b, c in zip(left, forecast, residuals)
+            ]
+
+        left = np.asarray(left, dtype=float)
+        forecast = np.atleast_2d(np.asarray(forecast, dtype=float))
+        residuals = np.atleast_2d(np.asarray(residuals, dtype=float))
+
+        forecast = forecast[:, np.arange(days) % forecast.shape[1]]
+        residuals = np.where(np.isfinite(residuals), residuals, 0)
+
+        if residuals.shape[1] == 0:
+            residuals = np.zeros((forecast.shape[0], 1))
+
+        sizes = [self.chunk] * (self.trials // self.chunk)
+        if self.trials % self.chunk:
+            sizes.append(self.trials % self.chunk)
+
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        jobs = [(left, forecast, residuals, n, s) for n, s in zip(sizes, seeds)]
+
+        if self.workers and len(jobs) > 1:
+            with Pool(self.workers) as pool:
+                counts = pool.starmap(count_stockouts, jobs)
+        else:
+            counts = [count_stockouts(*job) for job in jobs]
+
+        return (np.sum(counts, axis=0) / self.trials).tolist()
+
+
+def benchmark(trials=100000, kegs=1, days=7, history=365, workers=None):
+    """
+    @author:        agent
+    @created:       10/18/2026
+    @description:   Times a simulation on synthetic data and returns the
+                    elapsed seconds.
+    """
+    rng = np.random.default_rng(0)
+    forecast = rng.uniform(1, 10, size=(kegs, days))
+    residuals = rng.normal(0, 2, size=(kegs, history))
+    left = forecast.sum(axis=1)
+
+    start = time.time()
+    StockoutSimulator(trials, workers=workers, seed=0).simulate(left, forecast, residuals, days)
+
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    print('{} paths: {:.3f}s'.format(100000, benchmark()))
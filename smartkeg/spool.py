@@ -0,0 +1,373 @@
+#
+# Filename:     spool.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Durable local spool for sensor readings.  Writers append a
+#               JSON line to a local file, which costs microseconds and never
+#               touches the database.  A background drainer replays the spool
+#               into the database with bulk inserts.  Delivery is at least
+#               once: every record carries a unique spool_key, and rows are
+#               inserted with INSERT IGNORE so a replay never duplicates.
+#               Since INSERT IGNORE also skips rows that break a constraint,
+#               the keys are checked after each commit, and records that
+#               were not stored are set aside rather than passed over.
+#               Only records the database refuses are set aside; while it
+#               cannot be reached the drainer backs off and retries.
+#
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+class Spool(object):
+    TABLES = ('Pour', 'FridgeTemp')
+    TIME_COLUMN = {'Pour': 'pour_time', 'FridgeTemp': 'read_time'}
+
+    def __init__(self, path, dbi, sync=1.0, interval=5.0, batch=500, backoff=300.0):
+        self.path = path
+        self.dbi = dbi
+        self.sync_interval = sync
+        self.interval = interval
+        self.batch = batch
+        self.backoff = backoff
+        self.failures = 0
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.wake = threading.Event()
+        self.thread = None
+
+        self.file = open(self.path, 'ab')
+        self.offset = self.load_offset()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc, value, trace):
+        self.close()
+
+    def append(self, table, row):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Appends a row bound for a table to the spool and
+                        returns its spool key.  The row is stamped with the
+                        current time so a late replay keeps the time it was
+                        read.  It reaches the disk at the next batched fsync.
+        """
+        if table not in self.TABLES:
+            raise ValueError('Cannot spool rows for table "{}"'.format(table))
+
+        row = dict(row)
+        row.setdefault(self.TIME_COLUMN[table], time.strftime('%Y-%m-%d %H:%M:%S'))
+
+        key = uuid.uuid4().hex
+        line = json.dumps({'key': key, 'table': table, 'row': row}) + '\n'
+
+        with self.lock:
+            self.file.write(line.encode('utf-8'))
+            self.file.flush()
+            self.dirty = True
+
+        return key
+
+    def sync(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   fsyncs everything appended since the last sync.
+        """
+        with self.lock:
+            if self.dirty:
+                os.fsync(self.file.fileno())
+                self.dirty = False
+
+    def load_offset(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Reads how far into the spool has been committed.
+                        An offset past the end of the spool, left by a
+                        crash while it was emptied, is read as its end.
+        """
+        try:
+            with open(self.path + '.offset', 'r') as f:
+                offset = int(f.read().strip() or 0)
+        except (IOError, OSError, ValueError):
+            return 0
+
+        return max(0, min(offset, os.path.getsize(self.path)))
+
+    def save_offset(self, offset):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Durably records how far into the spool has been
+                        committed.
+        """
+        tmp = self.path + '.offset.tmp'
+
+        with open(tmp, 'w') as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, self.path + '.offset')
+        self.offset = offset
+
+    def read(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Reads up to a batch of complete records after the
+                        committed offset.  Returns the records and the
+                        offset just past them.
+        """
+        records = []
+        end = self.offset
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+
+                end += len(line)
+
+                try:
+                    records.append(json.loads(line.decode('utf-8')))
+                except ValueError:
+                    logging.error('Skipping corrupt spool record: %r', line)
+
+                if len(records) >= self.batch:
+                    break
+
+        return records, end
+
+    def statements(self, records):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Groups records into one INSERT IGNORE per table and
+                        column set.
+        """
+        groups = {}
+
+        for record in records:
+            cols = tuple(sorted(record['row']))
+            query = 'INSERT IGNORE INTO {} ({}, spool_key) VALUES ({})'.format(
+                record['table'],
+                ', '.join(cols),
+                ', '.join(['%s'] * (len(cols) + 1))
+            )
+            groups.setdefault(query, []).append(
+                tuple(record['row'][x] for x in cols) + (record['key'],)
+            )
+
+        return list(groups.items())
+
+    def stored(self, dbi, records):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   The spool keys of the records that are in the
+                        database, whether inserted now or by an earlier
+                        replay.
+        """
+        tables = {}
+        keys = set()
+
+        for record in records:
+            tables.setdefault(record['table'], []).append(record['key'])
+
+        for table, group in tables.items():
+            rows = dbi.select('SELECT spool_key FROM {} WHERE spool_key IN ({})'.format(
+                table,
+                ', '.join(['%s'] * len(group))
+            ), group)
+
+            if rows is None:
+                return None
+
+            keys.update(x['spool_key'] for x in rows)
+
+        return keys
+
+    def reject(self, records, reason):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Sets records aside in the .rejected file.
+        """
+        logging.error('Rejecting %s spool records: %s', len(records), reason)
+
+        with open(self.path + '.rejected', 'a') as f:
+            f.writelines(json.dumps(x) + '\n' for x in records)
+
+    def store(self, dbi, records):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Inserts records in one transaction and returns
+                        those the database did not store, with the reason.
+                        If the database refuses the batch, as for a row
+                        breaking a foreign key, each record is tried on
+                        its own so only those refused are returned.  Any
+                        other error is raised, leaving the records to be
+                        replayed.
+        """
+        try:
+            dbi.insert_batch(self.statements(records), raises=True)
+        except dbi.backend.Refused as e:
+            if len(records) == 1:
+                return [(records[0], str(e))]
+
+            res = []
+            for record in records:
+                res.extend(self.store(dbi, [record]))
+            return res
+
+        stored = self.stored(dbi, records)
+
+        if stored is None:
+            raise IOError('Cannot read back stored spool records')
+
+        return [(x, 'not stored by the database') for x in records if x['key'] not in stored]
+
+    def drain(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Replays the next batch into the database and
+                        advances the offset once every record in it is
+                        either stored or set aside in a .rejected file.
+                        Records the database refused or skipped, such as
+                        ones that break a constraint, are set aside.  If
+                        the database cannot be reached nothing is set
+                        aside and the batch is replayed later, however
+                        long that takes.  Returns the number of records
+                        handled.
+        """
+        records, end = self.read()
+
+        if not records:
+            if end != self.offset:
+                self.save_offset(end)
+            self.rotate()
+            return 0
+
+        try:
+            with self.dbi as dbi:
+                refused = self.store(dbi, records)
+        except Exception as e:
+            self.failures += 1
+            logging.warning(
+                'Cannot drain spool, retrying in %.0f seconds: %s',
+                self.delay(), e
+            )
+            return 0
+
+        self.failures = 0
+
+        for reason in set(x[1] for x in refused):
+            self.reject([x[0] for x in refused if x[1] == reason], reason)
+
+        self.save_offset(end)
+
+        return len(records)
+
+    def delay(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Seconds until the next drain: the interval,
+                        doubled for each drain failed in a row, up to the
+                        backoff.
+        """
+        return min(self.interval * 2 ** min(self.failures, 16), max(self.interval, self.backoff))
+
+    def rotate(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Empties the spool once every record is committed.
+                        The offset is reset first, so a crash between the
+                        two replays committed records, which is harmless,
+                        rather than skipping new ones.
+        """
+        with self.lock:
+            if self.offset and self.offset == os.path.getsize(self.path):
+                self.save_offset(0)
+                self.file.truncate(0)
+
+    def start(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Starts the sync and drain thread.
+        """
+        self.thread = threading.Thread(target=self.run, name='Spool')
+        self.thread.daemon = True
+        self.thread.start()
+        atexit.register(self.close)
+
+    def run(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   fsyncs the spool every sync interval and drains it
+                        every drain interval, backing off while the
+                        database is unavailable, until closed.  An
+                        unexpected error is logged and the loop carries
+                        on, so readings are never left in the spool for
+                        want of a drainer.
+        """
+        drained = time.time()
+
+        while not self.stopped.is_set():
+            nudged = self.wake.wait(self.sync_interval) and not self.failures
+            self.wake.clear()
+
+            try:
+                self.sync()
+
+                if nudged or time.time() - drained >= self.delay():
+                    while self.drain() == self.batch:
+                        pass
+                    drained = time.time()
+            except Exception:
+                logging.exception('Spool drain failed')
+                drained = time.time()
+
+    def nudge(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Wakes the drain thread to sync and drain now rather
+                        than at the next interval, unless it is backing
+                        off.  The caller does not wait for it.
+        """
+        self.wake.set()
+
+    def close(self):
+        """
+        @author:        agent
+        @created:       10/18/2026
+        @description:   Stops the drain thread and syncs the spool.  Records
+                        still in it are replayed on the next start.
+        """
+        self.stopped.set()
+        self.wake.set()
+
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
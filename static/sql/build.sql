@@ -108,6 +108,7 @@ CREATE TABLE FridgeTemp (
     sensor_id   INTEGER     NOT NULL,
     read_time   TIMESTAMP   NOT NULL,
     temperature FLOAT(5,2),
+    spool_key   CHAR(32)    UNIQUE, /* Dedup key of spooled readings */
     FOREIGN KEY(fridge_id) REFERENCES Fridge(id),
     FOREIGN KEY(sensor_id) REFERENCES Sensor(id),
     PRIMARY KEY(id)
@@ -146,7 +147,9 @@ CREATE TABLE Pour (
     keg_id      INTEGER     NOT NULL,
     person_id   INTEGER,
     pour_time   TIMESTAMP   NOT NULL,
+    pour_day    DATE        AS (DATE(pour_time)) STORED, /* Indexable day of the pour */
     volume      FLOAT(4,2)  NOT NULL,
+    spool_key   CHAR(32)    UNIQUE, /* Dedup key of spooled pours */
     FOREIGN KEY(keg_id) REFERENCES Keg(id),
     FOREIGN KEY(person_id) REFERENCES Person(id),
     PRIMARY KEY(id)
@@ -178,3 +181,96 @@ CREATE TABLE PurchaseContribution (
     FOREIGN KEY(keg_id) REFERENCES Keg(id),
     PRIMARY KEY(id)
 );
+
+-- --------------------
+-- KEG VOLUME ROLLUP TABLE
+-- --------------------
+CREATE TABLE KegVolume (
+    keg_id      INTEGER     NOT NULL,
+    poured      FLOAT       NOT NULL DEFAULT 0,
+    pours       INTEGER     NOT NULL DEFAULT 0,
+    FOREIGN KEY(keg_id) REFERENCES Keg(id),
+    PRIMARY KEY(keg_id)
+);
+
+-- --------------------
+-- KEG DAILY ROLLUP TABLE
+-- --------------------
+CREATE TABLE KegDaily (
+    keg_id      INTEGER     NOT NULL,
+    day         DATE        NOT NULL,
+    amount      FLOAT       NOT NULL DEFAULT 0,
+    pours       INTEGER     NOT NULL DEFAULT 0,
+    FOREIGN KEY(keg_id) REFERENCES Keg(id),
+    PRIMARY KEY(keg_id, day)
+);
+
+-- --------------------
+-- BEER RATING ROLLUP TABLE
+-- --------------------
+CREATE TABLE BeerRatingTotal (
+    beer_id     INTEGER     NOT NULL,
+    ratings     INTEGER     NOT NULL DEFAULT 0,
+    total       FLOAT       NOT NULL DEFAULT 0,
+    FOREIGN KEY(beer_id) REFERENCES Beer(id),
+    PRIMARY KEY(beer_id)
+);
+
+-- --------------------
+-- INDEXES ON HOT PREDICATES
+-- --------------------
+CREATE INDEX Keg_now_serving ON Keg (now_serving);
+CREATE INDEX Pour_keg_time ON Pour (keg_id, pour_time);
+CREATE INDEX Pour_keg_day ON Pour (keg_id, pour_day, volume);
+CREATE INDEX FridgeTemp_fridge_time ON FridgeTemp (fridge_id, read_time);
+CREATE INDEX KegDaily_day ON KegDaily (day, amount);
+
+-- --------------------
+-- ROLLUP TRIGGERS
+--
+-- The rollups are kept by triggers, so they are updated in the same
+-- transaction as every Pour and BeerRating insert, whichever process makes
+-- it.  A spooled pour replayed with INSERT IGNORE fires them only once.
+-- --------------------
+DELIMITER //
+
+CREATE TRIGGER PourRollup AFTER INSERT ON Pour
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO KegVolume (keg_id) VALUES (NEW.keg_id);
+    UPDATE KegVolume
+    SET poured = poured + NEW.volume, pours = pours + 1
+    WHERE keg_id = NEW.keg_id;
+
+    INSERT IGNORE INTO KegDaily (keg_id, day) VALUES (NEW.keg_id, DATE(NEW.pour_time));
+    UPDATE KegDaily
+    SET amount = amount + NEW.volume, pours = pours + 1
+    WHERE keg_id = NEW.keg_id AND day = DATE(NEW.pour_time);
+END//
+
+CREATE TRIGGER BeerRatingRollup AFTER INSERT ON BeerRating
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO BeerRatingTotal (beer_id) VALUES (NEW.beer_id);
+    UPDATE BeerRatingTotal
+    SET ratings = ratings + (NEW.rating IS NOT NULL), total = total + IFNULL(NEW.rating, 0)
+    WHERE beer_id = NEW.beer_id;
+END//
+
+DELIMITER ;
+
+-- --------------------
+-- SCHEMA VERSION TABLE
+--
+-- The migration a database is at.  This script builds the schema of
+-- migration 3 in smartkeg/migrate.py, and `smartkeg migrate` applies the
+-- migrations after it.
+-- --------------------
+CREATE TABLE SchemaVersion (
+    version     INTEGER     NOT NULL,
+    description VARCHAR(128),
+    applied     TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(version)
+);
+
+INSERT INTO SchemaVersion (version, description) VALUES (3, 'Built from build.sql');
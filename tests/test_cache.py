@@ -0,0 +1,73 @@
+#
+# Filename:     test_cache.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Checks the forecast cache survives a bad cache file and that
+#               clearing it reaches the disk.
+#
+
+from smartkeg.cache import ForecastCache
+from smartkeg.model import TimeSeriesRegression
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+DATA = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0] * 3
+
+class ForecastCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'forecast.cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_missing_file(self):
+        cache = ForecastCache(path=self.path)
+
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_unreadable_file(self):
+        files = (
+            b'',
+            b'not a pickle',
+            pickle.dumps(42),
+            pickle.dumps([1, 2, 3]),
+            pickle.dumps([('key', 'value')])[:-4]
+        )
+
+        for data in files:
+            with self.subTest(data=data):
+                self.write(data)
+
+                with self.assertLogs(level='WARNING'):
+                    cache = ForecastCache(path=self.path)
+
+                self.assertEqual(len(cache.entries), 0)
+
+    def test_round_trip(self):
+        cache = ForecastCache(path=self.path)
+        forecast = cache.forecast(TimeSeriesRegression(7), DATA)
+        cache.save()
+
+        self.assertEqual(ForecastCache(path=self.path).lookup(TimeSeriesRegression(7), DATA), forecast)
+
+    def test_clear_is_saved(self):
+        cache = ForecastCache(path=self.path)
+        cache.forecast(TimeSeriesRegression(7), DATA)
+        cache.save()
+
+        cache.clear()
+        cache.save()
+
+        self.assertIsNone(ForecastCache(path=self.path).lookup(TimeSeriesRegression(7), DATA))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#
+# Filename:     test_database.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Checks the shared connection of an unpooled
+#               DatabaseInterface is reopened and held by one thread at a
+#               time.
+#
+
+from smartkeg import dbbench
+from smartkeg.database import DatabaseInterface, DatabasePoolError
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+BUILD = os.path.join(os.path.dirname(__file__), '..', 'static', 'sql', 'build.sql')
+
+class SharedConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.dbi = DatabaseInterface(None, os.path.join(self.dir, 'smartkeg.db'), None, None, backend='sqlite')
+        dbbench.create(self.dbi, BUILD)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_reconnects_lost_connection(self):
+        self.dbi.shared.close()
+
+        with self.dbi as dbi:
+            self.assertEqual(dbi.select('SELECT id FROM Fridge'), [])
+
+    def test_reconnects_missing_connection(self):
+        self.dbi.shared = None
+
+        with self.dbi as dbi:
+            self.assertEqual(dbi.select('SELECT id FROM Fridge'), [])
+
+    def test_unavailable_raises_and_unlocks(self):
+        self.dbi.shared = None
+        self.dbi.factory = lambda: None
+
+        with self.assertRaises(DatabasePoolError):
+            with self.dbi:
+                pass
+
+        free = []
+        thread = threading.Thread(target=lambda: free.append(self.dbi.lock.acquire(timeout=1.0)))
+        thread.start()
+        thread.join()
+        self.assertEqual(free, [True])
+
+    def test_connection_held_by_one_thread(self):
+        other = []
+
+        def run():
+            with self.dbi:
+                other.append(True)
+
+        with self.dbi:
+            thread = threading.Thread(target=run)
+            thread.start()
+            thread.join(0.2)
+            self.assertEqual(other, [])
+
+        thread.join()
+        self.assertEqual(other, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+#
+# Filename:     test_handler.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Checks the API handler serves the live state snapshot as it
+#               was encoded, against a SQLite database built from the real
+#               schema.
+#
+
+from smartkeg import dbbench, query
+from smartkeg.database import DatabaseInterface
+from smartkeg.http.handler import APIHandler, default
+from smartkeg.http.http import HTTPServerManager
+from smartkeg.http.snapshot import LiveState
+from smartkeg.simulation import StockoutSimulator
+from unittest import mock
+import gzip
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import unittest
+
+BUILD = os.path.join(os.path.dirname(__file__), '..', 'static', 'sql', 'build.sql')
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.dbi = DatabaseInterface(None, os.path.join(self.dir, 'smartkeg.db'), None, None, backend='sqlite')
+        dbbench.create(self.dbi, BUILD)
+        dbbench.seed(self.dbi, kegs=2, days=3)
+
+        self.api = APIHandler(self.dbi)
+        self.live = LiveState(self.api.publish, default=default)
+
+        with self.dbi as dbi:
+            self.kegs = dbi.select(*query.get_now_serving())
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def get(self, endpoint):
+        return self.api.transact('GET', 'get/' + endpoint, None, None)
+
+    def test_serving_is_snapshot_encoding(self):
+        expected = json.loads(self.get('serving'))
+        self.live.update(kegs=[dict(x, forecast=[1.0, 2.0]) for x in self.kegs], temperature=38.0)
+
+        res = self.get('serving')
+
+        self.assertIs(res, self.live.current.serving)
+        self.assertEqual(json.loads(res.body), expected)
+        self.assertEqual(gzip.decompress(res.gzip), res.body)
+        self.assertEqual(json.loads(self.live.current.body)['temperature'], 38.0)
+
+    def test_temperature_change_keeps_serving_encoding(self):
+        self.live.update(kegs=self.kegs, temperature=38.0)
+        serving = self.api.serving
+
+        self.live.update(temperature=39.0)
+
+        self.assertIs(self.api.serving, serving)
+        self.assertEqual(self.live.snapshots, 2)
+
+    def test_refresh_rereads_serving(self):
+        self.live.update(kegs=[], temperature=38.0)
+        self.assertEqual(json.loads(self.get('serving').body), [])
+
+        self.api.refresh()
+
+        self.assertEqual(json.loads(self.get('serving').body), json.loads(json.dumps(self.kegs, default=default)))
+
+    def test_depletion_uses_published_forecasts(self):
+        kegs = [dict(x, volume=10.0, remaining=0.5, forecast=[1.0, 2.0]) for x in self.kegs]
+        self.live.update(kegs=kegs, temperature=38.0)
+
+        with self.dbi as dbi:
+            dbi.update('DELETE FROM KegDaily')
+
+        res = json.loads(self.get('depletion'))
+
+        self.assertEqual([x['keg_id'] for x in res], [x['keg_id'] for x in self.kegs])
+        self.assertEqual([x['days_to_empty'] for x in res], [3.5] * len(kegs))
+
+    def test_depletion_cache_dropped_on_new_forecasts(self):
+        self.live.update(kegs=[dict(x, volume=10.0, remaining=0.5, forecast=[1.0]) for x in self.kegs])
+        self.assertEqual(json.loads(self.get('depletion'))[0]['days_to_empty'], 5.0)
+
+        self.live.update(kegs=[dict(x, volume=10.0, remaining=0.5, forecast=[2.0]) for x in self.kegs])
+        self.assertEqual(json.loads(self.get('depletion'))[0]['days_to_empty'], 2.5)
+
+    def test_stockout_memoized_per_forecast(self):
+        calls = []
+        sim = StockoutSimulator(trials=200, seed=0)
+        self.api.simulator.simulate = lambda *args: calls.append(args) or sim.simulate(*args)
+
+        kegs = [dict(x, volume=10.0, remaining=0.5, forecast=[1.0]) for x in self.kegs]
+        self.live.update(kegs=kegs)
+
+        first = self.api.depletion([('delivery', '3')])
+        second = self.api.depletion([('delivery', '3')])
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([x['stockout'] for x in first], [x['stockout'] for x in second])
+
+        self.api.depletion([('delivery', '9')])
+        self.assertEqual(len(calls), 2)
+
+        self.live.update(kegs=[dict(x, remaining=0.1) for x in kegs])
+        self.api.depletion([('delivery', '3')])
+        self.assertEqual(len(calls), 3)
+
+        self.live.update(kegs=[dict(x, forecast=[2.0]) for x in kegs])
+        self.api.depletion([('delivery', '3')])
+        self.assertEqual(len(calls), 4)
+
+        with self.dbi as dbi:
+            dbi.update('DELETE FROM KegDaily')
+
+        self.api.depletion([('delivery', '3')])
+        self.assertEqual(len(calls), 4)
+
+
+class InvalidateTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.dbi = DatabaseInterface(None, os.path.join(self.dir, 'smartkeg.db'), None, None, backend='sqlite')
+        dbbench.create(self.dbi, BUILD)
+        dbbench.seed(self.dbi, kegs=2, days=3)
+
+        self.api = APIHandler(self.dbi)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def get(self, endpoint):
+        self.api.transact('GET', 'get/' + endpoint, None, None)
+
+    def test_keg_change_keeps_beers_and_brewers(self):
+        for endpoint in ('beer', 'brewer', 'remaining'):
+            self.get(endpoint)
+
+        self.api.invalidate('keg')
+
+        for endpoint in ('beer', 'brewer', 'remaining'):
+            self.get(endpoint)
+
+        self.assertEqual(self.api.cache.stats()['hits'], 2)
+        self.assertEqual(self.api.cache.stats()['invalidations'], 1)
+
+    def test_every_event_has_dependents(self):
+        for event in ('pour', 'keg', 'rating'):
+            self.assertTrue([x for x, events in APIHandler.DEPENDS.items() if event in events], event)
+
+    def test_invalidations_never_dropped(self):
+        with mock.patch.object(HTTPServerManager, 'create_qrcode'):
+            http = HTTPServerManager('localhost', 0, self.dir, history=1)
+
+        http.snapshot('first')
+        http.snapshot('dropped')
+
+        for event in ('pour', 'pour', 'keg'):
+            http.invalidate(event)
+
+        received = []
+        done = threading.Event()
+
+        class API(object):
+            def invalidate(self, *events):
+                received.append(set(events))
+                done.set()
+
+                # Parks the thread here rather than in the queue, which
+                # goes away with the test.
+                threading.Event().wait()
+
+        # Give the queue's feeder thread time to flush, so the burst is
+        # read back in one go.
+        while http.invalidations.qsize() < 3:
+            threading.Event().wait(0.01)
+
+        thread = threading.Thread(target=http.expire, args=(API(),))
+        thread.daemon = True
+        thread.start()
+
+        self.assertTrue(done.wait(5.0))
+        self.assertEqual(received, [{'pour', 'keg'}])
+        self.assertEqual(http.updates.get(timeout=1.0), ('snapshot', 'first'))
+        self.assertRaises(queue.Empty, http.updates.get_nowait)
+
+
+if __name__ == '__main__':
+    unittest.main()
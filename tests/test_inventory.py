@@ -0,0 +1,86 @@
+#
+# Filename:     test_inventory.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Checks the depletion curve and the empty and reorder dates
+#               worked out from a keg's forecast.
+#
+
+from smartkeg.inventory import DepletionCurve, depletion
+import datetime
+import unittest
+
+TODAY = datetime.date(2026, 10, 18)
+
+def keg(volume, remaining):
+    return {'keg_id': 1, 'volume': volume, 'remaining': remaining}
+
+
+class DepletionCurveTest(unittest.TestCase):
+    def test_demand_repeats_season(self):
+        curve = DepletionCurve([1.0, 2.0, 3.0], horizon=9)
+
+        self.assertEqual(curve.demand(0), 0.0)
+        self.assertEqual(curve.demand(3), 6.0)
+        self.assertEqual(curve.demand(7), 13.0)
+        self.assertEqual(curve.demand(100), 18.0)
+
+    def test_days_until_interpolates(self):
+        curve = DepletionCurve([2.0], horizon=30)
+
+        self.assertEqual(curve.days_until(0), 0.0)
+        self.assertEqual(curve.days_until(4.0), 2.0)
+        self.assertEqual(curve.days_until(5.0), 2.5)
+        self.assertIsNone(curve.days_until(61.0))
+
+    def test_zero_demand(self):
+        for forecast in ([0.0, 0.0], [-1.0, float('nan')], [], None):
+            curve = DepletionCurve(forecast, horizon=30)
+
+            self.assertEqual(curve.demand(30), 0.0)
+            self.assertIsNone(curve.days_until(1.0))
+
+
+class DepletionTest(unittest.TestCase):
+    def test_days_until_empty(self):
+        res = depletion(keg(10.0, 0.5), [1.0, 2.0], lead_time=1, today=TODAY)
+
+        self.assertEqual(res['left'], 5.0)
+        self.assertEqual(res['days_to_empty'], 3.5)
+        self.assertEqual(res['empty_date'], datetime.date(2026, 10, 21))
+
+    def test_zero_demand_never_empties(self):
+        res = depletion(keg(10.0, 0.5), [0.0] * 7, today=TODAY)
+
+        self.assertEqual(res['reorder_point'], 0.0)
+        self.assertIsNone(res['days_to_empty'])
+        self.assertIsNone(res['empty_date'])
+        self.assertIsNone(res['days_to_reorder'])
+
+    def test_empty_keg(self):
+        for remaining in (0, None, -0.1):
+            res = depletion(keg(10.0, remaining), [1.0], today=TODAY)
+
+            self.assertEqual(res['left'], 0.0)
+            self.assertEqual(res['days_to_empty'], 0.0)
+            self.assertEqual(res['empty_date'], TODAY)
+            self.assertEqual(res['reorder_date'], TODAY)
+
+    def test_reorder_threshold(self):
+        res = depletion(keg(10.0, 1.0), [1.0], lead_time=3, safety=2.0, today=TODAY)
+
+        self.assertEqual(res['reorder_point'], 5.0)
+        self.assertEqual(res['days_to_reorder'], 5.0)
+        self.assertEqual(res['reorder_date'], datetime.date(2026, 10, 23))
+        self.assertEqual(res['days_to_empty'], 10.0)
+
+    def test_at_reorder_point(self):
+        res = depletion(keg(6.0, 0.5), [1.0], lead_time=3, today=TODAY)
+
+        self.assertEqual(res['reorder_point'], 3.0)
+        self.assertEqual(res['days_to_reorder'], 0.0)
+        self.assertEqual(res['reorder_date'], TODAY)
+
+
+if __name__ == '__main__':
+    unittest.main()
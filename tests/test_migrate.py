@@ -0,0 +1,86 @@
+#
+# Filename:     test_migrate.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Checks a database that predates migrations is migrated in
+#               steps, with its rollups rebuilt only once they can be, and
+#               that a failed rebuild fails the command.
+#
+
+from smartkeg import dbbench, migrate
+from smartkeg.database import DatabaseInterface
+from unittest import mock
+import os
+import shutil
+import tempfile
+import unittest
+
+BUILD = os.path.join(os.path.dirname(__file__), '..', 'static', 'sql', 'build.sql')
+
+# The tables the migrations start from, as they were before SchemaVersion.
+SCHEMA = """
+    CREATE TABLE Keg (id INTEGER PRIMARY KEY, now_serving INTEGER);
+    CREATE TABLE Beer (id INTEGER PRIMARY KEY);
+    CREATE TABLE BeerRating (id INTEGER PRIMARY KEY, beer_id INTEGER, rating INTEGER);
+    CREATE TABLE Pour (id INTEGER PRIMARY KEY, keg_id INTEGER, pour_time TIMESTAMP, volume FLOAT);
+    CREATE TABLE FridgeTemp (id INTEGER PRIMARY KEY, fridge_id INTEGER, sensor_id INTEGER, read_time TIMESTAMP, temperature FLOAT);
+"""
+
+class MigrateTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'smartkeg.db')
+        self.dbi = DatabaseInterface(None, self.path, None, None, backend='sqlite')
+        self.dbi.conn.executescript(SCHEMA)
+
+        with self.dbi as d:
+            d.insert('INSERT INTO Keg (id, now_serving) VALUES (%s, %s)', [(1, 1)])
+            d.insert(
+                'INSERT INTO Pour (keg_id, pour_time, volume) VALUES (%s, %s, %s)',
+                [(1, '2026-01-01 10:00:00', 1.0), (1, '2026-01-02 10:00:00', 2.0)]
+            )
+
+        self.migrator = migrate.Migrator(self.dbi)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def daily(self):
+        with self.dbi as d:
+            return d.select('SELECT day, amount FROM KegDaily ORDER BY day')
+
+    def test_rollups_rebuilt_once_pour_day_exists(self):
+        self.assertEqual(self.migrator.migrate(2), [1, 2])
+        self.assertEqual(self.daily(), [])
+
+        self.assertEqual(self.migrator.migrate(), [3, 4])
+        self.assertEqual(
+            self.daily(),
+            [{'day': '2026-01-01', 'amount': 1.0}, {'day': '2026-01-02', 'amount': 2.0}]
+        )
+
+    def test_failed_rebuild_raises(self):
+        with mock.patch.object(migrate.rollup, 'rebuild', return_value=False):
+            with self.assertRaises(migrate.MigrationError):
+                self.migrator.migrate()
+
+        self.assertEqual(self.migrator.current(), 4)
+
+    def test_failed_rebuild_exits_non_zero(self):
+        with mock.patch.object(migrate.rollup, 'rebuild', return_value=False):
+            with self.assertRaises(SystemExit) as e:
+                migrate.main(['--sqlite', self.path])
+
+        self.assertNotIn(e.exception.code, (None, 0))
+
+    def test_checks_explain(self):
+        dbi = DatabaseInterface(None, os.path.join(self.dir, 'built.db'), None, None, backend='sqlite')
+        dbbench.create(dbi, BUILD)
+
+        with dbi as d:
+            for name, (sql, params), _ in migrate.CHECKS:
+                self.assertIsNotNone(d.select(d.backend.explain(sql), params), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
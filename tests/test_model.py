@@ -0,0 +1,321 @@
+#
+# Filename:     test_model.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Checks the forecasting models against each other and on
+#               degenerate series.
+#
+
+from smartkeg.cache import ForecastCache
+from smartkeg.model import BatchTimeSeriesRegression, HoltWinters, TimeSeriesRegression, VectorizedTimeSeriesRegression, daily_matrix
+import contextlib
+import datetime
+import io
+import math
+import random
+import unittest
+
+def series(n, seed=0):
+    rng = random.Random(seed)
+    return [round(rng.uniform(0.5, 12.0), 2) + 3 * (i % 7 == 5) for i in range(n)]
+
+# Series the engines must agree on, degenerate ones included.
+CORPUS = {
+    'random':       series(50),
+    'trend':        [0.5 * x for x in range(1, 30)],
+    'zeros':        [0.0] * 21,
+    'constant':     [2.1] * 21,
+    'constant int': [3] * 10,
+    'zero window':  series(14, seed=5) + [0.0] * 9 + series(14, seed=6),
+    'leading zero': [0.0] * 8 + series(20, seed=7),
+    'sparse':       [0, 0, 5, 0, 0, 0, 7] * 4,
+    'short':        [1.0, 2.0, 3.0],
+    'single':       [4.0]
+}
+
+def assert_close(test, a, b, tol=1e-9):
+    test.assertEqual(len(a), len(b))
+
+    for x, y in zip(a, b):
+        test.assertTrue(math.isfinite(x) and math.isfinite(y), (a, b))
+        test.assertTrue(math.isclose(x, y, rel_tol=tol, abs_tol=tol), (a, b))
+
+class CorpusTest(unittest.TestCase):
+    def cases(self):
+        for name, data in sorted(CORPUS.items()):
+            for periods in range(1, 8):
+                yield name, data, periods
+
+    def test_engines_agree(self):
+        for name, data, periods in self.cases():
+            with self.subTest(series=name, periods=periods):
+                pure = TimeSeriesRegression(periods)
+                vectorized = VectorizedTimeSeriesRegression(periods)
+
+                assert_close(self, pure.forecast(data), vectorized.forecast(data))
+                assert_close(self, pure.seasonal_indicies, vectorized.seasonal_indicies)
+
+    def test_batch_agrees(self):
+        for name, data, periods in self.cases():
+            with self.subTest(series=name, periods=periods):
+                assert_close(
+                    self,
+                    TimeSeriesRegression(periods).forecast(data),
+                    BatchTimeSeriesRegression(periods).forecast([data])[0]
+                )
+
+    def test_incremental_agrees(self):
+        for name, data, periods in self.cases():
+            with self.subTest(series=name, periods=periods):
+                reg = TimeSeriesRegression(periods)
+
+                for x in data:
+                    prediction = reg.update(x)
+
+                assert_close(self, prediction, TimeSeriesRegression(periods).forecast(data))
+
+    def test_constant_series_is_flat(self):
+        for periods in range(1, 8):
+            reg = TimeSeriesRegression(periods)
+            reg.forecast([0.0] * 21)
+
+            self.assertEqual(reg.prediction, [0.0] * periods)
+
+
+class IncrementalRegressionTest(unittest.TestCase):
+    ENGINES = (TimeSeriesRegression, VectorizedTimeSeriesRegression)
+
+    def test_update_matches_refit(self):
+        data = series(60)
+
+        for engine in self.ENGINES:
+            for periods in range(1, 8):
+                reg = engine(periods)
+                reg.forecast(data[:2 * periods + 1])
+
+                for i in range(2 * periods + 1, len(data)):
+                    prediction = reg.update(data[i])
+                    assert_close(self, prediction, engine(periods).forecast(data[:i + 1]))
+
+    def test_update_from_empty_matches_refit(self):
+        data = series(30, seed=1)
+
+        for engine in self.ENGINES:
+            for periods in range(1, 8):
+                reg = engine(periods)
+
+                for x in data:
+                    prediction = reg.update(x)
+
+                assert_close(self, prediction, engine(periods).forecast(data))
+
+    def test_revise_last_matches_refit(self):
+        data = series(40, seed=2)
+
+        for engine in self.ENGINES:
+            for periods in range(1, 8):
+                reg = engine(periods)
+                reg.forecast(data[:-1])
+                reg.update(1.0)
+                reg.revise_last(2.5)
+                prediction = reg.revise_last(data[-1])
+
+                assert_close(self, prediction, engine(periods).forecast(data))
+
+    def test_update_through_zero_window(self):
+        data = series(21, seed=3) + [0.0] * 8 + series(14, seed=4)
+
+        for periods in range(1, 8):
+            reg = TimeSeriesRegression(periods)
+
+            for x in data:
+                prediction = reg.update(x)
+                reg.revise_last(x)
+
+            self.assertTrue(all(math.isfinite(x) for x in prediction))
+
+
+class KegSpanTest(unittest.TestCase):
+    def rows(self):
+        start = datetime.date(2026, 9, 1)
+        rows = []
+
+        for keg, first, data in ((1, 0, series(30, seed=8)), (2, 18, series(12, seed=9)), (3, 18, series(12, seed=10))):
+            for i, x in enumerate(data):
+                if x:
+                    rows.append({'keg_id': keg, 'day': start + datetime.timedelta(days=first + i), 'amount': x})
+
+        return rows
+
+    def test_daily_matrix_starts_at_first_pour(self):
+        kegs, matrix = daily_matrix(self.rows())
+
+        self.assertEqual(kegs, [1, 2, 3])
+        self.assertEqual([len(x) for x in matrix], [30, 12, 12])
+        self.assertTrue(all(x[0] > 0 for x in matrix))
+
+    def test_batch_fits_each_span(self):
+        kegs, matrix = daily_matrix(self.rows())
+
+        for periods in range(1, 8):
+            with self.subTest(periods=periods):
+                batch = BatchTimeSeriesRegression(periods)
+                prediction = batch.forecast(matrix)
+                residuals = batch.residuals(matrix)
+
+                for row, forecast, errors in zip(matrix, prediction, residuals):
+                    assert_close(self, forecast, TimeSeriesRegression(periods).forecast(row))
+                    self.assertEqual(len(errors), len(row))
+
+    def test_cache_keys_spans(self):
+        kegs, matrix = daily_matrix(self.rows())
+        cache = ForecastCache()
+        batch = BatchTimeSeriesRegression(7)
+
+        self.assertEqual(cache.forecast(batch, matrix), batch.forecast(matrix))
+        self.assertIsNotNone(cache.lookup(batch, matrix))
+        self.assertIsNone(cache.lookup(batch, matrix[:2]))
+
+
+class BaselineRegression(TimeSeriesRegression):
+    """
+    The seasonal indices of TimeSeriesRegression as they were before the
+    NumPy engine was added, kept to pin down how the fixed ones differ.
+    """
+    def calculate_seasonal_indices(self, data):
+        self.seasonal_indicies = []
+        season_avg = []
+        i = 0
+
+        if self.periods % 2 == 0:
+            sma = self.simple_moving_avg(data)
+            cma = self.centered_moving_avg(sma)
+        else:
+            cma = self.simple_moving_avg(data)
+
+        rma = self.ratio_to_moving_avg(data, cma)
+
+        while i < self.periods and i < len(rma):
+            points = rma[i::self.periods]
+
+            print(rma)
+            print(self.periods)
+            print(points)
+
+            season_avg.append(sum(points) / len(points))
+            i += 1
+
+        for avg in season_avg:
+            self.seasonal_indicies.append((avg - self.periods) / sum(season_avg))
+
+        return lambda x: self.seasonal_indicies[(x % self.periods)] if len(self.seasonal_indicies) > x % self.periods else 0
+
+    def centered_moving_avg(self, simple_moving_avg):
+        i = 0
+        moving_avg = []
+
+        while i < len(simple_moving_avg) - 1:
+            avg = float(sum(simple_moving_avg[i:i + 1])) / 2.0
+            moving_avg.append(avg)
+            i += 1
+
+        return moving_avg
+
+    def ratio_to_moving_avg(self, data_set, cma):
+        i = int(math.floor(self.periods / 2))
+        ratio_to_ma = []
+
+        for avg in cma:
+            ratio_to_ma.append(data_set[i] / avg)
+            i += 1
+
+        return ratio_to_ma
+
+    def simple_moving_avg(self, data_set):
+        i = 0
+        moving_avg = []
+
+        while i <= len(data_set) - self.periods:
+            period_avg = sum(data_set[i:self.periods]) / self.periods
+            moving_avg.append(period_avg)
+            i += 1
+
+        return moving_avg
+
+
+class BaselineChangeTest(unittest.TestCase):
+    DATA = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
+
+    def test_simple_moving_avg_slides(self):
+        # The baseline summed data[i:periods], a window that shrank to
+        # nothing instead of sliding along the series.
+        self.assertEqual(BaselineRegression(4).simple_moving_avg(self.DATA), [2.5, 2.25, 1.75, 1.0, 0.0])
+        self.assertEqual(TimeSeriesRegression(4).simple_moving_avg(self.DATA), [2.5, 3.5, 4.5, 5.5, 6.5])
+
+    def test_centered_moving_avg_pairs(self):
+        # The baseline halved each average rather than averaging it with
+        # the next.
+        sma = [2.5, 3.5, 4.5, 5.5, 6.5]
+
+        self.assertEqual(BaselineRegression(4).centered_moving_avg(sma), [1.25, 1.75, 2.25, 2.75])
+        self.assertEqual(TimeSeriesRegression(4).centered_moving_avg(sma), [3.0, 4.0, 5.0, 6.0])
+
+    def test_forecast(self):
+        data = [3.0, 5.0, 4.0, 6.0, 8.0, 7.0, 9.0, 10.0, 9.0, 11.0, 13.0, 12.0]
+
+        # A series over twice the season long reached the empty windows,
+        # and the baseline divided by zero.
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertRaises(ZeroDivisionError, BaselineRegression(4).forecast, data)
+
+        assert_close(
+            self,
+            TimeSeriesRegression(4).forecast(data),
+            [10.000783922643235, 11.129072778531619, 12.219453030384381, 13.293559494995089]
+        )
+
+    def test_forecast_prints_nothing(self):
+        data = [3.0, 5.0, 4.0, 6.0]
+        baseline = io.StringIO()
+        fixed = io.StringIO()
+
+        with contextlib.redirect_stdout(baseline):
+            old = BaselineRegression(3).forecast(data)
+
+        with contextlib.redirect_stdout(fixed):
+            new = TimeSeriesRegression(3).forecast(data)
+
+        self.assertNotEqual(baseline.getvalue(), '')
+        self.assertEqual(fixed.getvalue(), '')
+        self.assertNotEqual(old, new)
+
+
+class HoltWintersTest(unittest.TestCase):
+    def test_multiplicative_falls_back_on_zeros(self):
+        data = [0, 1, 2, 3, 4, 5, 6] * 3
+        hw = HoltWinters(7, seasonal=HoltWinters.MULTIPLICATIVE)
+
+        self.assertEqual(hw.forecast(data), HoltWinters(7).forecast(data))
+        self.assertEqual(hw.mode, HoltWinters.ADDITIVE)
+        self.assertEqual(hw.seasonal, HoltWinters.MULTIPLICATIVE)
+
+    def test_multiplicative_falls_back_on_zero_update(self):
+        hw = HoltWinters(7, seasonal=HoltWinters.MULTIPLICATIVE)
+        hw.forecast([1, 2, 3, 4, 5, 6, 7] * 3)
+        self.assertEqual(hw.mode, HoltWinters.MULTIPLICATIVE)
+
+        prediction = hw.update(0)
+
+        self.assertEqual(hw.mode, HoltWinters.ADDITIVE)
+        self.assertEqual(len(prediction), 7)
+        self.assertEqual(len(hw.revise_last(2)), 7)
+
+    def test_multiplicative_positive_series(self):
+        hw = HoltWinters(7, seasonal=HoltWinters.MULTIPLICATIVE)
+
+        for x, y in zip(hw.forecast([1, 2, 3, 4, 5, 6, 7] * 3), [1, 2, 3, 4, 5, 6, 7]):
+            self.assertAlmostEqual(x, y)
+
+
+if __name__ == '__main__':
+    unittest.main()
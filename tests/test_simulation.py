@@ -0,0 +1,45 @@
+#
+# Filename:     test_simulation.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Checks the seeded stockout simulation against deliveries due
+#               before and after a keg's projected empty date.
+#
+
+from smartkeg.simulation import StockoutSimulator
+import numpy as np
+import unittest
+
+class StockoutSimulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.sim = StockoutSimulator(trials=2000, seed=0, chunk=500)
+        self.residuals = np.random.default_rng(1).normal(0, 0.5, size=(1, 60))
+
+    def test_delivery_before_empty(self):
+        # 10 left at 2 a day runs dry on day 5.
+        risk = self.sim.simulate([10.0], [[2.0]], self.residuals, 2)
+
+        self.assertLess(risk[0], 0.01)
+
+    def test_delivery_after_empty(self):
+        risk = self.sim.simulate([10.0], [[2.0]], self.residuals, 9)
+
+        self.assertGreater(risk[0], 0.99)
+
+    def test_zero_variance(self):
+        residuals = np.zeros((2, 30))
+
+        self.assertEqual(self.sim.simulate([10.0, 10.0], [[2.0], [1.0]], residuals, 5), [1.0, 0.0])
+        self.assertEqual(self.sim.simulate([10.0, 10.0], [[2.0], [1.0]], residuals, 4), [0.0, 0.0])
+
+    def test_seeded(self):
+        a = self.sim.simulate([10.0], [[2.0]], self.residuals, 5)
+        b = StockoutSimulator(trials=2000, seed=0, chunk=500).simulate([10.0], [[2.0]], self.residuals, 5)
+
+        self.assertEqual(a, b)
+        self.assertGreater(a[0], 0.0)
+        self.assertLess(a[0], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+#
+# Filename:     test_spool.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Drains spooled temperature readings into a SQLite database
+#               built from the real schema.
+#
+
+from smartkeg import dbbench
+from smartkeg.database import DatabaseInterface
+from smartkeg.peripherals.temperature import TemperatureSensorManager
+from smartkeg.spool import Spool
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+BUILD = os.path.join(os.path.dirname(__file__), '..', 'static', 'sql', 'build.sql')
+SENSORS = ['28-000005748f01', '28-00000574d4ae']
+
+class SpoolTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.dbi = DatabaseInterface(None, os.path.join(self.dir, 'smartkeg.db'), None, None, backend='sqlite')
+        dbbench.create(self.dbi, BUILD)
+
+        self.path = os.path.join(self.dir, 'temperature.spool')
+        self.spool = Spool(self.path, self.dbi)
+        self.manager = TemperatureSensorManager(
+            300,
+            sensors=SENSORS,
+            dbi=self.dbi,
+            spool=self.spool,
+            fridge='smartkeg'
+        )
+
+    def tearDown(self):
+        self.spool.close()
+        shutil.rmtree(self.dir)
+
+    def select(self, query, params=None):
+        with self.dbi as dbi:
+            return dbi.select(query, params)
+
+    def test_resolve_registers_fridge_and_sensors(self):
+        self.assertTrue(self.manager.resolve())
+        self.assertEqual(len(self.select('SELECT id FROM Fridge')), 1)
+        self.assertEqual(
+            sorted(x['name'] for x in self.select('SELECT name FROM Sensor')),
+            SENSORS
+        )
+
+    def test_drain_stores_readings(self):
+        self.assertTrue(self.manager.resolve())
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.25, SENSORS[1]: 39.5}))
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.5}))
+        self.spool.sync()
+
+        self.assertEqual(self.spool.drain(), 3)
+
+        rows = self.select('SELECT fridge_id, sensor_id, temperature FROM FridgeTemp ORDER BY id')
+        self.assertEqual([(x['fridge_id'], x['temperature']) for x in rows], [
+            (self.manager.fridge_id, 38.25),
+            (self.manager.fridge_id, 39.5),
+            (self.manager.fridge_id, 38.5)
+        ])
+        self.assertEqual(
+            [x['sensor_id'] for x in rows],
+            [self.manager.sensor_ids[x] for x in (SENSORS[0], SENSORS[1], SENSORS[0])]
+        )
+        self.assertEqual(self.spool.offset, os.path.getsize(self.path))
+        self.assertFalse(os.path.exists(self.path + '.rejected'))
+
+    def test_drain_replays_without_duplicates(self):
+        self.assertTrue(self.manager.resolve())
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.25}))
+        self.spool.sync()
+        self.spool.drain()
+
+        self.spool.save_offset(0)
+        self.spool.drain()
+
+        self.assertEqual(len(self.select('SELECT id FROM FridgeTemp')), 1)
+        self.assertFalse(os.path.exists(self.path + '.rejected'))
+
+    def test_drain_rejects_rows_not_stored(self):
+        self.assertTrue(self.manager.resolve())
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.25}))
+        self.spool.append('FridgeTemp', {'temperature': 40.0})
+        self.spool.sync()
+
+        self.assertEqual(self.spool.drain(), 2)
+        self.assertEqual(len(self.select('SELECT id FROM FridgeTemp')), 1)
+
+        with open(self.path + '.rejected') as f:
+            rejected = [json.loads(x) for x in f]
+
+        self.assertEqual([x['row']['temperature'] for x in rejected], [40.0])
+        self.assertEqual(self.spool.offset, os.path.getsize(self.path))
+
+    def test_drain_rejects_only_refused_rows(self):
+        self.assertTrue(self.manager.resolve())
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.25}))
+        self.spool.append('FridgeTemp', dict(self.manager.rows({SENSORS[1]: 39.5})[0], fridge_id=999))
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.5}))
+        self.spool.sync()
+
+        self.assertEqual(self.spool.drain(), 3)
+        self.assertEqual(
+            [x['temperature'] for x in self.select('SELECT temperature FROM FridgeTemp ORDER BY id')],
+            [38.25, 38.5]
+        )
+
+        with open(self.path + '.rejected') as f:
+            rejected = [json.loads(x) for x in f]
+
+        self.assertEqual([x['row']['fridge_id'] for x in rejected], [999])
+
+    def test_drain_keeps_rows_while_unavailable(self):
+        self.assertTrue(self.manager.resolve())
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.25}))
+        self.spool.sync()
+
+        factory = self.dbi.factory
+        self.dbi.shared = None
+        self.dbi.factory = lambda: None
+
+        for i in range(10):
+            self.assertEqual(self.spool.drain(), 0)
+
+        self.assertEqual(self.spool.offset, 0)
+        self.assertEqual(self.spool.failures, 10)
+        self.assertEqual(self.spool.delay(), self.spool.backoff)
+        self.assertFalse(os.path.exists(self.path + '.rejected'))
+
+        self.dbi.factory = factory
+
+        self.assertEqual(self.spool.drain(), 1)
+        self.assertEqual(self.spool.failures, 0)
+        self.assertEqual(len(self.select('SELECT id FROM FridgeTemp')), 1)
+
+    def test_drain_thread_survives_unavailable_database(self):
+        self.assertTrue(self.manager.resolve())
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.25}))
+
+        self.dbi.shared = None
+        self.dbi.factory = lambda: None
+        self.spool.sync_interval = self.spool.interval = 0.01
+        self.spool.start()
+        time.sleep(0.2)
+
+        self.assertTrue(self.spool.thread.is_alive())
+        self.assertGreater(self.spool.failures, 0)
+
+    def test_rotate_empties_spool(self):
+        self.assertTrue(self.manager.resolve())
+        self.manager.store(self.manager.rows({SENSORS[0]: 38.25}))
+        self.spool.sync()
+        self.spool.drain()
+
+        self.assertEqual(self.spool.drain(), 0)
+        self.assertEqual(os.path.getsize(self.path), 0)
+        self.assertEqual(self.spool.offset, 0)
+
+    def test_load_offset_clamped_to_spool(self):
+        self.spool.append('FridgeTemp', {'temperature': 40.0})
+        self.spool.sync()
+        self.spool.save_offset(10**6)
+
+        self.assertEqual(self.spool.load_offset(), os.path.getsize(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
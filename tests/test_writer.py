@@ -0,0 +1,157 @@
+#
+# Filename:     test_writer.py
+# Author:       agent
+# Date:         10/18/2026
+# Description:  Flushes temperature and pour rows through the BatchWriter
+#               into a SQLite database built from the real schema.
+#
+
+from smartkeg import dbbench, query
+from smartkeg.database import BatchWriter, DatabaseInterface
+from smartkeg.peripherals.flow import FlowMeterManager
+from smartkeg.spool import Spool
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+BUILD = os.path.join(os.path.dirname(__file__), '..', 'static', 'sql', 'build.sql')
+
+class BatchWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.dbi = DatabaseInterface(None, os.path.join(self.dir, 'smartkeg.db'), None, None, backend='sqlite')
+        dbbench.create(self.dbi, BUILD)
+        self.writer = BatchWriter(self.dbi, size=10)
+
+        with self.dbi as d:
+            d.insert('INSERT INTO Fridge (name) VALUES (%s)', [('smartkeg',)])
+            d.insert('INSERT INTO Sensor (name, type) VALUES (%s, %s)', [('28-000005748f01', 'Fridge')])
+            d.insert('INSERT INTO Brewer (name) VALUES (%s)', [('Test Brewing',)])
+            d.insert('INSERT INTO BeerType (type, subtype) VALUES (%s, %s)', [('Ale', 'Test')])
+            d.insert('INSERT INTO Beer (brewer_id, type_id, name) VALUES (%s, %s, %s)', [(1, 1, 'Test')])
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def select(self, sql):
+        with self.dbi as dbi:
+            return dbi.select(sql)
+
+    def serve(self, *kegs):
+        with self.dbi as d:
+            d.insert(
+                'INSERT INTO Keg (id, fridge_id, beer_id, volume, now_serving) VALUES (%s, %s, %s, %s, %s)',
+                [(x, 1, 1, 124.0, 1) for x in kegs]
+            )
+
+    def test_flush_writes_rows(self):
+        self.serve(1)
+        self.writer.add(*query.set_temperature([
+            [('fridge_id', 1), ('sensor_id', 1), ('read_time', '2026-10-18 12:00:00'), ('temperature', 38.25)],
+            [('fridge_id', 1), ('sensor_id', 1), ('read_time', '2026-10-18 12:05:00'), ('temperature', 38.5)]
+        ]))
+        self.writer.add(*query.set_pour([
+            [('keg_id', 1), ('pour_time', '2026-10-18 12:01:00'), ('volume', 0.75)]
+        ]))
+        self.assertEqual(self.writer.count, 3)
+
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(self.writer.count, 0)
+        self.assertEqual(
+            [x['temperature'] for x in self.select('SELECT temperature FROM FridgeTemp ORDER BY read_time')],
+            [38.25, 38.5]
+        )
+        self.assertEqual(
+            [(x['keg_id'], x['volume']) for x in self.select('SELECT keg_id, volume FROM Pour')],
+            [(1, 0.75)]
+        )
+
+    def test_failed_flush_keeps_rows(self):
+        self.writer.add(*query.set_pour([
+            [('keg_id', 1), ('pour_time', '2026-10-18 12:01:00'), ('volume', 0.75)]
+        ]))
+
+        self.assertFalse(self.writer.flush())
+        self.assertEqual(self.writer.count, 1)
+        self.assertEqual(self.select('SELECT id FROM Pour'), [])
+
+        self.writer.add(*query.set_pour([
+            [('keg_id', 1), ('pour_time', '2026-10-18 12:02:00'), ('volume', 0.5)]
+        ]))
+        self.serve(1)
+
+        self.assertTrue(self.writer.flush())
+        self.assertEqual(
+            [x['volume'] for x in self.select('SELECT volume FROM Pour ORDER BY pour_time')],
+            [0.75, 0.5]
+        )
+
+    def test_failed_flush_drops_oldest_past_limit(self):
+        self.writer.limit = 2
+        self.writer.add(*query.set_pour([
+            [('keg_id', 1), ('pour_time', '2026-10-18 12:0{}:00'.format(x)), ('volume', 0.5)] for x in range(3)
+        ]))
+
+        self.assertFalse(self.writer.flush())
+        self.assertEqual(self.writer.count, 2)
+        self.assertEqual(
+            [x[1] for x in list(self.writer.buffer.values())[0]],
+            ['2026-10-18 12:01:00', '2026-10-18 12:02:00']
+        )
+
+    def test_pours_stored_against_tap_keg(self):
+        self.serve(1, 2)
+        flow = FlowMeterManager(dbi=self.dbi, writer=self.writer)
+        flow.pins = [12, 13]
+
+        flow.store([{'pin': 13, 'amount': 0.504}, {'pin': 12, 'amount': 1.0}])
+
+        self.assertEqual(self.writer.count, 0)
+        self.assertEqual(
+            sorted((x['keg_id'], x['volume']) for x in self.select('SELECT keg_id, volume FROM Pour')),
+            [(1, 1.0), (2, 0.5)]
+        )
+
+    def test_pours_use_kegs_sent_by_parent(self):
+        self.serve(1, 2)
+        parent, child = multiprocessing.Pipe()
+        flow = FlowMeterManager(pipe=child, dbi=self.dbi, writer=self.writer)
+        flow.pins = [12, 13]
+        self.assertEqual(flow.serving(), [1, 2])
+
+        parent.send({'kegs': [2]})
+        flow.receive()
+        self.dbi.shared = None
+        self.dbi.factory = lambda: None
+
+        self.assertEqual(flow.rows([{'pin': 12, 'amount': 1.0}])[0]['keg_id'], 2)
+
+    def test_pours_spooled(self):
+        self.serve(1)
+        spool = Spool(os.path.join(self.dir, 'pour.spool'), self.dbi)
+        flow = FlowMeterManager(dbi=self.dbi, spool=spool)
+        flow.pins = [12]
+
+        flow.store([{'pin': 12, 'amount': 0.5}])
+        self.assertEqual(self.select('SELECT id FROM Pour'), [])
+        self.assertEqual(spool.drain(), 1)
+        spool.close()
+
+        rows = self.select('SELECT keg_id, volume, spool_key FROM Pour')
+        self.assertEqual([(x['keg_id'], x['volume']) for x in rows], [(1, 0.5)])
+        self.assertIsNotNone(rows[0]['spool_key'])
+
+    def test_pours_without_keg_not_stored(self):
+        self.serve(1)
+        flow = FlowMeterManager(dbi=self.dbi, writer=self.writer)
+        flow.pins = [12, 13]
+
+        flow.store([{'pin': 13, 'amount': 0.5}])
+
+        self.assertEqual(self.select('SELECT id FROM Pour'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()